@@ -0,0 +1,338 @@
+"""Achievle без интерфейса: python -m achievle <команда>.
+
+Работает только через quest_data и не импортирует PyQt6, поэтому подходит для
+скриптов (ночной импорт прогресса, отчёты, резервные копии). Данные загружаются
+один раз за запуск, а операции из входного потока применяются пакетами — по
+одной записи журнала (или транзакции SQLite) на команду.
+
+С флагом --ndjson вывод идёт построчно в JSON; "-" вместо аргументов читает
+NDJSON из stdin, например:
+
+    python -m achievle list --ndjson | jq ...
+    cat progress.ndjson | python -m achievle progress -
+
+Без --profile команды работают с профилем по умолчанию.
+"""
+import argparse
+import json
+import os
+import sys
+
+import quest_data
+from quest_profiles import DEFAULT_PROFILE, ProfileManager
+from quest_records import to_json
+
+
+class CliError(Exception):
+    pass
+
+
+def _dump(obj):
+    return json.dumps(obj, ensure_ascii=False, default=to_json)
+
+
+def _read_ndjson(stream):
+    """Объекты из NDJSON; пустые строки пропускаются, строка не в JSON считается самим значением (id)."""
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        if line[0] in "{[\"":
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                raise CliError(f"строка {number}: неверный JSON ({e})")
+        else:
+            yield line
+
+
+def _find(data, ids):
+    """Задачи по id в порядке ids и список id, которых нет среди активных."""
+    by_id = {q["id"]: q for q in data["quests"]}
+    found, missing = [], []
+    for quest_id in ids:
+        quest = by_id.get(quest_id)
+        if quest is None:
+            missing.append(quest_id)
+        else:
+            found.append(quest)
+    return found, missing
+
+
+def _quest_fields(fields):
+    if not isinstance(fields, dict):
+        raise CliError(f"ожидался объект задачи, получено: {fields!r}")
+    if not fields.get("title"):
+        raise CliError(f"у задачи нет названия: {_dump(fields)}")
+    quest_type = fields.get("type")
+    if quest_type is not None and quest_type not in quest_data.TASK_TYPES:
+        raise CliError(f"неизвестный тип задачи: {quest_type}")
+    return fields
+
+
+def _print_quests(quests, ndjson):
+    for quest in quests:
+        if ndjson:
+            print(_dump(quest))
+            continue
+        mark = "📌 " if quest.get("is_pinned") else ""
+        progress = ""
+        if quest.get("is_cumulative"):
+            progress = f" [{quest.get('current_value', 0)}/{quest.get('target_value', 0)}]"
+        print(f"{quest['id']}  {mark}{quest['icon']} {quest['title']}{progress} — "
+              f"{quest['type']}, {quest['xp']} XP")
+
+
+def cmd_list(data, args):
+    quests = data["quests"]
+    if args.type:
+        quests = [q for q in quests if q["type"] == args.type]
+    if args.pinned:
+        quests = [q for q in quests if q.get("is_pinned")]
+    order = {q["id"]: i for i, q in enumerate(quests)}
+    quests = sorted(quests, key=lambda q: quest_data.quest_sort_key(q, args.sort, order[q["id"]]))
+    _print_quests(quests, args.ndjson)
+
+
+def cmd_add(data, args):
+    if args.title == "-":
+        quests = [_quest_fields(fields) for fields in _read_ndjson(sys.stdin)]
+    else:
+        fields = {"title": args.title, "desc": args.desc, "icon": args.icon, "type": args.type,
+                  "xp": args.xp, "is_cumulative": args.target is not None, "target_value": args.target}
+        # Незаданные поля заполнит quest_data так же, как для задач из редактора.
+        quests = [_quest_fields({k: v for k, v in fields.items() if v is not None})]
+    added = quest_data.add_quests(data, quests)
+    if args.ndjson:
+        _print_quests(added, True)
+    else:
+        for quest in added:
+            print(quest["id"])
+
+
+def _id_of(item):
+    quest_id = item.get("id") if isinstance(item, dict) else item
+    if not isinstance(quest_id, str):
+        raise CliError(f"нет id задачи: {_dump(item)}")
+    return quest_id
+
+
+def _ids_from(values):
+    if values != ["-"]:
+        return values
+    return [_id_of(item) for item in _read_ndjson(sys.stdin)]
+
+
+def _print_completions(completions, ndjson):
+    if ndjson:
+        for completed in completions:
+            print(_dump(completed))
+    elif completions:
+        print(f"Выполнено задач: {len(completions)}, +{sum(c['xp'] for c in completions)} XP")
+
+
+def cmd_complete(data, args):
+    quests, missing = _find(data, _ids_from(args.ids))
+    _print_completions(quest_data.finish_quests(data, quests), args.ndjson)
+    return missing
+
+
+def cmd_progress(data, args):
+    if args.id == "-":
+        steps = []
+        for item in _read_ndjson(sys.stdin):
+            amount = item.get("amount", 1) if isinstance(item, dict) else 1
+            if not isinstance(amount, int):
+                raise CliError(f"amount должен быть целым числом: {_dump(item)}")
+            steps.append((_id_of(item), amount))
+    else:
+        steps = [(args.id, args.amount)]
+    # Строки одной задачи складываются; одинаковые суммы идут одним пакетом,
+    # порядок групп — по первому появлению.
+    totals = {}
+    for quest_id, amount in steps:
+        totals[quest_id] = totals.get(quest_id, 0) + amount
+    groups = {}
+    for quest_id, amount in totals.items():
+        groups.setdefault(amount, []).append(quest_id)
+    missing = []
+    completions = []
+    for amount, ids in groups.items():
+        quests, not_found = _find(data, ids)
+        missing.extend(not_found)
+        completions.extend(quest_data.add_progress(data, quests, amount))
+    _print_completions(completions, args.ndjson)
+    return missing
+
+
+def cmd_stats(data, args):
+    from quest_stats import QuestStats
+    stats = QuestStats(data)
+    level = data["level"]
+    report = {
+        "level": level,
+        "xp": data["xp"],
+        "xp_next_level": quest_data.xp_needed_for_next_level(level),
+        "active": len(data["quests"]),
+        "total": stats.total,
+        "done": stats.done,
+        "daily_done": stats.daily_done,
+        "completed_last_7_days": stats.completed_since(7),
+        "xp_this_month": stats.xp_this_period("month"),
+        "xp_daily_mean_7_days": round(stats.xp_daily_mean(7), 1),
+        "types": {t: {"created": c, "done": d}
+                  for t, (c, d) in stats.type_stats(quest_data.TASK_TYPES).items()},
+    }
+    if args.ndjson:
+        print(_dump(report))
+        return
+    print(f"Уровень {level} • {data['xp']} / {report['xp_next_level']} XP")
+    print(f"Активных задач: {report['active']}")
+    print(f"Выполнено: {report['done']} из {report['total']} (ежедневных: {report['daily_done']})")
+    print(f"За 7 дней: {report['completed_last_7_days']}")
+    print(f"XP за месяц: {report['xp_this_month']} (в среднем за неделю {report['xp_daily_mean_7_days']} в день)")
+    for t, counts in report["types"].items():
+        if counts["created"]:
+            print(f"  {t}: {counts['done']} / {counts['created']}")
+
+
+def cmd_export(data, args):
+    target = args.file
+    if target == "-":
+        # В stdout пишется потоком; сжатый вариант — в двоичный поток.
+        fmt = args.format or "json"
+        target = sys.stdout.buffer if fmt.endswith(".gz") else sys.stdout
+    else:
+        fmt = args.format
+    if args.changes:
+        quest_data.export_changes(data, target, fmt)
+    else:
+        quest_data.export_data(target, fmt, args.since)
+
+
+def cmd_import(data, args):
+    if args.merge:
+        source = sys.stdin if args.file == "-" else args.file
+        report = quest_data.merge_import(data, source, args.merge)
+        if args.ndjson:
+            print(_dump(report))
+        else:
+            for key, value in report.items():
+                print(f"{key}: {value}")
+        return None
+    if args.file != "-":
+        return quest_data.import_data(args.file)
+    import tempfile
+    fd, path = tempfile.mkstemp(suffix=".json", dir=".")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(sys.stdin.read())
+        return quest_data.import_data(path)
+    finally:
+        os.remove(path)
+
+
+def cmd_profiles(data, args):
+    summary = ProfileManager().summary()
+    if args.ndjson:
+        for name, info in summary["by_profile"].items():
+            print(_dump(dict(info, name=name)))
+        return
+    for name, info in summary["by_profile"].items():
+        print(f"{name}: уровень {info['level']} • {info['xp']} XP • активных {info['active']} • "
+              f"за неделю {info['week']}")
+    print(f"Профилей: {summary['profiles']} • всего {summary['xp']} XP • за неделю {summary['week']}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="achievle", description="Achievle без интерфейса.")
+    parser.add_argument("--data-dir", help="папка с quests.json (по умолчанию — папка программы)")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, help="имя профиля")
+    parser.add_argument("--ndjson", action="store_true", help="вывод построчно в JSON")
+    # --ndjson принимается и после команды; SUPPRESS не даёт команде затереть флаг, заданный до неё.
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--ndjson", action="store_true", default=argparse.SUPPRESS, help="вывод построчно в JSON")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("list", parents=[common], help="активные задачи")
+    p.add_argument("--type", choices=quest_data.TASK_TYPES)
+    p.add_argument("--pinned", action="store_true", help="только закреплённые")
+    p.add_argument("--sort", choices=quest_data.SORT_MODES, default=quest_data.SORT_MODES[0])
+    p.set_defaults(handler=cmd_list)
+
+    p = commands.add_parser("add", parents=[common], help="добавить задачу; \"-\" — задачи из NDJSON в stdin")
+    p.add_argument("title")
+    p.add_argument("--desc", default="")
+    p.add_argument("--icon")
+    p.add_argument("--type", choices=quest_data.TASK_TYPES)
+    p.add_argument("--xp", type=int)
+    p.add_argument("--target", type=int, help="цель накопительной задачи")
+    p.set_defaults(handler=cmd_add)
+
+    p = commands.add_parser("complete", parents=[common], help="выполнить задачи по id; \"-\" — id из stdin")
+    p.add_argument("ids", nargs="+")
+    p.set_defaults(handler=cmd_complete)
+
+    p = commands.add_parser("progress", parents=[common], help="добавить прогресс; \"-\" — {\"id\", \"amount\"} из stdin")
+    p.add_argument("id")
+    p.add_argument("amount", type=int, nargs="?", default=1)
+    p.set_defaults(handler=cmd_progress)
+
+    p = commands.add_parser("stats", parents=[common], help="уровень и статистика")
+    p.set_defaults(handler=cmd_stats)
+
+    p = commands.add_parser("export", parents=[common], help="экспорт данных в файл (\"-\" — в stdout)")
+    p.add_argument("file")
+    p.add_argument("--format", choices=quest_data.EXPORT_FORMATS, help="по умолчанию — по имени файла")
+    since = p.add_mutually_exclusive_group()
+    since.add_argument("--since", help="только изменённое с даты ГГГГ-ММ-ДД")
+    since.add_argument("--changes", action="store_true", help="только изменённое с прошлого экспорта --changes")
+    p.set_defaults(handler=cmd_export)
+
+    p = commands.add_parser("import", parents=[common], help="импорт данных из файла (\"-\" — из stdin)")
+    p.add_argument("file")
+    p.add_argument("--merge", choices=quest_data.MERGE_POLICIES,
+                   help="объединить с текущими данными вместо замены; правило для совпадающих задач")
+    p.set_defaults(handler=cmd_import)
+
+    p = commands.add_parser("profiles", parents=[common], help="профили и сводка по ним")
+    p.set_defaults(handler=cmd_profiles)
+    return parser
+
+
+def main(argv=None):
+    """Точка входа CLI; возвращает код выхода."""
+    args = build_parser().parse_args(argv)
+    os.chdir(args.data_dir or os.path.dirname(os.path.abspath(__file__)))
+    profiles = ProfileManager()
+    try:
+        data = profiles.open(args.profile)
+    except (OSError, ValueError) as e:
+        print(f"achievle: {e}", file=sys.stderr)
+        return 2
+    try:
+        result = args.handler(data, args)
+        if isinstance(result, dict):
+            profiles.set_data(result)
+    except CliError as e:
+        print(f"achievle: {e}", file=sys.stderr)
+        return 2
+    except BrokenPipeError:
+        # Читатель вывода закрылся раньше (например, head): это не ошибка.
+        sys.stdout = open(os.devnull, "w")
+        return 0
+    except (OSError, ValueError, TimeoutError) as e:
+        # Нет файла или он битый, хранилище занято другим экземпляром, неверная дата.
+        print(f"achievle: {e}", file=sys.stderr)
+        return 2
+    finally:
+        profiles.close()
+    if isinstance(result, list) and result:
+        for quest_id in result:
+            print(f"achievle: задача не найдена: {quest_id}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""Набор замеров слоя данных на синтетических профилях разного размера.
+
+Для каждого размера (число записей в файле: десятая часть — активные задачи,
+остальное — история выполнений) генерирует quests.json через generate_dataset
+и замеряет load_data, save_data, export_data в каждом формате, restore_daily_quests, функции уровней,
+а также сортировку, фильтр по категориям и подсчёт ежедневных из активного списка.
+Время — лучшее из нескольких повторов, в миллисекундах.
+
+Результаты пишутся в JSON; с --compare сравниваются с прошлым прогоном, и если
+какой-то замер медленнее больше чем в --threshold раз, код выхода — 1.
+
+    python benchmarks/bench_data.py --sizes 1000 10000 100000 1000000 --out results.json
+    python benchmarks/bench_data.py --out new.json --compare results.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import quest_data
+from generate_dataset import generate, write
+
+LEVEL_CALLS = 10_000
+
+
+def best_of(repeat, func, setup=None):
+    """Лучшее время func() из repeat повторов (мс); setup() выполняется перед каждым вне замера."""
+    best = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best, 3)
+
+
+def bench_levels(xp_total):
+    step = max(1, xp_total // LEVEL_CALLS)
+    for xp in range(0, step * LEVEL_CALLS, step):
+        level = quest_data.level_for_total_xp(xp)
+        quest_data.xp_needed_for_next_level(level)
+        quest_data.total_xp_for_level(level + 1)
+        quest_data.can_level_up(level, xp)
+
+
+def run(records, repeat):
+    quests = max(1, records // 10)
+    write(quest_data.DATA_FILE, generate(quests=quests, completions=records - quests))
+    results = {"records": records, "bytes": os.path.getsize(quest_data.DATA_FILE)}
+
+    data = None
+
+    def load():
+        nonlocal data
+        data = quest_data.load_data()
+    results["load_data"] = best_of(repeat, load)
+    results["save_data"] = best_of(repeat, lambda: quest_data.save_data(data))
+    for fmt in quest_data.EXPORT_FORMATS:
+        results[f"export_data[{fmt}]"] = best_of(repeat, lambda: quest_data.export_data("export." + fmt, fmt))
+
+    dailies = [q for q in data["quests"] if q["type"] in quest_data.DAILY_TYPES]
+    yesterday = str(date.today() - timedelta(days=1))
+
+    def new_day():
+        for quest in dailies:
+            quest["completed_today"] = True
+        data["daily_reset"] = yesterday
+    results["restore_daily_quests"] = best_of(repeat, lambda: quest_data.restore_daily_quests(data), new_day)
+    results["levels"] = best_of(repeat, lambda: bench_levels(data["xp"]))
+
+    active = data["quests"]
+    for mode in quest_data.SORT_MODES:
+        results[f"sort_quests[{mode}]"] = best_of(repeat, lambda: quest_data.sort_quests(active, mode))
+
+    def filter_all():
+        for category in quest_data.CATEGORY_MAP:
+            accepts = quest_data.quest_filter(category)
+            [q for q in active if accepts(q)]
+    results["quest_filter"] = best_of(repeat, filter_all)
+    results["daily_progress"] = best_of(repeat, lambda: quest_data.daily_progress(active))
+    quest_data.close_data(data)
+    return results
+
+
+def compare(results, baseline, threshold, min_ms):
+    """Печатает отношения к baseline и возвращает список замеров, ставших медленнее threshold.
+
+    Замеры короче min_ms в регрессии не попадают: там разница — в основном шум.
+    """
+    old = {r["records"]: r for r in baseline["results"]}
+    regressions = []
+    for current in results:
+        previous = old.get(current["records"])
+        if previous is None:
+            continue
+        for name, value in current.items():
+            if name in ("records", "bytes") or not previous.get(name):
+                continue
+            ratio = value / previous[name]
+            mark = ""
+            if ratio > threshold and value >= min_ms:
+                mark = "  <-- медленнее"
+                regressions.append(f"{current['records']}:{name}")
+            print(f"{current['records']:>9} {name:<28} {previous[name]:>10.3f} → {value:>10.3f} мс  x{ratio:.2f}{mark}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--compare", help="прошлый файл результатов")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    parser.add_argument("--min-ms", type=float, default=1.0)
+    args = parser.parse_args()
+    out = os.path.abspath(args.out)
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    # Архив выключен: иначе первый load_data уносит историю из снимка, и размеры не сравнить.
+    quest_data.ARCHIVE_AFTER_DAYS = None
+    workdir = tempfile.mkdtemp(prefix="achievle-bench-")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    results = []
+    try:
+        for records in args.sizes:
+            for name in os.listdir("."):
+                os.remove(name)
+            results.append(run(records, args.repeat))
+            print(json.dumps(results[-1], ensure_ascii=False))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "date": str(date.today()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "codec": "orjson" if quest_data.orjson is not None else "json",
+        "results": results,
+    }
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold, args.min_ms)
+        if regressions:
+            print("Медленнее, чем в", args.compare + ":", ", ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Память на историю выполнений: словари из JSON против записей Completion.
+
+    python benchmarks/bench_memory.py [--records 1000000]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import quest_data
+from quest_records import Completion
+
+
+def make_json(records):
+    start = date.today() - timedelta(days=3650)
+    completed = []
+    for i in range(records):
+        # Примерно как в жизни: ежедневные задания повторяются, даты идут подряд.
+        n = i % 500
+        completed.append({
+            "id": f"quest-{n}", "title": f"Задача {n}", "desc": "", "icon": "🎮",
+            "type": quest_data.TASK_TYPES[n % len(quest_data.TASK_TYPES)], "xp": 10 + n % 90,
+            "is_cumulative": False, "target_value": 0, "current_value": 0,
+            "completed_today": False, "is_pinned": False,
+            "date": str(start + timedelta(days=i * 3650 // records)),
+        })
+    return json.dumps(completed, ensure_ascii=False)
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=1_000_000)
+    records = parser.parse_args().records
+    text = make_json(records)
+    dicts, dict_bytes = measure(lambda: json.loads(text))
+    last = dicts[-1]
+    del dicts
+    # Словари из файла освобождаются внутри замера: остаются только записи и общие строки.
+    objects, object_bytes = measure(lambda: Completion.from_list(json.loads(text)))
+    assert objects[-1].to_dict() == last
+    print(json.dumps({
+        "records": records,
+        "dict_bytes_per_record": round(dict_bytes / records, 1),
+        "completion_bytes_per_record": round(object_bytes / records, 1),
+        "saved_mb": round((dict_bytes - object_bytes) / 2 ** 20, 1),
+    }))
+
+
+if __name__ == "__main__":
+    main()
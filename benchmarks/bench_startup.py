@@ -0,0 +1,89 @@
+"""Замер запуска: разбор quests.json и миграция при разном объёме истории.
+
+Для каждого размера сравнивает старый формат (indent=4, без schema_version,
+миграция каждой записи) с текущим (компактный снимок с schema_version).
+
+    python benchmarks/bench_startup.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import quest_data
+
+
+def make_data(records):
+    today = str(date.today())
+    quests = []
+    completed = []
+    for i in range(records):
+        quest_type = quest_data.TASK_TYPES[i % len(quest_data.TASK_TYPES)]
+        # Старый формат: без служебных полей, которые добавляет _migrate_quest.
+        record = {"id": f"q{i}", "title": f"Задача {i}", "desc": "", "type": quest_type, "xp": 10 + i % 90}
+        if i % 10 == 0:
+            quests.append(record)
+        else:
+            record["date"] = today
+            completed.append(record)
+    return {"level": 1, "xp": 0, "quests": quests, "completed_quests": completed,
+            "daily_reset": today, "theme": "light"}
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run(records):
+    legacy = json.dumps(make_data(records), indent=4, ensure_ascii=False)
+    with open(quest_data.DATA_FILE, "w", encoding="utf-8") as f:
+        f.write(legacy)
+    _, legacy_parse = timed(lambda: json.loads(legacy))
+    # Первый запуск мигрирует данные и сохраняет снимок в текущем формате.
+    data, first_load = timed(quest_data.load_data)
+    quest_data.flush_data()
+    size = os.path.getsize(quest_data.DATA_FILE)
+    with open(quest_data.DATA_FILE, "rb") as f:
+        raw = f.read()
+    _, fast_parse = timed(lambda: quest_data._loads(raw))
+    data, fast_load = timed(quest_data.load_data)
+    quest_data.close_data(data)
+    return {
+        "records": records,
+        "legacy_bytes": len(legacy.encode("utf-8")),
+        "legacy_parse_ms": round(legacy_parse, 1),
+        "first_load_ms": round(first_load, 1),
+        "bytes": size,
+        "parse_ms": round(fast_parse, 1),
+        "load_ms": round(fast_load, 1),
+        "codec": "orjson" if quest_data.orjson is not None else "json",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+    quest_data.ARCHIVE_AFTER_DAYS = None
+    cwd = os.getcwd()
+    # Данные на миллион записей занимают гигабайты: папка удаляется после замера.
+    with tempfile.TemporaryDirectory(prefix="achievle-bench-") as workdir:
+        os.chdir(workdir)
+        try:
+            for records in args.sizes:
+                for name in os.listdir("."):
+                    os.remove(name)
+                print(json.dumps(run(records), ensure_ascii=False))
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Синтетический quests.json для замеров.
+
+Активные задачи всех типов из TASK_TYPES (ежедневные, накопительные с прогрессом,
+закреплённые) и история ежедневных выполнений за несколько лет: каждый день
+выполняется часть ежедневных заданий и иногда — обычные задачи, которые после
+этого уходят из списка. Данные сразу в текущем формате (schema_version).
+
+    python benchmarks/generate_dataset.py quests.json --quests 1000 --completions 100000 --years 3
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import uuid
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import quest_data
+
+WORDS = ("бег", "книга", "код", "английский", "зарядка", "уборка", "медитация", "проект",
+         "письмо", "вода", "сон", "прогулка", "гитара", "рисунок", "отчёт", "спорт")
+
+# Доля ежедневных среди активных задач и доля выполнений, приходящихся на них.
+DAILY_SHARE = 0.1
+DAILY_COMPLETION_SHARE = 0.7
+
+
+def make_quest(rng, quest_type, number):
+    is_cumulative = quest_type not in quest_data.DAILY_TYPES and rng.random() < 0.2
+    target = rng.choice((10, 50, 100, 1000)) if is_cumulative else 0
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "title": f"{rng.choice(WORDS).capitalize()} {rng.choice(WORDS)} #{number}",
+        "desc": " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 12))),
+        "icon": rng.choice(quest_data.ICONS),
+        "type": quest_type,
+        "xp": rng.choice((5, 10, 15, 25, 50, 100, 250)),
+        "is_cumulative": is_cumulative,
+        "target_value": target,
+        "current_value": rng.randrange(target) if target else 0,
+        "completed_today": False,
+        "is_pinned": rng.random() < 0.02,
+    }
+
+
+def generate(quests=1000, completions=10000, years=3, seed=0, today=None):
+    """Возвращает данные профиля: quests активных задач и около completions выполнений за years лет."""
+    rng = random.Random(seed)
+    today = today or date.today()
+    other_types = [t for t in quest_data.TASK_TYPES if t not in quest_data.DAILY_TYPES]
+    dailies = max(1, int(quests * DAILY_SHARE)) if quests else 0
+    active = [make_quest(rng, rng.choice(quest_data.DAILY_TYPES), i) for i in range(dailies)]
+    active += [make_quest(rng, rng.choice(other_types), i) for i in range(dailies, quests)]
+
+    days = max(1, years * 365)
+    start = today - timedelta(days=days)
+    daily_per_day = completions * DAILY_COMPLETION_SHARE / days if dailies else 0
+    other_per_day = completions / days - daily_per_day
+    dailies_pool = active[:dailies]
+    history = []
+    number = quests
+    for offset in range(days):
+        day = str(start + timedelta(days=offset))
+        for _ in range(_count(rng, daily_per_day)):
+            history.append(dict(rng.choice(dailies_pool), date=day))
+        for _ in range(_count(rng, other_per_day)):
+            history.append(dict(make_quest(rng, rng.choice(other_types), number), date=day))
+            number += 1
+
+    # Сегодня часть ежедневных уже выполнена.
+    for quest in dailies_pool:
+        quest["completed_today"] = rng.random() < 0.5
+    xp = sum(c["xp"] for c in history)
+    return {
+        "schema_version": quest_data.SCHEMA_VERSION,
+        "level": quest_data.level_for_total_xp(xp),
+        "xp": xp,
+        "quests": active,
+        "completed_quests": history,
+        "daily_reset": str(today),
+        "theme": "light",
+    }
+
+
+def _count(rng, mean):
+    """Целое число со средним mean: дробная часть разыгрывается случайно."""
+    whole = int(mean)
+    return whole + (rng.random() < mean - whole)
+
+
+def write(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--quests", type=int, default=1000)
+    parser.add_argument("--completions", type=int, default=10000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    data = generate(args.quests, args.completions, args.years, args.seed)
+    write(args.path, data)
+    print(f"{args.path}: {len(data['quests'])} задач, {len(data['completed_quests'])} выполнений")
+
+
+if __name__ == "__main__":
+    main()
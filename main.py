@@ -1,8 +1,9 @@
 import sys
 import os
-from PyQt6.QtWidgets import QApplication
-from PyQt6.QtGui import QFont
-from quest_ui import QuestLogUI
+import time
+from contextlib import contextmanager
+
+_START = time.perf_counter()
 
 if getattr(sys, 'frozen', False):
     application_path = os.path.dirname(sys.executable)
@@ -11,12 +12,62 @@ else:
 
 os.chdir(application_path)
 
+# --profile-startup записывает время импортов и этапов запуска в STARTUP_PROFILE_FILE
+# рядом с quests.json (у собранного exe нет консоли) и печатает его в stderr, если она есть.
+PROFILE_STARTUP = "--profile-startup" in sys.argv
+STARTUP_PROFILE_FILE = "startup_profile.txt"
+_phases = []
+
+
+@contextmanager
+def phase(name):
+    start = time.perf_counter()
+    yield
+    _phases.append((name, time.perf_counter() - start))
+
+
+def write_startup_profile():
+    total = time.perf_counter() - _START
+    lines = ["Запуск Achievle:"]
+    lines += [f"  {name:<24} {seconds * 1000:8.1f} мс" for name, seconds in _phases]
+    lines.append(f"  {'всего до готовности':<24} {total * 1000:8.1f} мс")
+    lines.append(f"  модулей загружено: {len(sys.modules)}")
+    report = "\n".join(lines) + "\n"
+    with open(STARTUP_PROFILE_FILE, "w", encoding="utf-8") as f:
+        f.write(report)
+    # В собранном без консоли exe sys.stderr равен None.
+    if sys.stderr is not None:
+        sys.stderr.write(report)
+
+
 def main():
-    app = QApplication(sys.argv)
-    app.setFont(QFont("Segoe UI", 10))
-    window = QuestLogUI()
-    window.show()
+    argv = [arg for arg in sys.argv if arg != "--profile-startup"]
+    with phase("импорт PyQt6"):
+        from PyQt6.QtWidgets import QApplication
+        from PyQt6.QtGui import QFont
+    with phase("импорт quest_data"):
+        import quest_data  # noqa: F401
+    with phase("импорт quest_ui"):
+        from quest_ui import QuestLogUI
+
+    with phase("QApplication"):
+        app = QApplication(argv)
+        app.setFont(QFont("Segoe UI", 10))
+    with phase("создание окна"):
+        window = QuestLogUI()
+    with phase("первый кадр"):
+        window.show()
+        app.processEvents()
+    # Данные загружаются в фоне уже после показа окна, список заполняется, когда они готовы.
+    loading = time.perf_counter()
+
+    def on_ready():
+        _phases.append(("загрузка и заполнение", time.perf_counter() - loading))
+        if PROFILE_STARTUP:
+            write_startup_profile()
+
+    window.start(on_ready)
     sys.exit(app.exec())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
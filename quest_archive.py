@@ -0,0 +1,190 @@
+import gzip
+import heapq
+import json
+import os
+import shutil
+from collections import Counter
+
+from quest_journal import write_atomic
+from quest_records import Completion, to_json
+
+MANIFEST_FILE = "manifest.json"
+
+
+def _month_of(completed):
+    return (completed.get("date") or "")[:7]
+
+
+class CompletionArchive:
+    """Холодный архив истории выполнений: по файлу на месяц и манифест с итогами.
+
+    Манифест хранит для каждого месяца число выполнений, XP, разбивку по типам
+    и дням и лучшие выполнения по XP, так что статистике не нужно открывать
+    сами файлы. Файлы месяцев читаются лениво — только когда запрошен их диапазон.
+    """
+
+    def __init__(self, directory, compress=True, top_k=10):
+        self.directory = directory
+        self.compress = compress
+        self.top_k = top_k
+        self._manifest = None
+        self._cache = {}
+
+    @property
+    def manifest(self):
+        if self._manifest is None:
+            path = os.path.join(self.directory, MANIFEST_FILE)
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    self._manifest = json.load(f)
+            else:
+                self._manifest = {"months": {}}
+        return self._manifest
+
+    def months(self):
+        return sorted(self.manifest["months"])
+
+    def archive(self, completed, before_month):
+        """Переносит в архив выполнения месяцев раньше before_month ("ГГГГ-ММ").
+
+        Возвращает оставшиеся (горячие) выполнения. Месяц архивируется только
+        целиком и один раз: записи уже заархивированного месяца — это копии,
+        оставшиеся после сбоя между записью архива и снимка, они отбрасываются.
+        """
+        months = self.manifest["months"]
+        hot = []
+        batches = {}
+        for c in completed:
+            month = _month_of(c)
+            if not month or month >= before_month:
+                hot.append(c)
+            elif month not in months:
+                batches.setdefault(month, []).append(c)
+        if not batches:
+            return hot
+
+        os.makedirs(self.directory, exist_ok=True)
+        updated = dict(months)
+        for month, items in sorted(batches.items()):
+            updated[month] = self._write_month(month, items)
+        self._write_manifest(updated)
+        return hot
+
+    def merge(self, completed):
+        """Добавляет выполнения в уже заархивированные месяцы (при слиянии импорта).
+
+        Файл месяца и его итоги переписываются целиком. Возвращает выполнения
+        месяцев, которых в архиве нет.
+        """
+        months = self.manifest["months"]
+        rest = []
+        batches = {}
+        for c in completed:
+            month = _month_of(c)
+            if month in months:
+                batches.setdefault(month, []).append(c)
+            else:
+                rest.append(c)
+        if not batches:
+            return rest
+
+        updated = dict(months)
+        for month, items in sorted(batches.items()):
+            items = self._read_month(months[month]) + items
+            self._cache.pop(month, None)
+            updated[month] = self._write_month(month, items)
+        self._write_manifest(updated)
+        return rest
+
+    def _write_month(self, month, items):
+        file_name = f"completed-{month}.json" + (".gz" if self.compress else "")
+        text = json.dumps(items, ensure_ascii=False, default=to_json)
+        path = os.path.join(self.directory, file_name)
+        write_atomic(path, gzip.compress(text.encode("utf-8")) if self.compress else text)
+        return self._summarize(file_name, items)
+
+    def _write_manifest(self, months):
+        manifest = {"months": months}
+        write_atomic(os.path.join(self.directory, MANIFEST_FILE),
+                     json.dumps(manifest, indent=4, ensure_ascii=False, default=to_json))
+        self._manifest = manifest
+
+    def _summarize(self, file_name, items):
+        days = {}
+        for c in items:
+            day = days.setdefault(c["date"], [0, 0])
+            day[0] += 1
+            day[1] += c["xp"]
+        return {
+            "file": file_name,
+            "count": len(items),
+            "xp": sum(c["xp"] for c in items),
+            "types": dict(Counter(c["type"] for c in items)),
+            "days": days,
+            "top": heapq.nlargest(self.top_k, items, key=lambda c: c["xp"]),
+        }
+
+    def load_month(self, month):
+        """Читает выполнения одного месяца (с кэшем)."""
+        items = self._cache.get(month)
+        if items is None:
+            info = self.manifest["months"].get(month)
+            if info is None:
+                return []
+            items = self._cache[month] = self._read_month(info)
+        return items
+
+    def _read_month(self, info, raw=False):
+        path = os.path.join(self.directory, info["file"])
+        if info["file"].endswith(".gz"):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                items = json.load(f)
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                items = json.load(f)
+        return items if raw else Completion.from_list(items)
+
+    def completion_counts(self):
+        """Число выполнений архива по парам (id, дата). Месяцы читаются по одному и в кэш не попадают."""
+        counts = Counter()
+        for month in self.months():
+            counts.update((c["id"], c["date"]) for c in self._read_month(self.manifest["months"][month]))
+        return counts
+
+    def iter_completions(self, since=None, until=None, cache=True):
+        """Выполнения с since <= date <= until ("ГГГГ-ММ-ДД"); открывает только нужные месяцы.
+
+        cache=False — для однократного прохода (выгрузка): месяцы не остаются в памяти,
+        а записи отдаются словарями, как в файле.
+        """
+        for month in self.months():
+            if since and month < since[:7] or until and month > until[:7]:
+                continue
+            items = self.load_month(month) if cache else self._read_month(self.manifest["months"][month], raw=True)
+            for c in items:
+                if since and c["date"] < since or until and c["date"] > until:
+                    continue
+                yield c
+
+    def totals(self):
+        """Итоги по всему архиву из манифеста: число, XP, типы, дни и лучшие по XP."""
+        count = xp = 0
+        types = Counter()
+        days = {}
+        top = []
+        for month in self.months():
+            info = self.manifest["months"][month]
+            count += info["count"]
+            xp += info["xp"]
+            types.update(info["types"])
+            days.update(info["days"])
+            top.extend(info["top"])
+        top = heapq.nlargest(self.top_k, top, key=lambda c: c["xp"])
+        return {"count": count, "xp": xp, "types": types, "days": days, "top": top}
+
+    def clear(self):
+        """Удаляет архив целиком (после импорта или сброса данных)."""
+        if os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
+        self._manifest = {"months": {}}
+        self._cache.clear()
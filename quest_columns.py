@@ -0,0 +1,209 @@
+import json
+import os
+from datetime import date
+from itertools import islice
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import quest_data
+from quest_journal import write_atomic
+from quest_records import TYPE_NAMES, type_code
+
+COLUMNS = ("day", "xp", "type", "quest")
+DTYPES = {"day": "int32", "xp": "int32", "type": "uint8", "quest": "int32"}
+META_FILE = "meta.json"
+# По сколько выполнений добавлять в копию при её сборке из истории.
+BUILD_BATCH = 100_000
+
+# Порядковый номер 1970-01-01: переход между date.toordinal() и datetime64[D].
+_EPOCH = date(1970, 1, 1).toordinal()
+
+
+def _ordinal(day):
+    return date.fromisoformat(day).toordinal() if isinstance(day, str) else day.toordinal()
+
+
+def history_fingerprint(data):
+    """Число выполнений и сумма их XP по всей истории; по ним проверяется копия на диске."""
+    count = len(data["completed_quests"])
+    xp = sum(c["xp"] for c in data["completed_quests"])
+    totals = quest_data.archived_totals()
+    return [count + totals["count"], xp + totals["xp"]]
+
+
+class CompletionColumns:
+    """Колоночная копия истории выполнений для аналитики на NumPy.
+
+    Каждое выполнение — строка в четырёх массивах: номер дня (int32, date.toordinal(),
+    0 — дата неизвестна), XP (int32), код типа (uint8, см. quest_records) и номер id
+    задачи в self.ids (int32). Запросы по периодам считаются векторно, а на диске
+    массивы лежат в .npy и открываются через mmap.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self.dirty = False
+        self._arrays = {name: np.empty(0, DTYPES[name]) for name in COLUMNS}
+        self.ids = []
+        self._id_index = {}
+
+    def column(self, name):
+        return self._arrays[name][:self.size]
+
+    def _reserve(self, extra):
+        capacity = len(self._arrays["day"])
+        if self.size + extra <= capacity:
+            return
+        capacity = max(self.size + extra, capacity * 2, 64)
+        for name in COLUMNS:
+            # Копия заодно превращает открытый через mmap массив в изменяемый.
+            grown = np.empty(capacity, DTYPES[name])
+            grown[:self.size] = self._arrays[name][:self.size]
+            self._arrays[name] = grown
+
+    def _quest_index(self, quest_id):
+        index = self._id_index.get(quest_id)
+        if index is None:
+            index = self._id_index[quest_id] = len(self.ids)
+            self.ids.append(quest_id)
+        return index
+
+    def extend(self, completions):
+        completions = list(completions)
+        n = len(completions)
+        if not n:
+            return
+        self._reserve(n)
+        days = np.array([c.get("date") or "NaT" for c in completions], dtype="datetime64[D]")
+        ordinals = days.astype("int64") + _EPOCH
+        ordinals[np.isnat(days)] = 0
+        end = self.size + n
+        self._arrays["day"][self.size:end] = ordinals
+        self._arrays["xp"][self.size:end] = [c["xp"] for c in completions]
+        self._arrays["type"][self.size:end] = [type_code(c["type"]) for c in completions]
+        self._arrays["quest"][self.size:end] = [self._quest_index(c["id"]) for c in completions]
+        self.size = end
+        self.dirty = True
+
+    def append(self, completed):
+        self.extend((completed,))
+
+    def _mask(self, since=None, until=None):
+        day = self.column("day")
+        mask = day > 0
+        if since is not None:
+            mask &= day >= _ordinal(since)
+        if until is not None:
+            mask &= day <= _ordinal(until)
+        return mask
+
+    def count(self, since=None, until=None):
+        """Число выполнений с известной датой в диапазоне since..until (включительно)."""
+        return int(np.count_nonzero(self._mask(since, until)))
+
+    def xp_per_period(self, period="day", since=None, until=None):
+        """{первый день периода: XP} для period = "day", "week" (с понедельника) или "month"."""
+        mask = self._mask(since, until)
+        days = self.column("day")[mask].astype("int64") - _EPOCH
+        if period == "week":
+            # 1970-01-01 — четверг, поэтому сдвиг на 3 дня выравнивает недели по понедельникам.
+            days = (days + 3) // 7 * 7 - 3
+        stamps = days.astype("datetime64[D]")
+        if period == "month":
+            stamps = stamps.astype("datetime64[M]").astype("datetime64[D]")
+        keys, inverse = np.unique(stamps, return_inverse=True)
+        sums = np.bincount(inverse, weights=self.column("xp")[mask], minlength=len(keys))
+        return {key: int(total) for key, total in zip(keys.astype(object), sums)}
+
+    def count_by_type(self, since=None, until=None):
+        """{тип: число выполнений} за диапазон; без since и until — за всё время, включая записи без даты."""
+        if since is None and until is None:
+            codes = self.column("type")
+        else:
+            codes = self.column("type")[self._mask(since, until)]
+        counts = np.bincount(codes, minlength=len(TYPE_NAMES))
+        return {TYPE_NAMES[code]: int(n) for code, n in enumerate(counts) if n}
+
+    def xp_rolling_mean(self, window=7, since=None, until=None):
+        """{день: средний XP в день за window дней, заканчивая этим днём}.
+
+        Дни без выполнений считаются нулями; первые window - 1 дней диапазона
+        служат только окном и в результат не входят.
+        """
+        mask = self._mask(since, until)
+        day = self.column("day")[mask]
+        if not len(day):
+            return {}
+        first = _ordinal(since) if since is not None else int(day.min())
+        last = _ordinal(until) if until is not None else int(day.max())
+        if last - first + 1 < window:
+            return {}
+        series = np.bincount(day - first, weights=self.column("xp")[mask], minlength=last - first + 1)
+        means = np.convolve(series, np.ones(window) / window, mode="valid")
+        return {date.fromordinal(first + window - 1 + i): float(m) for i, m in enumerate(means)}
+
+    def save(self, directory, fingerprint):
+        """Записывает массивы в directory/*.npy; meta.json пишется последним как отметка целостности.
+
+        Неизменённая копия не перезаписывается: её файлы открыты через mmap.
+        """
+        if not self.dirty:
+            return
+        os.makedirs(directory, exist_ok=True)
+        for name in COLUMNS:
+            path = os.path.join(directory, name + ".npy")
+            with open(path + ".tmp", "wb") as f:
+                np.save(f, self.column(name))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + ".tmp", path)
+        meta = {"size": self.size, "fingerprint": fingerprint, "ids": self.ids}
+        write_atomic(os.path.join(directory, META_FILE), json.dumps(meta, ensure_ascii=False))
+        self.dirty = False
+
+    @classmethod
+    def load(cls, directory, fingerprint):
+        """Открывает сохранённую копию через mmap или возвращает None, если она устарела."""
+        path = os.path.join(directory, META_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["fingerprint"] != fingerprint:
+            return None
+        columns = cls()
+        for name in COLUMNS:
+            array = np.load(os.path.join(directory, name + ".npy"), mmap_mode="r")
+            if len(array) != meta["size"]:
+                return None
+            columns._arrays[name] = array
+        columns.size = meta["size"]
+        columns.ids = meta["ids"]
+        columns._id_index = {quest_id: i for i, quest_id in enumerate(columns.ids)}
+        return columns
+
+
+def load_columns(data):
+    """Колоночная копия всей истории: с диска, если она актуальна, иначе собирается заново.
+
+    Без NumPy возвращает None.
+    """
+    if np is None:
+        return None
+    fingerprint = history_fingerprint(data)
+    columns = CompletionColumns.load(quest_data.COLUMNS_DIR, fingerprint)
+    if columns is None:
+        columns = CompletionColumns()
+        # Пачками: история не собирается в памяти целиком ни списком, ни в кэше архива.
+        completions = quest_data.iter_completions(data)
+        for batch in iter(lambda: list(islice(completions, BUILD_BATCH)), []):
+            columns.extend(batch)
+        columns.save(quest_data.COLUMNS_DIR, fingerprint)
+    return columns
+
+
+def save_columns(columns, data):
+    columns.save(quest_data.COLUMNS_DIR, history_fingerprint(data))
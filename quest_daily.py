@@ -0,0 +1,57 @@
+from datetime import date, datetime, timedelta
+
+from quest_data import DAILY_TYPES, is_daily_touched, reset_daily_quests
+
+
+def msecs_to_midnight(now=None):
+    """Миллисекунды до ближайшей местной полуночи."""
+    now = now or datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return int((midnight - now).total_seconds() * 1000)
+
+
+class DailyResetEngine:
+    """Индекс ежедневных заданий для сброса в полночь.
+
+    Хранит ежедневные задания и отдельно те из них, что выполнены или начаты
+    сегодня; индекс обновляется по событиям quest_data.subscribe. Сброс трогает
+    только отмеченные задания, не просматривая ни весь список, ни историю.
+    """
+
+    def __init__(self, data):
+        self.rebuild(data)
+
+    def rebuild(self, data):
+        self.data = data
+        self.dailies = {q["id"]: q for q in data["quests"] if q["type"] in DAILY_TYPES}
+        self.touched = {quest_id for quest_id, q in self.dailies.items() if is_daily_touched(q)}
+
+    def apply(self, event, obj):
+        """Учитывает одно событие из quest_data.subscribe."""
+        if event in ("added", "updated"):
+            if obj["type"] in DAILY_TYPES:
+                self.dailies[obj["id"]] = obj
+                if is_daily_touched(obj):
+                    self.touched.add(obj["id"])
+                else:
+                    self.touched.discard(obj["id"])
+            else:
+                self.dailies.pop(obj["id"], None)
+                self.touched.discard(obj["id"])
+        elif event == "removed":
+            self.dailies.pop(obj["id"], None)
+            self.touched.discard(obj["id"])
+        elif event == "reloaded":
+            self.rebuild(obj)
+        elif event == "batch":
+            for sub_event, sub_obj in obj:
+                self.apply(sub_event, sub_obj)
+
+    def reset_if_due(self, today=None):
+        """Сбрасывает отмеченные задания, если наступил новый день; возвращает сброшенные."""
+        today = str(today or date.today())
+        if self.data["daily_reset"] == today:
+            return []
+        quests = [self.dailies[quest_id] for quest_id in self.touched]
+        # Событие "updated" от reset_daily_quests само уберёт их из self.touched.
+        return reset_daily_quests(self.data, quests, today)
@@ -1,12 +1,79 @@
+import contextlib
+import copy
+import gzip
+import itertools
 import json
 import os
 import uuid
 import shutil
-from datetime import date, datetime
+import threading
+import zlib
+from bisect import bisect_right
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from quest_archive import MANIFEST_FILE, CompletionArchive
+from quest_journal import QuestJournal, write_atomic, recover_atomic
+from quest_lock import StoreLock
+from quest_records import Quest, Completion, as_quest, register_types, to_json
+from quest_saver import WriteBehindSaver
+from quest_stream import JsonStreamReader, iter_ndjson, write_json, write_ndjson
+from quest_trace import count, span, traced
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 DATA_FILE = "quests.json"
 
+# Версия формата: файл с текущей версией уже мигрирован, и load_data
+# не проходит по каждой задаче. Увеличивать при изменении _migrate_quest.
+SCHEMA_VERSION = 2
+
+# Компактный снимок без отступов (через orjson, если он установлен).
+# False — прежний читаемый формат с indent=4.
+COMPACT_JSON = True
+
+# Журналируемый режим: изменения дописываются в quests.json.journal,
+# а сам quests.json служит снимком и пересобирается в фоне.
+JOURNAL_ENABLED = True
+JOURNAL_COMPACT_BYTES = 256 * 1024
+
+# Без журнала изменения сохраняются фоновым потоком с задержкой (в секундах),
+# чтобы серия быстрых правок превращалась в одну запись.
+SAVE_DELAY = 0.5
+
+# Запись в хранилище идёт под блокировкой файла quests.json.lock, общей для всех
+# запущенных экземпляров программы; столько секунд ждать, пока её отпустят.
+LOCK_TIMEOUT = 10.0
+
+# Хранилище SQLite включается, когда рядом лежит quests.db (см. migrate_to_sqlite).
+# "auto" — выбрать по наличию файла, "json" или "sqlite" — принудительно.
+SQLITE_FILE = "quests.db"
+STORAGE_BACKEND = "auto"
+
+# Выполнения старше ARCHIVE_AFTER_DAYS дней уносятся из quests.json в помесячные
+# файлы ARCHIVE_DIR (целыми месяцами). None — не архивировать.
+ARCHIVE_DIR = "quests_archive"
+ARCHIVE_AFTER_DAYS = 90
+ARCHIVE_COMPRESS = True
+
+# Колоночная копия истории для аналитики (quest_columns, нужен NumPy).
+COLUMNS_DIR = "quests_columns"
+
+# Слияние импорта с текущими данными (merge_import): правила для задач с одинаковым id
+# и сколько записей файла применять одним пакетом.
+MERGE_POLICIES = ("newest", "max_progress", "keep_both")
+MERGE_BATCH = 5000
+MERGE_ARCHIVE_BATCH = 50000
+
+# Форматы export_data: обычный файл данных и построчный, оба — со сжатием или без.
+EXPORT_FORMATS = ("json", "json.gz", "ndjson", "ndjson.gz")
+EXPORT_GZIP_LEVEL = 6
+# Как часто выгрузка сообщает о ходе (progress): раз в столько выполнений.
+EXPORT_PROGRESS_STEP = 10000
+
 TASK_TYPES = [
     "Ежедневное задание",
     "Продвинутое ежедневное задание",
@@ -24,6 +91,7 @@ TASK_TYPES = [
     
     "Мастерство"
 ]
+register_types(TASK_TYPES)
 
 TYPE_COLORS = {
     "Обычное достижение": "#4A6CF7",
@@ -49,7 +117,20 @@ ICONS = [
     "📝", "📌", "❗"
 ]
 
+DAILY_TYPES = ("Ежедневное задание", "Продвинутое ежедневное задание")
+
+# Категории фильтра активного списка.
+CATEGORY_MAP = {
+    "Все": TASK_TYPES,
+    "Ежедневные задачи": ["Ежедневное задание", "Продвинутое ежедневное задание"],
+    "Задачи": ["Обычное задание", "Умеренное задание", "Задание повышенной сложности"],
+    "Достижения": ["Обычное достижение", "Умеренное достижение", "Продвинутое достижение"],
+    "Испытания": ["Испытание", "Продвинутое испытание"],
+    "Мастерство": ["Мастерство"]
+}
+
 DEFAULT_DATA = {
+    "schema_version": SCHEMA_VERSION,
     "level": 1,
     "xp": 0,
     "quests": [],
@@ -60,7 +141,9 @@ DEFAULT_DATA = {
 
 def _migrate_quest(quest):
     """Добавляет недостающие поля в старую задачу."""
-    quest.setdefault("id", str(uuid.uuid4()))
+    # Без setdefault: он создавал бы новый uuid4 для каждой задачи, даже с id.
+    if "id" not in quest:
+        quest["id"] = str(uuid.uuid4())
     quest.setdefault("icon", "🎮")
     quest.setdefault("type", "Обычное достижение")
     quest.setdefault("xp", 10)
@@ -71,60 +154,958 @@ def _migrate_quest(quest):
     quest.setdefault("is_pinned", False)
     return quest
 
+_journals = {}
+_listeners = []
+_sqlite_stores = {}
+_savers = {}
+_archives = {}
+_locks = {}
+# Состояние файлов хранилища, которое отражают данные в памяти (см. sync_external).
+_seen = {}
+# Без журнала: записи, которые ещё ждут снимка.
+_pending = {}
+# Защищает данные в памяти от чтения фоновой записью посреди изменения.
+data_lock = threading.RLock()
+_compact_lock = threading.Lock()
+_compact_thread = None
+
+
+def _journal():
+    journal = _journals.get(DATA_FILE)
+    if journal is None:
+        journal = _journals[DATA_FILE] = QuestJournal(DATA_FILE + ".journal")
+    return journal
+
+def _saver():
+    saver = _savers.get(DATA_FILE)
+    if saver is None:
+        saver = _savers[DATA_FILE] = WriteBehindSaver(_write_snapshot, SAVE_DELAY,
+                                                      on_error=lambda error: _notify("save_error", error))
+    return saver
+
+def save_error():
+    """Текст ошибки последней фоновой записи снимка или None, если она удалась."""
+    saver = _savers.get(DATA_FILE)
+    return saver.last_error if saver is not None else None
+
+def completion_archive():
+    """Возвращает архив старых выполнений или None для SQLite (там история и так индексирована)."""
+    if use_sqlite():
+        return None
+    archive = _archives.get(ARCHIVE_DIR)
+    if archive is None:
+        archive = _archives[ARCHIVE_DIR] = CompletionArchive(ARCHIVE_DIR, ARCHIVE_COMPRESS)
+    return archive
+
+def subscribe(callback):
+    """Подписывает callback(event, obj) на изменения данных.
+
+    События: "added", "updated", "removed" (obj — задача), "completed" (obj — запись
+    истории), "setting" (obj — имя настройки), "reloaded" (obj — данные целиком),
+    "batch" (obj — список пар (событие, объект) одной пакетной операции),
+    "save_error" (obj — текст ошибки фоновой записи или None, когда запись снова удалась;
+    приходит из потока записи).
+    """
+    _listeners.append(callback)
+
+def unsubscribe(callback):
+    if callback in _listeners:
+        _listeners.remove(callback)
+
+def _notify(event, obj):
+    for callback in list(_listeners):
+        callback(event, obj)
+
+def _notify_batch(events):
+    if events:
+        _notify("batch", events)
+
+def set_data_dir(directory):
+    """Переключает файлы хранилища (снимок, журнал, база, архив, колонки) на папку directory.
+
+    "" — текущая папка. Кэши журналов, архивов и баз ключуются путями, поэтому
+    хранилища разных папок не мешают друг другу. Перед переключением нужно
+    дождаться фоновой записи (flush_data): она пишет по текущим путям.
+    """
+    global DATA_FILE, SQLITE_FILE, ARCHIVE_DIR, COLUMNS_DIR
+    DATA_FILE = os.path.join(directory, os.path.basename(DATA_FILE))
+    SQLITE_FILE = os.path.join(directory, os.path.basename(SQLITE_FILE))
+    ARCHIVE_DIR = os.path.join(directory, os.path.basename(ARCHIVE_DIR))
+    COLUMNS_DIR = os.path.join(directory, os.path.basename(COLUMNS_DIR))
+
+def store_paths():
+    """Файлы текущего хранилища, по которым видно, что оно изменилось."""
+    if use_sqlite():
+        return (SQLITE_FILE,)
+    return (DATA_FILE, DATA_FILE + ".journal", os.path.join(ARCHIVE_DIR, MANIFEST_FILE))
+
+def store_fingerprint():
+    """Размер и время изменения файлов текущего хранилища: по ним видно, менялись ли они с тех пор."""
+    fingerprint = []
+    for path in store_paths():
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            fingerprint.append(None)
+        else:
+            fingerprint.append((st.st_size, st.st_mtime_ns))
+    return tuple(fingerprint)
+
+def _store_lock():
+    """Межпроцессная блокировка файлов текущего хранилища (см. quest_lock)."""
+    lock = _locks.get(DATA_FILE)
+    if lock is None:
+        lock = _locks[DATA_FILE] = StoreLock(DATA_FILE + ".lock", LOCK_TIMEOUT, _begin_write, _end_write)
+    return lock
+
+def _begin_write():
+    # Если до своей записи файлы совпадали с увиденными, после неё увиденными станут новые;
+    # иначе чужое изменение дождётся sync_external.
+    seen = _seen.get(DATA_FILE)
+    if seen is not None:
+        seen["clean"] = seen["fingerprint"] == store_fingerprint()
+
+def _end_write():
+    seen = _seen.get(DATA_FILE)
+    if seen is not None and seen["clean"]:
+        fingerprint = store_fingerprint()
+        # Контрольные суммы переписанных файлов неизвестны до следующей проверки.
+        seen["crcs"] = [crc if old == new else None
+                        for crc, old, new in zip(seen["crcs"], seen["fingerprint"], fingerprint)]
+        seen["fingerprint"] = fingerprint
+
+def _mark_seen(crcs=None):
+    """Запоминает нынешнее состояние файлов как отражённое в данных в памяти."""
+    fingerprint = store_fingerprint()
+    _seen[DATA_FILE] = {"fingerprint": fingerprint, "crcs": crcs or [None] * len(fingerprint), "clean": True}
+
+def use_sqlite():
+    if STORAGE_BACKEND == "auto":
+        return os.path.exists(SQLITE_FILE)
+    return STORAGE_BACKEND == "sqlite"
+
+def sqlite_store():
+    """Возвращает открытое хранилище SQLite для текущего файла базы."""
+    from quest_sqlite import SqliteQuestStore
+    store = _sqlite_stores.get(SQLITE_FILE)
+    if store is None:
+        store = _sqlite_stores[SQLITE_FILE] = SqliteQuestStore(SQLITE_FILE)
+    return store
+
+def _restore_legacy_dailies(data):
+    """Возвращает в список ежедневные задания, которые старые версии убирали после выполнения.
+
+    Источник — их записи в истории; сама история не меняется.
+    """
+    active_ids = {q.get("id") for q in data["quests"]}
+    for q in data["completed_quests"]:
+        if q["type"] in DAILY_TYPES and q.get("id") not in active_ids:
+            active_ids.add(q.get("id"))
+            quest = _migrate_quest(q.to_quest())
+            quest["current_value"] = 0
+            quest["completed_today"] = False
+            data["quests"].append(quest)
+
+def is_daily_touched(quest):
+    """Выполнено или начато ли задание сегодня — его нужно сбросить в новый день."""
+    return quest.get("completed_today", False) or bool(quest.get("current_value", 0))
+
+def _apply_daily_reset(data, today, quests=None):
+    """Снимает отметки выполнения и прогресс с ежедневных заданий.
+
+    quests — уже отобранные задания (см. quest_daily); без него просматривается весь список.
+    """
+    if quests is None:
+        quests = [q for q in data["quests"] if q["type"] in DAILY_TYPES]
+    for q in quests:
+        q["completed_today"] = False
+        q["current_value"] = 0
+    data["daily_reset"] = today
+
+def reset_daily_quests(data, quests, today=None):
+    """Сбрасывает ежедневные задания quests за новый день и сообщает о каждом отдельно."""
+    today = today or str(date.today())
+    with _changing():
+        _apply_daily_reset(data, today, quests)
+        _record(data, "daily_reset", date=today, ids=[q["id"] for q in quests])
+    for q in quests:
+        _notify("updated", q)
+    return quests
+
 def restore_daily_quests(data):
-    """Восстанавливает ежедневные задания, если наступил новый день."""
+    """Сбрасывает ежедневные задания, если наступил новый день."""
     today = str(date.today())
     if data["daily_reset"] != today:
-        daily_types = ["Ежедневное задание", "Продвинутое ежедневное задание"]
-        restored = []
-        remaining_completed = []
-
-        for q in data["completed_quests"]:
-            if q["type"] in daily_types:
-                q = _migrate_quest(q)
-                q["current_value"] = 0
-                q.pop("date", None)
-                restored.append(q)
-            else:
-                remaining_completed.append(q)
-        
-        for q in data["quests"]:
-            if q["type"] in daily_types:
-                q["completed_today"] = False
-                q["current_value"] = 0
-
-        data["quests"].extend(restored)
-        data["completed_quests"] = remaining_completed
-        data["daily_reset"] = today
-        save_data(data)
+        touched = [q for q in data["quests"] if q["type"] in DAILY_TYPES and is_daily_touched(q)]
+        reset_daily_quests(data, touched, today)
     return data
 
-def load_data():
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
+def apply_change(data, record):
+    """Применяет к данным одну запись журнала."""
+    op = record["op"]
+    if op == "put_quest":
+        _put_quest(data, Quest(**record["quest"]))
+    elif op == "delete_quest":
+        data["quests"] = [q for q in data["quests"] if q.get("id") != record["id"]]
+    elif op == "complete":
+        _apply_completion(data, Completion(**record["quest"]))
+    elif op == "merge_completions":
+        _grant_completions(data, [Completion(**c) for c in record["quests"]], record["xp"])
+    elif op == "set":
+        data[record["key"]] = record["value"]
+    elif op == "daily_reset":
+        _apply_daily_reset(data, record["date"])
+    elif op == "batch":
+        _apply_batch(data, record["records"])
+    return data
+
+def _apply_batch(data, records):
+    # Записи пакета относятся к разным задачам, поэтому удаления из списка
+    # можно собрать и выполнить одним проходом в конце.
+    # Позиции задач в списке тоже считаются один раз: пакет может добавлять тысячи задач.
+    removed = set()
+    completions = []
+    positions = {q.get("id"): i for i, q in enumerate(data["quests"])}
+
+    def put(quest):
+        i = positions.get(quest["id"])
+        if i is None:
+            positions[quest["id"]] = len(data["quests"])
+            data["quests"].append(quest)
+        else:
+            data["quests"][i] = quest
+
+    for record in records:
+        if record["op"] == "delete_quest":
+            removed.add(record["id"])
+        elif record["op"] == "put_quest":
+            put(Quest(**record["quest"]))
+        elif record["op"] == "complete":
+            completed = Completion(**record["quest"])
+            if _is_kept_after_completion(completed):
+                put(completed.to_quest())
+            else:
+                removed.add(completed["id"])
+            completions.append(completed)
+        else:
+            apply_change(data, record)
+    _drop_quests(data, removed)
+    _grant_completions(data, completions)
+
+def _record(data, op, **fields):
+    """Сохраняет одно изменение: строкой в SQLite, записью в журнал или, без журнала, целиком.
+
+    Запись идёт под блокировкой хранилища, и перед ней в data подтягиваются чужие
+    изменения файлов (sync_external), поэтому она их не затирает. Вызывается под
+    _changing: блокировка к этому моменту уже взята, и здесь TimeoutError не бывает.
+    """
+    count("record." + op)
+    if not JOURNAL_ENABLED and not use_sqlite():
+        # Снимок запишется позже; до тех пор запись ждёт его в _pending.
+        _pending.setdefault(DATA_FILE, []).append({"op": op, **fields})
+        _saver().mark_dirty(data)
+        return
+    with _store_lock():
+        _sync_external(data, [{"op": op, **fields}])
+        if use_sqlite():
+            sqlite_store().apply(data, op, **fields)
+            return
+        size = _journal().append(op, **fields)
+    if size >= JOURNAL_COMPACT_BYTES:
+        compact_journal_async()
+
+@contextlib.contextmanager
+def _changing():
+    """data_lock на время изменения данных в памяти вместе с его записью (_record).
+
+    Если запись идёт сразу в файлы (журнал или SQLite), блокировка хранилища берётся
+    до изменения: когда её держит другой экземпляр программы, TimeoutError вылетает
+    раньше, чем данные в памяти разошлись с файлами.
+    """
+    with data_lock:
+        if JOURNAL_ENABLED or use_sqlite():
+            with _store_lock():
+                yield
+        else:
+            yield
+
+def _put_quest(data, quest):
+    for i, q in enumerate(data["quests"]):
+        if q.get("id") == quest["id"]:
+            data["quests"][i] = quest
+            return
+    data["quests"].append(quest)
+
+def _is_kept_after_completion(quest):
+    return quest["type"] in DAILY_TYPES or quest.get("is_cumulative", False)
+
+def _drop_quests(data, quest_ids):
+    if quest_ids:
+        data["quests"] = [q for q in data["quests"] if q.get("id") not in quest_ids]
+
+def _apply_completion(data, completed):
+    if _is_kept_after_completion(completed):
+        active = completed.to_quest()
+        _put_quest(data, active)
+    else:
+        _drop_quests(data, {completed["id"]})
+    _grant_completions(data, [completed])
+
+def _grant_completions(data, completions, xp=None):
+    """Начисляет XP и пишет в историю; уровень пересчитывается один раз на все выполнения.
+
+    xp — если начислить нужно не только за completions (слияние с архивом, см. merge_import).
+    """
+    data["xp"] += sum(c["xp"] for c in completions) if xp is None else xp
+    data["completed_quests"].extend(completions)
+    data["level"] = max(data["level"], level_for_total_xp(data["xp"]))
+
+def _utc_stamp():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def _touch(quests):
+    """Ставит задачам время последней правки (UTC): по нему merge_import выбирает более новую."""
+    stamp = _utc_stamp()
+    for quest in quests:
+        quest["updated_at"] = stamp
+
+def _mark_finished(quest, today):
+    """Отмечает задачу выполненной и возвращает (запись истории, осталась ли задача в списке)."""
+    kept = _is_kept_after_completion(quest)
+    if kept:
+        quest["completed_today"] = True
+        _touch([quest])
+    return Completion.from_quest(quest, today), kept
+
+def _is_finished_today(quest):
+    return quest["type"] in DAILY_TYPES and quest.get("completed_today", False)
+
+def _unique(quests):
+    return list({q["id"]: q for q in quests}.values())
+
+def add_quest(data, quest):
+    """Добавляет новую задачу и возвращает её запись."""
+    quest = _migrate_quest(as_quest(quest))
+    _touch([quest])
+    with _changing():
+        data["quests"].append(quest)
+        _record(data, "put_quest", quest=quest)
+    _notify("added", quest)
+    return quest
+
+def add_quests(data, quests):
+    """Добавляет несколько новых задач одной операцией и возвращает их записи."""
+    quests = [_migrate_quest(as_quest(q)) for q in quests]
+    _touch(quests)
+    with _changing():
+        data["quests"].extend(quests)
+        _commit_batch(data, [{"op": "put_quest", "quest": q} for q in quests])
+    _notify_batch([("added", q) for q in quests])
+    return quests
+
+def update_quest(data, quest, **changes):
+    """Сохраняет изменённую задачу (прогресс, закрепление, правка в редакторе) и возвращает её запись.
+
+    changes — поля, которые надо поменять у задачи из data: они меняются под data_lock,
+    чтобы фоновая запись или выгрузка не увидела задачу без записи об изменении.
+    """
+    with _changing():
+        quest = _migrate_quest(as_quest(quest))
+        for key, value in changes.items():
+            quest[key] = value
+        _touch([quest])
+        _put_quest(data, quest)
+        _record(data, "put_quest", quest=quest)
+    _notify("updated", quest)
+    return quest
+
+def delete_quest(data, quest_id):
+    """Удаляет задачу из списка активных."""
+    with _changing():
+        removed = [q for q in data["quests"] if q["id"] == quest_id]
+        data["quests"] = [q for q in data["quests"] if q["id"] != quest_id]
+        _record(data, "delete_quest", id=quest_id)
+    for q in removed:
+        _notify("removed", q)
+
+def finish_quest(data, quest, **changes):
+    """Засчитывает выполнение: начисляет XP, пишет в историю и повышает уровень.
+
+    Ежедневные и накопительные задания остаются в списке с отметкой completed_today,
+    остальные убираются из активных. changes — как в update_quest (например, итоговый прогресс).
+    """
+    with _changing():
+        for key, value in changes.items():
+            quest[key] = value
+        completed, kept = _mark_finished(quest, str(date.today()))
+        if not kept:
+            _drop_quests(data, {quest["id"]})
+        _grant_completions(data, [completed])
+        _record(data, "complete", quest=completed)
+    _notify("updated" if kept else "removed", quest)
+    _notify("completed", completed)
+    return completed
+
+def _finish_batch(data, quests, records, events):
+    today = str(date.today())
+    removed = set()
+    completions = []
+    for quest in quests:
+        completed, kept = _mark_finished(quest, today)
+        if not kept:
+            removed.add(quest["id"])
+        completions.append(completed)
+        records.append({"op": "complete", "quest": completed})
+        events.append(("updated" if kept else "removed", quest))
+        events.append(("completed", completed))
+    _drop_quests(data, removed)
+    _grant_completions(data, completions)
+    return completions
+
+def _commit_batch(data, records):
+    if records:
+        _record(data, "batch", records=records)
+
+def finish_quests(data, quests):
+    """Засчитывает выполнение сразу нескольких задач.
+
+    Как и другие пакетные операции, выполняется целиком под одной блокировкой:
+    XP и уровень пересчитываются один раз, на диск уходит одна запись, а
+    подписчики получают одно событие "batch". Уже выполненные сегодня ежедневные
+    задания пропускаются. Возвращает записи истории.
+    """
+    quests = [q for q in _unique(quests) if not _is_finished_today(q)]
+    records, events = [], []
+    with _changing():
+        completions = _finish_batch(data, quests, records, events)
+        _commit_batch(data, records)
+    _notify_batch(events)
+    return completions
+
+def add_progress(data, quests, amount):
+    """Добавляет amount к прогрессу накопительных задач из quests (остальные пропускаются).
+
+    Задачи, достигшие цели, засчитываются в том же пакете. Возвращает записи истории.
+    """
+    progressed, reached = [], []
+    with _changing():
+        for quest in _unique(quests):
+            if not quest.get("is_cumulative", False) or _is_finished_today(quest):
+                continue
+            quest["current_value"] = quest.get("current_value", 0) + amount
+            if quest["current_value"] >= quest["target_value"]:
+                reached.append(quest)
+            else:
+                progressed.append(quest)
+        _touch(progressed)
+        records = [{"op": "put_quest", "quest": q} for q in progressed]
+        events = [("updated", q) for q in progressed]
+        completions = _finish_batch(data, reached, records, events)
+        _commit_batch(data, records)
+    _notify_batch(events)
+    return completions
+
+def set_pinned(data, quests, pinned):
+    """Закрепляет или открепляет несколько задач одной операцией."""
+    quests = [q for q in _unique(quests) if q.get("is_pinned", False) != pinned]
+    with _changing():
+        for quest in quests:
+            quest["is_pinned"] = pinned
+        _touch(quests)
+        _commit_batch(data, [{"op": "put_quest", "quest": q} for q in quests])
+    _notify_batch([("updated", q) for q in quests])
+
+def delete_quests(data, quest_ids):
+    """Удаляет несколько задач одной операцией."""
+    quest_ids = set(quest_ids)
+    with _changing():
+        removed = [q for q in data["quests"] if q["id"] in quest_ids]
+        _drop_quests(data, quest_ids)
+        _commit_batch(data, [{"op": "delete_quest", "id": q["id"]} for q in removed])
+    _notify_batch([("removed", q) for q in removed])
+
+def set_setting(data, key, value):
+    """Меняет одну настройку профиля (например, тему)."""
+    with _changing():
+        data[key] = value
+        _record(data, "set", key=key, value=value)
+    _notify("setting", key)
+
+def _read_snapshot():
+    if use_sqlite():
+        data = sqlite_store().load()
     else:
-        data = DEFAULT_DATA.copy()
+        recover_atomic(DATA_FILE)
+        if os.path.exists(DATA_FILE):
+            with open(DATA_FILE, "rb") as f:
+                data = _loads(f.read())
+        else:
+            data = copy.deepcopy(DEFAULT_DATA)
 
     data.setdefault("level", 1)
     data.setdefault("xp", 0)
     data.setdefault("quests", [])
     data.setdefault("completed_quests", [])
     data.setdefault("daily_reset", str(date.today()))
+    data["quests"] = Quest.from_list(data["quests"])
+    data["completed_quests"] = Completion.from_list(data["completed_quests"])
+    return data
+
+def _loads(raw):
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+def _dumps(data):
+    """Сериализует снимок: компактно (orjson или json без пробелов) или с отступами."""
+    if not COMPACT_JSON:
+        return json.dumps(data, indent=4, ensure_ascii=False, default=to_json)
+    if orjson is not None:
+        return orjson.dumps(data, default=to_json)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=to_json)
+
+@traced("write_snapshot")
+def _write_snapshot(data):
+    """Пишет снимок из памяти, сначала подтянув чужие изменения файлов.
 
-    data["quests"] = [_migrate_quest(q) for q in data.get("quests", [])]
-    data["completed_quests"] = [_migrate_quest(q) for q in data.get("completed_quests", [])]
+    Без журнала вместе со снимком на диск уходят и ждущие его записи (_pending).
+    """
+    with _store_lock():
+        with data_lock:
+            pending = _pending.get(DATA_FILE, [])
+            written = len(pending)
+            _sync_external(data, pending)
+            text = _dumps(data)
+        write_atomic(DATA_FILE, text, backup_path=DATA_FILE + ".bak")
+        # Записи снимаются с очереди только после удачной записи: иначе их ещё
+        # нужно накладывать при sync_external. Пришедшие во время записи остаются.
+        with data_lock:
+            del pending[:written]
+
+def _drop_duplicate_quests(data):
+    """Убирает повторы id среди активных задач (их оставлял старый сброс ежедневных)."""
+    seen = set()
+    unique = []
+    for q in data["quests"]:
+        if q["id"] not in seen:
+            seen.add(q["id"])
+            unique.append(q)
+    dropped = len(data["quests"]) - len(unique)
+    data["quests"] = unique
+    return dropped
+
+SORT_MODES = ["По названию", "По типу", "По XP (↓)", "По XP (↑)"]
+_TYPE_ORDER = {t: i for i, t in enumerate(TASK_TYPES)}
+
+def _hot_month(today=None):
+    """Первый месяц горячей истории ("ГГГГ-ММ"); "" — без архивации, горячая вся история."""
+    if ARCHIVE_AFTER_DAYS is None:
+        return ""
+    return str((today or date.today()) - timedelta(days=ARCHIVE_AFTER_DAYS))[:7]
+
+def _archive_old_completions(data, today=None):
+    """Переносит выполнения за месяцы старше горизонта в архив. Возвращает число убранных записей.
+
+    В SQLite они и так лежат в базе: из памяти убираются выполнения раньше окна,
+    загруженного load_data, а сохранять нечего (возвращается 0).
+    """
+    if use_sqlite():
+        since = sqlite_store().hot_since
+        data["completed_quests"] = [c for c in data["completed_quests"] if not c.get("date") or c["date"] >= since]
+        return 0
+    if ARCHIVE_AFTER_DAYS is None:
+        return 0
+    archive = completion_archive()
+    before_month = _hot_month(today)
+    with _store_lock():
+        hot = archive.archive(data["completed_quests"], before_month)
+    moved = len(data["completed_quests"]) - len(hot)
+    data["completed_quests"] = hot
+    return moved
+
+def all_completions(data):
+    """Вся история выполнений: сначала архив (открывает файлы месяцев), затем горячая часть.
+
+    В SQLite — прямо из базы, где вся история и лежит.
+    """
+    if use_sqlite():
+        return Completion.from_list(sqlite_store().iter_completions())
+    archived = list(completion_archive().iter_completions())
+    return archived + data["completed_quests"]
+
+def iter_completions(data):
+    """Вся история выполнений одним проходом: архив читается по месяцу и в кэше не остаётся.
+
+    Записи архива и SQLite отдаются словарями, как в файле.
+    """
+    if use_sqlite():
+        return sqlite_store().iter_completions()
+    return itertools.chain(completion_archive().iter_completions(cache=False), data["completed_quests"])
+
+def archived_totals():
+    """Итоги выполнений, которых нет в памяти (см. CompletionArchive.totals), без чтения самих записей.
+
+    Для JSON — из манифеста архива, для SQLite — запросами по строкам раньше горячего окна.
+    """
+    if use_sqlite():
+        store = sqlite_store()
+        return store.totals(before=store.hot_since)
+    return completion_archive().totals()
+
+def quest_sort_key(quest, mode, order=0):
+    """Ключ сортировки активного списка.
+
+    Сначала закреплённые (ежедневные и невыполненные выше), затем незакреплённые
+    ежедневные (невыполненные выше), затем остальные по режиму mode.
+    order — позиция задачи в data["quests"], сохраняет исходный порядок при равенстве.
+    """
+    is_daily = quest["type"] in DAILY_TYPES
+    done = quest.get("completed_today", False)
+    if quest.get("is_pinned", False):
+        return (0, not is_daily, done, quest["title"], order)
+    if is_daily:
+        return (1, done, order)
+    if mode == "По названию":
+        return (2, quest["title"], order)
+    if mode == "По типу":
+        return (2, _TYPE_ORDER.get(quest["type"], 999), order)
+    if mode == "По XP (↓)":
+        return (2, -quest["xp"], order)
+    if mode == "По XP (↑)":
+        return (2, quest["xp"], order)
+    return (2, order)
+
+def sort_quests(quests, mode):
+    """Задачи в порядке активного списка для режима сортировки mode."""
+    order = {id(q): i for i, q in enumerate(quests)}
+    return sorted(quests, key=lambda q: quest_sort_key(q, mode, order[id(q)]))
+
+def quest_filter(category, ranks=None):
+    """Проверка задачи на принадлежность категории из CATEGORY_MAP и, если задан ranks, к результатам поиска."""
+    allowed_types = set(CATEGORY_MAP[category])
+
+    def accepts(q):
+        if q["type"] not in allowed_types:
+            return False
+        return ranks is None or q["id"] in ranks
+    return accepts
+
+def daily_progress(quests):
+    """(выполнено сегодня, всего) ежедневных заданий среди quests."""
+    done = total = 0
+    for q in quests:
+        if q["type"] in DAILY_TYPES:
+            total += 1
+            if q.get("completed_today", False):
+                done += 1
+    return done, total
+
+def _read_store():
+    """Состояние хранилища на диске: снимок и записи журнала после него. Вызывается под блокировкой."""
+    while True:
+        before = store_fingerprint()[0]
+        data = _read_snapshot()
+        if not JOURNAL_ENABLED or use_sqlite():
+            return data
+        journal = _journal()
+        journal.recover(data.get("journal_seq", 0))
+        for record in journal.records(after=data.get("journal_seq", 0)):
+            apply_change(data, record)
+        # Сжатие журнала этого же процесса могло переписать снимок и обрезать журнал
+        # между их чтениями — тогда читаем заново.
+        if store_fingerprint()[0] == before:
+            return data
+
+def _file_crc(path):
+    crc = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+def _compare_files(seen, fingerprint):
+    """Какие файлы хранилища изменились с увиденного состояния. Возвращает (флаги, контрольные суммы).
+
+    Файл с другими размером или временем, но той же контрольной суммой (его
+    переписали тем же содержимым или просто коснулись), изменившимся не считается.
+    """
+    changed = []
+    crcs = list(seen["crcs"])
+    for i, path in enumerate(store_paths()):
+        if fingerprint[i] == seen["fingerprint"][i]:
+            changed.append(False)
+            continue
+        crc = _file_crc(path) if fingerprint[i] is not None else None
+        changed.append(crc is None or crc != crcs[i])
+        crcs[i] = crc
+    return changed, crcs
+
+def _completion_key(completed):
+    return completed["id"], completed.get("date"), completed["xp"]
+
+def _take_external(data, fresh):
+    """Приводит data к fresh (состоянию файлов), заменяя только отличающееся.
+
+    Неизменившиеся задачи и выполнения остаются прежними объектами. Возвращает
+    события по затронутым задачам или None, если из истории выполнений что-то
+    исчезло (её подписчикам проще перестроиться целиком).
+    """
+    events = []
+    live = {q["id"]: q for q in data["quests"]}
+    quests = []
+    for quest in fresh["quests"]:
+        old = live.pop(quest["id"], None)
+        if old is None:
+            events.append(("added", quest))
+        elif old == quest:
+            quest = old
+        else:
+            events.append(("updated", quest))
+        quests.append(quest)
+    events.extend(("removed", q) for q in live.values())
+
+    live_completions = {}
+    for completed in data["completed_quests"]:
+        live_completions.setdefault(_completion_key(completed), []).append(completed)
+    completions = []
+    for completed in fresh["completed_quests"]:
+        same = live_completions.get(_completion_key(completed))
+        if same:
+            completed = same.pop()
+        else:
+            events.append(("completed", completed))
+        completions.append(completed)
+
+    for key, value in fresh.items():
+        if key not in ("quests", "completed_quests", "journal_seq") and data.get(key) != value:
+            data[key] = value
+            events.append(("setting", key))
+    data["quests"] = quests
+    data["completed_quests"] = completions
+    return None if any(live_completions.values()) else events
+
+def _sync_external(data, pending=()):
+    """sync_external под уже взятыми data_lock и блокировкой хранилища.
+
+    pending — свои записи, которых ещё нет в файлах (в data они уже применены):
+    они накладываются на прочитанное состояние, чтобы не пропасть при замене.
+    """
+    seen = _seen.get(DATA_FILE)
+    if seen is None or seen["clean"]:
+        return False
+    fingerprint = store_fingerprint()
+    changed, crcs = _compare_files(seen, fingerprint)
+    if not any(changed):
+        # Файлы переписаны тем же содержимым. Журнал при этом мог смениться новым
+        # файлом — дописывать нужно уже в него.
+        if not use_sqlite() and fingerprint[1] != seen["fingerprint"][1]:
+            _journal().close()
+        seen.update(fingerprint=fingerprint, crcs=crcs, clean=True)
+        return False
+    with span("sync_external"):
+        fresh = _read_store()
+        for record in pending:
+            apply_change(fresh, record)
+        events = _take_external(data, fresh)
+        history_rewritten = events is None or (not use_sqlite() and changed[2])
+        if history_rewritten:
+            _archives.pop(ARCHIVE_DIR, None)
+            shutil.rmtree(COLUMNS_DIR, ignore_errors=True)
+        # Чтение журнала могло обрезать его оборванный хвост: сумма такого файла неизвестна.
+        now = store_fingerprint()
+        _mark_seen([crc if a == b else None for crc, a, b in zip(crcs, fingerprint, now)])
+    count("sync_external.changed")
+    if history_rewritten:
+        _notify("reloaded", data)
+    else:
+        for event, obj in events:
+            _notify(event, obj)
+    return True
+
+def sync_external(data, timeout=None):
+    """Подтягивает в data изменения файлов хранилища, сделанные не этим процессом:
+    другим экземпляром программы, achievle.py или синхронизацией папки.
+
+    Если файлы не менялись с последней своей записи или проверки, это стоит одного
+    stat на файл. Иначе хранилище читается заново, но в data меняется только
+    отличающееся, и подписчики получают события по затронутым задачам ("added",
+    "updated", "removed", "completed", "setting") — или "reloaded", если переписана
+    история выполнений. Перед каждой своей записью это делается само, поэтому
+    запись не затирает чужие изменения.
+
+    timeout — сколько ждать, пока другой экземпляр допишет хранилище (TimeoutError).
+    Возвращает True, если изменения были.
+    """
+    seen = _seen.get(DATA_FILE)
+    if seen is None or seen["fingerprint"] == store_fingerprint():
+        return False
+    with data_lock:
+        lock = _store_lock()
+        lock.acquire(timeout)
+        try:
+            return _sync_external(data, _pending.get(DATA_FILE, ()))
+        finally:
+            lock.release()
+
+@traced("load_data")
+def load_data():
+    if use_sqlite():
+        # В SQLite архив не нужен: старые выполнения остаются в базе и в память не читаются.
+        sqlite_store().hot_since = _hot_month()
+    # Пока хранилище читается, другие экземпляры его не пишут.
+    with _store_lock():
+        data = _read_store()
+        _mark_seen()
+    migrated = data.get("schema_version") == SCHEMA_VERSION
+
+    if not migrated:
+        # Записи журнала уже мигрированы при add_quest/update_quest, поэтому проход
+        # нужен только снимкам старого формата.
+        data["quests"] = [_migrate_quest(q) for q in data["quests"]]
+        data["completed_quests"] = [_migrate_quest(q) for q in data["completed_quests"]]
+        _drop_duplicate_quests(data)
+        _restore_legacy_dailies(data)
+        data["schema_version"] = SCHEMA_VERSION
+        # Новые id должны попасть в снимок, иначе записи журнала на них не сошлются.
+        save_data(data)
 
     data = restore_daily_quests(data)
+    # Архив пишется раньше снимка: после сбоя между ними копии отбросит следующий запуск.
+    if _archive_old_completions(data):
+        save_data(data)
     return data
 
+@traced("save_data")
 def save_data(data):
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE + ".bak", "w", encoding="utf-8") as bak:
-            with open(DATA_FILE, "r", encoding="utf-8") as orig:
-                bak.write(orig.read())
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
+    """Записывает полный снимок данных. В журнальном режиме заодно очищает журнал.
+
+    Чужие изменения файлов сначала подтягиваются в data (sync_external), а не затираются.
+    """
+    if use_sqlite():
+        with data_lock, _store_lock():
+            _sync_external(data)
+            store = sqlite_store()
+            store.save(data, since=store.hot_since)
+        return
+    if not JOURNAL_ENABLED:
+        _write_snapshot(data)
+        return
+    with _compact_lock, data_lock, _store_lock():
+        journal = _journal()
+        _sync_external(data)
+        with journal.lock:
+            data["journal_seq"] = journal.seq
+            _write_snapshot(data)
+            journal.drop_upto(journal.seq)
+
+def close_data(data):
+    """Завершает работу с хранилищем при выходе из приложения."""
+    if use_sqlite():
+        store = _sqlite_stores.pop(SQLITE_FILE, None)
+        if store is not None:
+            store.close()
+    else:
+        flush_data()
+        if JOURNAL_ENABLED:
+            _journal().close()
+    _seen.pop(DATA_FILE, None)
+    lock = _locks.pop(DATA_FILE, None)
+    if lock is not None:
+        lock.close()
+
+def flush_data():
+    """Барьер: дожидается фоновой записи и сжатия журнала, чтобы файл на диске был актуален."""
+    if use_sqlite():
+        return
+    saver = _savers.get(DATA_FILE)
+    if saver is not None:
+        saver.flush()
+    with _compact_lock:
+        pass
+
+def save_stats():
+    """Задержки и число объединённых сохранений фоновой записи."""
+    return _saver().stats()
+
+@traced("compact_journal")
+def compact_journal():
+    """Пересобирает снимок из старого снимка и журнала, не трогая данные в памяти."""
+    with _compact_lock, _store_lock():
+        journal = _journal()
+        with journal.lock:
+            upto = journal.seq
+            # Пустой журнал удаляется целиком: снимок и так актуален, читать его незачем.
+            if not os.path.exists(journal.path):
+                return
+        data = _read_snapshot()
+        base = data.get("journal_seq", 0)
+        if upto <= base:
+            return
+        for record in journal.records(after=base, upto=upto):
+            apply_change(data, record)
+        data["journal_seq"] = upto
+        # Снимок собран из файлов, а не из памяти, поэтому пишется без _write_snapshot.
+        write_atomic(DATA_FILE, _dumps(data), backup_path=DATA_FILE + ".bak")
+        journal.drop_upto(upto)
+
+def compact_journal_async():
+    """Запускает сжатие журнала в фоновом потоке, если оно ещё не идёт."""
+    global _compact_thread
+    if _compact_thread is not None and _compact_thread.is_alive():
+        return
+    _compact_thread = threading.Thread(target=compact_journal, daemon=True)
+    _compact_thread.start()
+
+def default_level_step(level, total_xp):
+    """Стандартная кривая: 1 → 2 стоит 100 XP, далее total_xp(n) + 50."""
+    return 100 if level == 1 else total_xp + 50
+
+
+class LevelCurve:
+    """Кривая уровней с лениво достраиваемой таблицей.
+
+    step(level, total_xp) возвращает, сколько XP нужно для перехода level → level + 1,
+    где total_xp — суммарный XP, необходимый для достижения level.
+    """
+
+    def __init__(self, step=default_level_step):
+        self.step = step
+        # Индекс — номер уровня; нулевые элементы — заглушки.
+        self._totals = [0, 0]
+        self._steps = [0, step(1, 0)]
+
+    def _extend_to_level(self, level):
+        while len(self._steps) <= level:
+            current = len(self._steps) - 1
+            total = self._totals[current] + self._steps[current]
+            self._totals.append(total)
+            self._steps.append(self.step(current + 1, total))
+
+    def xp_needed(self, level):
+        level = max(level, 1)
+        self._extend_to_level(level)
+        return self._steps[level]
+
+    def total_for_level(self, level):
+        if level <= 1:
+            return 0
+        self._extend_to_level(level)
+        return self._totals[level]
+
+    def level_for_total_xp(self, xp):
+        """Уровень, которого достигает игрок с накопленным xp, за один двоичный поиск.
+
+        Повторяет правило can_level_up: уровень растёт, пока xp >= xp_needed(level).
+        """
+        while self._steps[-1] <= xp:
+            self._extend_to_level(len(self._steps))
+        return bisect_right(self._steps, xp, lo=1)
+
+
+LEVEL_CURVE = LevelCurve()
+
+def set_level_curve(step):
+    """Подменяет правило расчёта опыта для уровней."""
+    global LEVEL_CURVE
+    LEVEL_CURVE = LevelCurve(step)
 
 def xp_needed_for_next_level(current_level):
     """
@@ -134,21 +1115,7 @@ def xp_needed_for_next_level(current_level):
     Уровень 3 → 4: 300 XP
     Уровень n → n+1: total_xp(n) + 50
     """
-    if current_level < 1:
-        current_level = 1
-
-    # Начинаем с уровня 1
-    total_xp = 0
-    # Вычисляем total_xp для текущего уровня
-    for lvl in range(1, current_level):
-        delta = total_xp + 50 if lvl > 1 else 100
-        total_xp += delta
-
-    # Теперь вычисляем delta для перехода на следующий уровень
-    if current_level == 1:
-        return 100
-    else:
-        return total_xp + 50
+    return LEVEL_CURVE.xp_needed(current_level)
 
 
 def can_level_up(current_level, current_xp):
@@ -159,28 +1126,345 @@ def can_level_up(current_level, current_xp):
 
 def total_xp_for_level(target_level):
     """Возвращает общий XP, необходимый для достижения target_level."""
-    if target_level <= 1:
-        return 0
-    total = 0
-    for lvl in range(1, target_level):
-        if lvl == 1:
-            delta = 100
+    return LEVEL_CURVE.total_for_level(target_level)
+
+
+def level_for_total_xp(total):
+    """Возвращает уровень для накопленного XP (обратная функция к can_level_up)."""
+    return LEVEL_CURVE.level_for_total_xp(total)
+
+def migrate_to_sqlite():
+    """Однократно переносит quests.json (вместе с журналом) в quests.db.
+
+    Сам quests.json остаётся на месте как резервная копия.
+    """
+    global STORAGE_BACKEND
+    previous = STORAGE_BACKEND
+    STORAGE_BACKEND = "json"
+    try:
+        data = load_data()
+        data["completed_quests"] = all_completions(data)
+    finally:
+        STORAGE_BACKEND = previous
+    sqlite_store().save(data)
+    return data
+
+def export_format(filepath):
+    """Формат выгрузки по имени файла: .ndjson/.jsonl — построчный, .gz — сжатый gzip."""
+    name = filepath.lower()
+    compressed = name.endswith(".gz")
+    if compressed:
+        name = name[:-3]
+    fmt = "ndjson" if name.endswith((".ndjson", ".jsonl")) else "json"
+    return fmt + ".gz" if compressed else fmt
+
+def _dump_record(obj):
+    if orjson is not None:
+        return orjson.dumps(obj, default=to_json).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=to_json)
+
+def _export_sources(since):
+    """Настройки профиля, задачи, итератор выполнений и их число прямо из хранилища.
+
+    С since — только изменённое.
+    """
+    if use_sqlite():
+        store = sqlite_store()
+        profile = store.profile()
+        quests = store.iter_quests()
+        completions = store.iter_completions(since=since and since[:10])
+        total = store.count_completions(since=since and since[:10])
+    else:
+        # Снимок уже пересобран с журналом (export_data) и читается как есть, без
+        # разбора в записи. Горячая часть невелика, а архив читается по месяцу.
+        recover_atomic(DATA_FILE)
+        if os.path.exists(DATA_FILE):
+            with open(DATA_FILE, "rb") as f:
+                profile = _loads(f.read())
+        else:
+            profile = copy.deepcopy(DEFAULT_DATA)
+        quests = profile.pop("quests", [])
+        hot = profile.pop("completed_quests", [])
+        archive = completion_archive()
+        archived = archive.iter_completions(since=since and since[:10], cache=False)
+        completions = itertools.chain(archived, hot)
+        # По манифесту, без чтения месяцев; с since — оценка сверху.
+        total = len(hot) + sum(archive.manifest["months"][month]["count"] for month in archive.months()
+                               if not since or month >= since[:7])
+        profile.pop("journal_seq", None)
+    if since:
+        quests = (q for q in quests if q.get("updated_at", "") >= since)
+        completions = (c for c in completions if (c.get("date") or "") >= since[:10])
+    return profile, quests, completions, total
+
+def _reporting(items, progress, total, step):
+    """Отдаёт items, сообщая progress(сделано, всего) каждые step элементов."""
+    done = 0
+    for item in items:
+        yield item
+        done += 1
+        if done % step == 0:
+            progress(done, max(done, total))
+    progress(done, done)
+
+@traced("export_data")
+def export_data(filepath, fmt=None, since=None, progress=None):
+    """Выгружает данные в файл (путь или открытый файл) потоково, прямо из хранилища.
+
+    fmt — один из EXPORT_FORMATS, по умолчанию по имени файла (export_format):
+    "json" — обычный файл данных, "ndjson" — по записи в строке (см. quest_stream),
+    ".gz" — то же со сжатием. since ("ГГГГ-ММ-ДД" или метка прошлой выгрузки) —
+    инкрементальная выгрузка: задачи, изменённые с этого момента, и выполнения
+    с этой даты. Удалений в ней нет, поэтому применяется она через merge_import.
+    Файл по пути пишется через временный и появляется только целиком.
+    progress(сделано, всего) получает ход выгрузки в числе выполнений.
+    Возвращает метку времени выгрузки — since для следующей.
+    """
+    if fmt is None:
+        fmt = export_format(filepath) if isinstance(filepath, str) else "json"
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Неизвестный формат выгрузки: {fmt!r}")
+    # Метка ставится до чтения: правки во время выгрузки попадут в следующую.
+    stamp = _utc_stamp()
+    if not use_sqlite():
+        flush_data()
+        if JOURNAL_ENABLED:
+            compact_journal()
+
+    profile, quests, completions, total = _export_sources(since)
+    if progress is not None:
+        completions = _reporting(completions, progress, total, EXPORT_PROGRESS_STEP)
+    write = write_ndjson if fmt.startswith("ndjson") else write_json
+    lists = (("quests", quests), ("completed_quests", completions))
+    compressed = fmt.endswith(".gz")
+    if not isinstance(filepath, str):
+        if compressed:
+            with gzip.open(filepath, "wt", encoding="utf-8", compresslevel=EXPORT_GZIP_LEVEL) as f:
+                write(f, profile, lists, _dump_record)
         else:
-            delta = total + 50
-        total += delta
-    return total
+            write(filepath, profile, lists, _dump_record)
+        return stamp
+    tmp_path = filepath + ".tmp"
+    if compressed:
+        f = gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=EXPORT_GZIP_LEVEL)
+    else:
+        f = open(tmp_path, "w", encoding="utf-8")
+    with f:
+        write(f, profile, lists, _dump_record)
+    os.replace(tmp_path, filepath)
+    return stamp
+
+def export_changes(data, filepath, fmt=None):
+    """Инкрементальная выгрузка всего, что изменилось с прошлой такой выгрузки.
+
+    Метка хранится в настройке профиля "last_export"; без неё выгружается всё.
+    """
+    stamp = export_data(filepath, fmt, since=data.get("last_export"))
+    set_setting(data, "last_export", stamp)
+    return stamp
+
+def _open_import(filepath, fmt):
+    if fmt.endswith(".gz"):
+        return gzip.open(filepath, "rt", encoding="utf-8")
+    return open(filepath, "r", encoding="utf-8")
 
-def export_data(filepath):
-    """Копирует quests.json в указанный файл."""
-    shutil.copy2(DATA_FILE, filepath)
+def _read_position(f):
+    """Сколько байт файла f, открытого _open_import, уже прочитано (у сжатого — сжатых байт)."""
+    raw = getattr(f, "buffer", None)
+    raw = getattr(raw, "fileobj", raw)
+    try:
+        return raw.tell()
+    except (AttributeError, OSError, ValueError):
+        return 0
 
+@traced("import_data")
 def import_data(filepath):
-    """Загружает данные из указанного файла."""
-    shutil.copy2(filepath, DATA_FILE)
+    """Заменяет данные содержимым файла выгрузки (JSON, в том числе сжатого)."""
+    fmt = export_format(filepath)
+    if fmt.startswith("ndjson"):
+        raise ValueError("Построчная выгрузка применяется только слиянием (merge_import)")
+    if use_sqlite():
+        with _open_import(filepath, fmt) as f, _store_lock():
+            sqlite_store().save(json.load(f))
+        return load_data()
+    flush_data()
+    with _compact_lock, _store_lock():
+        _journal().discard()
+        completion_archive().clear()
+        shutil.rmtree(COLUMNS_DIR, ignore_errors=True)
+        if fmt.endswith(".gz"):
+            with gzip.open(filepath, "rb") as src, open(DATA_FILE, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+        else:
+            shutil.copy2(filepath, DATA_FILE)
     return load_data()
 
+def _same_quest(a, b):
+    a, b = a.to_dict(), b.to_dict()
+    a.pop("updated_at", None)
+    b.pop("updated_at", None)
+    return a == b
+
+def _incoming_wins(current, incoming, policy):
+    if policy == "newest":
+        return incoming.get("updated_at", "") > current.get("updated_at", "")
+    progress = (incoming.get("current_value", 0), incoming.get("completed_today", False))
+    return progress > (current.get("current_value", 0), current.get("completed_today", False))
+
+@traced("merge_import")
+def merge_import(data, filepath, policy="newest", fmt=None, progress=None):
+    """Сливает файл экспорта (путь или открытый текстовый файл) с текущими данными, а не заменяет их.
+
+    Файл читается потоково и применяется пакетами по MERGE_BATCH записей, поэтому
+    память не растёт с его размером: в ней держатся только ключи своей истории.
+    Задачи сопоставляются по id; если они различаются, решает policy:
+    "newest" — остаётся правленная позже (updated_at), "max_progress" — с большим
+    прогрессом, "keep_both" — входящая добавляется копией с новым id.
+    Выполнения сопоставляются по (id, дата) с учётом числа повторов (накопительную
+    задачу можно выполнить несколько раз за день): уже имеющиеся пропускаются,
+    новые идут в историю (старые месяцы — сразу в архив) и начисляют XP.
+
+    fmt — формат из EXPORT_FORMATS, по умолчанию по имени файла.
+    progress(сделано, всего) получает ход чтения файла по пути в байтах, после каждого пакета.
+
+    Возвращает отчёт {"added", "replaced", "kept", "copied", "unchanged",
+    "completions_added", "completions_skipped", "xp_added"}.
+    """
+    if policy not in MERGE_POLICIES:
+        raise ValueError(f"Неизвестное правило слияния: {policy!r}")
+    report = dict.fromkeys(("added", "replaced", "kept", "copied", "unchanged",
+                            "completions_added", "completions_skipped", "xp_added"), 0)
+    archive = completion_archive()
+    # Выполнения месяцев старше горизонта архива копятся в cold и пишутся в архив
+    # пачками по MERGE_ARCHIVE_BATCH, чтобы файл месяца не переписывался на каждый пакет.
+    horizon = _hot_month()
+    cold = []
+    index = {"quests": None, "positions": None}
+    with data_lock:
+        if use_sqlite():
+            local = sqlite_store().completion_counts()
+        else:
+            local = archive.completion_counts()
+            local.update((c["id"], c.get("date")) for c in data["completed_quests"])
+    matched = Counter()
+
+    def merge_quests(batch):
+        records = []
+        with _changing():
+            if index["quests"] is not data["quests"]:
+                # Список заменён (в том числе sync_external, подтянувшим чужие правки) — позиции заново.
+                index["quests"] = data["quests"]
+                index["positions"] = {q["id"]: i for i, q in enumerate(data["quests"])}
+            positions = index["positions"]
+            for quest in batch:
+                i = positions.get(quest["id"])
+                if i is not None and _same_quest(data["quests"][i], quest):
+                    report["unchanged"] += 1
+                    continue
+                if i is not None and policy == "keep_both":
+                    quest["id"] = str(uuid.uuid4())
+                    report["copied"] += 1
+                elif i is None:
+                    report["added"] += 1
+                if i is None or policy == "keep_both":
+                    positions[quest["id"]] = len(data["quests"])
+                    data["quests"].append(quest)
+                elif _incoming_wins(data["quests"][i], quest, policy):
+                    data["quests"][i] = quest
+                    report["replaced"] += 1
+                else:
+                    report["kept"] += 1
+                    continue
+                records.append({"op": "put_quest", "quest": quest})
+            _commit_batch(data, records)
+
+    def merge_completions(batch):
+        hot = []
+        archive = completion_archive()
+        for completed in batch:
+            key = (completed["id"], completed.get("date"))
+            # Считаются только ключи, которые уже есть у себя: остальные точно новые.
+            if local.get(key):
+                matched[key] += 1
+                if matched[key] <= local[key]:
+                    report["completions_skipped"] += 1
+                    continue
+            month = (completed.get("date") or "")[:7]
+            if archive is not None and month and (month < horizon or month in archive.manifest["months"]):
+                cold.append(completed)
+            else:
+                hot.append(completed)
+        archived = []
+        if len(cold) >= MERGE_ARCHIVE_BATCH:
+            archived = cold[:]
+            cold.clear()
+        commit(hot, archived)
+
+    def commit(hot, archived):
+        if not hot and not archived:
+            return
+        xp = sum(c["xp"] for c in hot) + sum(c["xp"] for c in archived)
+        with data_lock, _store_lock():
+            if archived:
+                # Архив пишется раньше журнала, как и при обычной архивации.
+                archive = completion_archive()
+                hot.extend(archive.archive(archive.merge(archived), horizon))
+            _grant_completions(data, hot, xp)
+            _record(data, "merge_completions", quests=hot, xp=xp)
+        report["completions_added"] += len(hot) + len(archived)
+        report["xp_added"] += xp
+
+    batches = {"quests": ([], Quest, merge_quests), "completed_quests": ([], Completion, merge_completions)}
+    if isinstance(filepath, str):
+        fmt = fmt or export_format(filepath)
+        opened = _open_import(filepath, fmt)
+        size = os.path.getsize(filepath)
+    else:
+        fmt = fmt or "json"
+        opened = contextlib.nullcontext(filepath)
+        size = 0
+    with opened as f:
+        records = iter_ndjson(f) if fmt.startswith("ndjson") else JsonStreamReader(f, batches)
+        for key, item in records:
+            if key not in batches:
+                continue
+            batch, record_type, merge = batches[key]
+            batch.append(_migrate_quest(record_type(**item)))
+            if len(batch) >= MERGE_BATCH:
+                merge(batch)
+                batch.clear()
+                if progress is not None and size:
+                    progress(_read_position(f), size)
+    for batch, _, merge in batches.values():
+        if batch:
+            merge(batch)
+    commit([], cold)
+    if progress is not None and size:
+        progress(size, size)
+
+    if report["completions_added"]:
+        shutil.rmtree(COLUMNS_DIR, ignore_errors=True)
+    if use_sqlite():
+        # Выполнения раньше горячего окна уже в базе, в памяти им не место.
+        _archive_old_completions(data)
+    else:
+        # Чистый снимок вместо большого журнала; заодно уходят горячие копии архивированных месяцев.
+        save_data(data)
+    _notify("reloaded", data)
+    return report
+
 def reset_data():
     """Сбрасывает все данные к начальному состоянию."""
-    if os.path.exists(DATA_FILE):
-        os.remove(DATA_FILE)
+    if use_sqlite():
+        with _store_lock():
+            sqlite_store().clear()
+        return load_data()
+    flush_data()
+    with _compact_lock, _store_lock():
+        _journal().discard()
+        completion_archive().clear()
+        shutil.rmtree(COLUMNS_DIR, ignore_errors=True)
+        for path in (DATA_FILE, DATA_FILE + ".tmp"):
+            if os.path.exists(path):
+                os.remove(path)
     return load_data()
\ No newline at end of file
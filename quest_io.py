@@ -0,0 +1,103 @@
+import traceback
+
+from PyQt6.QtCore import QCoreApplication, QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+
+
+class _Job(QRunnable):
+    def __init__(self, service, job_id, func, args, kwargs):
+        super().__init__()
+        self.service = service
+        self.job_id = job_id
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self):
+        try:
+            result = self.func(*self.args, **self.kwargs)
+        except Exception as e:
+            self.service._failed.emit(self.job_id, e)
+        else:
+            self.service._done.emit(self.job_id, result)
+
+
+class IoService(QObject):
+    """Операции с файлами хранилища (загрузка, импорт, выгрузка, сброс) в фоновом потоке.
+
+    Пул на один поток: операции выполняются по одной, в порядке запуска, и не
+    пересекаются друг с другом. Правки из окна во время операции защищены
+    блокировками quest_data (data_lock, журнал), поэтому не теряются и не рвут снимок.
+    Результаты, ошибки и ход операции возвращаются сигналами в поток интерфейса.
+
+    События данных (subscribe) из фоновой операции тоже нельзя обрабатывать в её
+    потоке: окно подписывает relay, и они приходят сигналом data_event.
+    """
+
+    data_event = pyqtSignal(str, object)
+    _done = pyqtSignal(int, object)
+    _failed = pyqtSignal(int, object)
+    _progress = pyqtSignal(int, object, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self._jobs = {}  # номер -> (задача, on_done, on_error, on_progress)
+        self._next_id = 0
+        self._done.connect(self._on_done)
+        self._failed.connect(self._on_failed)
+        self._progress.connect(self._on_progress)
+
+    def run(self, func, *args, on_done=None, on_error=None, on_progress=None, **kwargs):
+        """Выполняет func(*args, **kwargs) в фоне.
+
+        on_done(результат) и on_error(исключение) вызываются в потоке интерфейса.
+        С on_progress функция получает аргумент progress(сделано, всего) — его
+        можно вызывать из фонового потока, on_progress придёт в поток интерфейса.
+        """
+        job_id = self._next_id
+        self._next_id += 1
+        if on_progress is not None:
+            kwargs["progress"] = lambda done, total: self._progress.emit(job_id, done, total)
+        job = _Job(self, job_id, func, args, kwargs)
+        job.setAutoDelete(False)
+        self._jobs[job_id] = (job, on_done, on_error, on_progress)
+        self.pool.start(job)
+        return job_id
+
+    def busy(self):
+        return bool(self._jobs)
+
+    def wait(self):
+        """Дожидается всех операций и доставляет их результаты (перед закрытием окна)."""
+        self.pool.waitForDone()
+        QCoreApplication.sendPostedEvents(self)
+
+    def relay(self, event, obj):
+        """Подписчик quest_data: пересылает событие в поток интерфейса сигналом data_event."""
+        self.data_event.emit(event, obj)
+
+    def _finish(self, job_id):
+        _, on_done, on_error, _ = self._jobs.pop(job_id)
+        return on_done, on_error
+
+    # Настоящие слоты: результаты приходят событиями самому сервису, и wait() может их доставить.
+    @pyqtSlot(int, object)
+    def _on_done(self, job_id, result):
+        on_done, _ = self._finish(job_id)
+        if on_done is not None:
+            on_done(result)
+
+    @pyqtSlot(int, object)
+    def _on_failed(self, job_id, error):
+        _, on_error = self._finish(job_id)
+        if on_error is not None:
+            on_error(error)
+        else:
+            traceback.print_exception(error)
+
+    @pyqtSlot(int, object, object)
+    def _on_progress(self, job_id, done, total):
+        job = self._jobs.get(job_id)
+        if job is not None and job[3] is not None:
+            job[3](done, total)
@@ -0,0 +1,118 @@
+import json
+import os
+import threading
+
+from quest_records import to_json
+
+
+def write_atomic(path, text, backup_path=None):
+    """Записывает файл целиком через временный файл, fsync и os.replace.
+
+    text может быть строкой или байтами. Если указан backup_path, прежняя версия
+    файла переименовывается в него (без копирования содержимого).
+    """
+    tmp_path = path + ".tmp"
+    if isinstance(text, bytes):
+        f = open(tmp_path, "wb")
+    else:
+        f = open(tmp_path, "w", encoding="utf-8")
+    with f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    if backup_path is not None and os.path.exists(path):
+        os.replace(path, backup_path)
+    os.replace(tmp_path, path)
+
+
+def recover_atomic(path):
+    """Завершает прерванную запись: если основной файл уже переименован в
+    резервный, а полностью записанный временный ещё не занял его место."""
+    tmp_path = path + ".tmp"
+    if not os.path.exists(path) and os.path.exists(tmp_path):
+        os.replace(tmp_path, path)
+
+
+class QuestJournal:
+    """Журнал изменений: каждое действие дописывается в конец файла отдельной строкой JSON."""
+
+    def __init__(self, path):
+        self.path = path
+        self.seq = 0
+        self.lock = threading.RLock()
+        self._file = None
+
+    def append(self, op, **fields):
+        """Дописывает запись и возвращает текущий размер журнала в байтах."""
+        with self.lock:
+            self.seq += 1
+            record = {"seq": self.seq, "op": op, **fields}
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(json.dumps(record, ensure_ascii=False, default=to_json) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            return self._file.tell()
+
+    def records(self, after=0, upto=None):
+        """Читает записи с after < seq <= upto. Оборванная при сбое строка отбрасывается."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if record["seq"] <= after:
+                    continue
+                if upto is not None and record["seq"] > upto:
+                    break
+                yield record
+
+    def recover(self, base_seq):
+        """Обрезает оборванный хвост после сбоя и восстанавливает счётчик записей."""
+        with self.lock:
+            self.close()
+            self.seq = base_seq
+            if not os.path.exists(self.path):
+                return
+            valid_size = 0
+            with open(self.path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    valid_size += len(line)
+                    self.seq = max(self.seq, record["seq"])
+            if valid_size < os.path.getsize(self.path):
+                with open(self.path, "r+b") as f:
+                    f.truncate(valid_size)
+
+    def drop_upto(self, seq):
+        """Удаляет из журнала записи, уже попавшие в снимок."""
+        with self.lock:
+            self.close()
+            rest = [json.dumps(r, ensure_ascii=False) + "\n" for r in self.records(after=seq)]
+            if rest:
+                write_atomic(self.path, "".join(rest))
+            elif os.path.exists(self.path):
+                os.remove(self.path)
+
+    def discard(self):
+        """Полностью удаляет журнал (после импорта или сброса данных)."""
+        with self.lock:
+            self.close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def close(self):
+        with self.lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+# Как часто повторять попытку взять занятую блокировку (с).
+RETRY_INTERVAL = 0.02
+
+
+class StoreLock:
+    """Межпроцессная рекомендательная блокировка хранилища (flock, в Windows — msvcrt.locking).
+
+    Другие экземпляры программы ждут её перед записью в файлы хранилища. Внутри
+    процесса она общая: её держат, пока пишет хотя бы один поток, а порядок записей
+    между потоками задают блокировки quest_data. Поэтому взятие в любом порядке
+    с ними не приводит к взаимной блокировке.
+
+    on_lock() вызывается сразу после того, как файл заблокирован, on_unlock() — перед
+    снятием блокировки.
+    """
+
+    def __init__(self, path, timeout=10.0, on_lock=None, on_unlock=None):
+        self.path = path
+        self.timeout = timeout
+        self.on_lock = on_lock
+        self.on_unlock = on_unlock
+        self._mutex = threading.Lock()
+        self._holders = 0
+        self._file = None
+
+    def acquire(self, timeout=None):
+        """Берёт блокировку; если другой процесс не отпустил её за timeout секунд — TimeoutError."""
+        with self._mutex:
+            if self._holders == 0:
+                self._lock_file(self.timeout if timeout is None else timeout)
+                if self.on_lock is not None:
+                    try:
+                        self.on_lock()
+                    except BaseException:
+                        self._unlock_file()
+                        raise
+            self._holders += 1
+
+    def release(self):
+        with self._mutex:
+            self._holders -= 1
+            if self._holders == 0:
+                try:
+                    if self.on_unlock is not None:
+                        self.on_unlock()
+                finally:
+                    self._unlock_file()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def _lock_file(self, timeout):
+        if self._file is None:
+            self._file = open(self.path, "a+b")
+        deadline = time.monotonic() + timeout
+        while not self._try_lock():
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Хранилище занято другим экземпляром программы ({self.path})")
+            time.sleep(RETRY_INTERVAL)
+
+    def _try_lock(self):
+        fd = self._file.fileno()
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            elif msvcrt is not None:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+
+    def _unlock_file(self):
+        fd = self._file.fileno()
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        elif msvcrt is not None:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+    def close(self):
+        with self._mutex:
+            if self._file is not None and self._holders == 0:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,487 @@
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QSize, QEvent, pyqtSignal
+from PyQt6.QtGui import QCursor, QFont, QFontMetrics, QPainter
+from PyQt6.QtWidgets import QStyledItemDelegate, QStyle, QApplication
+from bisect import bisect_left
+from quest_data import DAILY_TYPES, SORT_MODES, quest_sort_key
+import quest_theme
+from quest_trace import span
+
+QUEST_ROLE = Qt.ItemDataRole.UserRole + 1
+# Сколько строк set_view перемещает по одной; при большей перестановке список перекладывается целиком.
+MOVE_ROWS_LIMIT = 16
+
+
+class QuestListModel(QAbstractListModel):
+    """Модель списка активных задач: хранит отфильтрованные задачи в порядке сортировки.
+
+    Изменения данных применяются точечно: вставка, удаление, перемещение или
+    обновление одной строки, поэтому прокрутка и выделение в списке сохраняются.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._quests = []
+        self._keys = []
+        self._key_of = {}
+        self._order = {}
+        self._next_order = 0
+        self._accepts = lambda quest: True
+        self._sort_mode = SORT_MODES[0]
+        self._ranks = None
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._quests)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        quest = self._quests[index.row()]
+        if role == Qt.ItemDataRole.UserRole:
+            return quest["id"]
+        if role == QUEST_ROLE:
+            return quest
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return quest["title"]
+        return None
+
+    def quest_at(self, row):
+        return self._quests[row]
+
+    def row_of(self, quest_id):
+        key = self._key_of.get(quest_id)
+        if key is None:
+            return -1
+        return bisect_left(self._keys, key)
+
+    def _key(self, quest):
+        key = quest_sort_key(quest, self._sort_mode, self._order[quest["id"]])
+        if self._ranks is not None:
+            return (self._ranks.get(quest["id"], 0),) + key
+        return key
+
+    def set_view(self, quests, accepts, sort_mode, ranks=None):
+        """Задаёт фильтр и сортировку и приводит список к ним минимальным числом операций.
+
+        ranks — {id: ранг} результатов поиска; более релевантные задачи идут выше.
+        """
+        self._accepts = accepts
+        self._sort_mode = sort_mode
+        self._ranks = ranks
+        self._order = {q["id"]: i for i, q in enumerate(quests)}
+        self._next_order = len(quests)
+        with span("set_view.sort"):
+            target = sorted((q for q in quests if accepts(q)), key=self._key)
+        with span("set_view.apply_diff"):
+            self._apply_diff(target)
+
+    def _apply_diff(self, target):
+        target_ids = {q["id"] for q in target}
+
+        # 1. Удаляем пропавшие строки, объединяя соседние в один диапазон.
+        row = len(self._quests) - 1
+        while row >= 0:
+            if self._quests[row]["id"] in target_ids:
+                row -= 1
+                continue
+            last = row
+            while row >= 0 and self._quests[row]["id"] not in target_ids:
+                row -= 1
+            self.beginRemoveRows(QModelIndex(), row + 1, last)
+            del self._quests[row + 1:last + 1]
+            self.endRemoveRows()
+
+        # 2. Переставляем оставшиеся: на месте остаётся наибольшая возрастающая
+        # подпоследовательность. Несколько строк двигаем по одной, большую
+        # перестановку (смена сортировки) — одной сменой раскладки.
+        position = {q["id"]: i for i, q in enumerate(target)}
+        current = [q["id"] for q in self._quests]
+        kept = set(current)
+        settled = _longest_increasing(current, position)
+        if len(current) - len(settled) > MOVE_ROWS_LIMIT:
+            self._relayout(current, position)
+        elif len(settled) < len(current):
+            self._move_rows(target, current, kept, settled)
+
+        # 3. Вставляем новые строки на их места, соседние — одним диапазоном;
+        # у оставшихся строк подменяем объект задачи, если он стал другим.
+        changed = []
+        i = 0
+        while i < len(target):
+            quest = target[i]
+            if quest["id"] in kept:
+                if self._quests[i] is not quest:
+                    self._quests[i] = quest
+                    changed.append(i)
+                i += 1
+                continue
+            end = i + 1
+            while end < len(target) and target[end]["id"] not in kept:
+                end += 1
+            self.beginInsertRows(QModelIndex(), i, end - 1)
+            self._quests[i:i] = target[i:end]
+            self.endInsertRows()
+            i = end
+
+        self._keys = [self._key(q) for q in self._quests]
+        self._key_of = {q["id"]: key for q, key in zip(self._quests, self._keys)}
+        for first, last in _ranges(changed):
+            self.dataChanged.emit(self.index(first), self.index(last))
+
+    def _move_rows(self, target, current, kept, settled):
+        """Перемещает по одной строки вне наибольшей возрастающей подпоследовательности."""
+        row_of = {quest_id: row for row, quest_id in enumerate(current)}
+        previous = None
+        for quest in target:
+            quest_id = quest["id"]
+            if quest_id not in kept:
+                continue
+            if quest_id in settled:
+                previous = quest_id
+                continue
+            src = row_of[quest_id]
+            dest = row_of[previous] + 1 if previous is not None else 0
+            if dest > src:
+                dest -= 1
+            if dest != src:
+                self.beginMoveRows(QModelIndex(), src, src, QModelIndex(), dest if dest < src else dest + 1)
+                current.insert(dest, current.pop(src))
+                self._quests.insert(dest, self._quests.pop(src))
+                self.endMoveRows()
+                for row in range(min(src, dest), max(src, dest) + 1):
+                    row_of[current[row]] = row
+            settled.add(quest_id)
+            previous = quest_id
+
+    def _relayout(self, current, position):
+        """Переставляет все строки за один проход layoutChanged, сохраняя выделение и текущую строку."""
+        self.layoutAboutToBeChanged.emit()
+        self._quests.sort(key=lambda q: position[q["id"]])
+        new_row = {q["id"]: row for row, q in enumerate(self._quests)}
+        persistent = self.persistentIndexList()
+        self.changePersistentIndexList(
+            persistent, [self.index(new_row[current[index.row()]]) for index in persistent])
+        self.layoutChanged.emit()
+
+    def quests_changed(self, quest_ids):
+        """Перерисовывает строки задач, изменённых на месте (после пакетной операции)."""
+        rows = sorted(row for row in map(self.row_of, quest_ids) if row >= 0)
+        for first, last in _ranges(rows):
+            self.dataChanged.emit(self.index(first), self.index(last))
+
+    def quest_added(self, quest):
+        self._order[quest["id"]] = self._next_order
+        self._next_order += 1
+        if self._accepts(quest):
+            self._insert(quest)
+
+    def quest_removed(self, quest):
+        if quest["id"] in self._key_of:
+            self._remove(quest["id"])
+        self._order.pop(quest["id"], None)
+
+    def quest_updated(self, quest):
+        """Обновляет строку задачи; возвращает её новый номер или -1, если строка скрыта."""
+        quest_id = quest["id"]
+        if quest_id not in self._order:
+            self._order[quest_id] = self._next_order
+            self._next_order += 1
+        visible = self._accepts(quest)
+        if quest_id not in self._key_of:
+            return self._insert(quest) if visible else -1
+        if not visible:
+            self._remove(quest_id)
+            return -1
+        row = self.row_of(quest_id)
+        new_key = self._key(quest)
+        new_row = bisect_left(self._keys, new_key)
+        if new_row > row:
+            new_row -= 1
+        self._key_of[quest_id] = new_key
+        if new_row == row:
+            self._quests[row] = quest
+            self._keys[row] = new_key
+        else:
+            # Пересортировка после изменения — одно перемещение строки.
+            self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), new_row + 1 if new_row > row else new_row)
+            del self._quests[row]
+            del self._keys[row]
+            self._quests.insert(new_row, quest)
+            self._keys.insert(new_row, new_key)
+            self.endMoveRows()
+        self.dataChanged.emit(self.index(new_row), self.index(new_row))
+        return new_row
+
+    def _insert(self, quest):
+        key = self._key(quest)
+        row = bisect_left(self._keys, key)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._quests.insert(row, quest)
+        self._keys.insert(row, key)
+        self._key_of[quest["id"]] = key
+        self.endInsertRows()
+        return row
+
+    def _remove(self, quest_id):
+        row = self.row_of(quest_id)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._quests[row]
+        del self._keys[row]
+        del self._key_of[quest_id]
+        self.endRemoveRows()
+
+
+def _ranges(rows):
+    """Разбивает возрастающие номера строк на диапазоны (первая, последняя) подряд идущих."""
+    first = last = None
+    for row in rows:
+        if last is not None and row == last + 1:
+            last = row
+            continue
+        if first is not None:
+            yield first, last
+        first = last = row
+    if first is not None:
+        yield first, last
+
+
+def _longest_increasing(ids, position):
+    """Множество id, уже стоящих в нужном относительном порядке (наибольшая возрастающая подпоследовательность)."""
+    tails = []
+    tail_index = []
+    parent = [-1] * len(ids)
+    for i, quest_id in enumerate(ids):
+        value = position[quest_id]
+        k = bisect_left(tails, value)
+        if k == len(tails):
+            tails.append(value)
+            tail_index.append(i)
+        else:
+            tails[k] = value
+            tail_index[k] = i
+        parent[i] = tail_index[k - 1] if k > 0 else -1
+    result = set()
+    i = tail_index[-1] if tail_index else -1
+    while i >= 0:
+        result.add(ids[i])
+        i = parent[i]
+    return result
+
+
+class QuestItemDelegate(QStyledItemDelegate):
+    """Рисует карточку задачи целиком, без виджетов на каждую строку.
+
+    Кнопки закрепления и выполнения — просто области карточки, клики по ним
+    превращаются в сигналы pinClicked/completeClicked с объектом задачи.
+    """
+
+    pinClicked = pyqtSignal(object)
+    completeClicked = pyqtSignal(object)
+
+    MARGIN_X = 12
+    MARGIN_Y = 8
+    SPACING = 6
+    BUTTON_SIZE = QSize(124, 34)
+    PROGRESS_HEIGHT = 16
+    ICON_SIZE = 36
+    PIN_SIZE = 24
+    NAME_MAX_WIDTH = 300
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.theme = "light"
+        self.colors = quest_theme.colors(self.theme)
+        self._heights = {}
+        self.title_font = QFont("Segoe UI", 10)
+        self.title_font.setBold(True)
+        self.desc_font = QFont("Segoe UI", 9)
+        self.xp_font = QFont("Segoe UI", 10, QFont.Weight.Bold)
+        self.button_font = QFont("Segoe UI", 10, QFont.Weight.Medium)
+        self.glyph_font = QFont("Segoe UI")
+        self.glyph_font.setPixelSize(14)
+
+    def set_theme(self, theme):
+        self.theme = theme
+        self.colors = quest_theme.colors(theme)
+
+    def track(self, model):
+        """Забывает высоты строк, уходящих из model: кэш не растёт с каждой удалённой задачей."""
+        leaving = []
+
+        def about_to_remove(parent, first, last):
+            leaving[:] = [model.quest_at(row)["id"] for row in range(first, last + 1)]
+
+        def removed(parent, first, last):
+            # Вид ещё спрашивает высоты уходящих строк между этими сигналами.
+            for quest_id in leaving:
+                self._heights.pop(quest_id, None)
+            leaving.clear()
+
+        model.rowsAboutToBeRemoved.connect(about_to_remove)
+        model.rowsRemoved.connect(removed)
+        model.modelReset.connect(self._heights.clear)
+
+    def row_height(self, quest):
+        base_height = 40
+        button_height = self.BUTTON_SIZE.height()
+        padding = 24
+        desc = quest.get("desc", "")
+        if desc:
+            lines = len(desc.splitlines())
+            desc_height = max(1, lines) * 20
+        else:
+            desc_height = 0
+        progress_height = self.PROGRESS_HEIGHT if quest.get("is_cumulative") else 0
+        total_height = base_height + desc_height + progress_height + button_height + padding
+        return max(100, int(total_height))
+
+    def sizeHint(self, option, index):
+        quest = index.data(QUEST_ROLE)
+        height = self.row_height(quest)
+        self._heights[quest["id"]] = height
+        return QSize(0, height)
+
+    def refresh_size(self, index):
+        """Сообщает виду, если высота строки изменилась (например, после правки описания)."""
+        quest = index.data(QUEST_ROLE)
+        if self._heights.get(quest["id"]) != self.row_height(quest):
+            self.sizeHintChanged.emit(index)
+
+    def _layout(self, rect, quest):
+        """Раскладывает карточку на области; используется и для рисования, и для кликов."""
+        content = rect.adjusted(self.MARGIN_X, self.MARGIN_Y, -self.MARGIN_X, -self.MARGIN_Y)
+        button = QRect(content.left(), content.bottom() - self.BUTTON_SIZE.height() + 1,
+                       self.BUTTON_SIZE.width(), self.BUTTON_SIZE.height())
+        bottom = button.top() - self.SPACING
+        progress = None
+        if quest.get("is_cumulative"):
+            progress = QRect(content.left(), bottom - self.PROGRESS_HEIGHT + 1,
+                             content.width(), self.PROGRESS_HEIGHT)
+            bottom = progress.top() - self.SPACING
+        top = QRect(content.left(), content.top(), content.width(), bottom - content.top() + 1)
+
+        pin = QRect(top.left(), top.top() + (self.ICON_SIZE - self.PIN_SIZE) // 2, self.PIN_SIZE, self.PIN_SIZE)
+        icon = QRect(pin.right() + 1 + self.SPACING, top.top(), self.ICON_SIZE, self.ICON_SIZE)
+        xp_width = QFontMetrics(self.xp_font).horizontalAdvance(f"{quest['xp']} XP")
+        xp = QRect(top.right() - xp_width + 1, top.top(), xp_width, self.ICON_SIZE)
+        name_left = icon.right() + 1 + self.SPACING
+        name_width = min(self.NAME_MAX_WIDTH, xp.left() - self.SPACING - name_left)
+        title_height = QFontMetrics(self.title_font).height() + 4
+        title = QRect(name_left, top.top(), name_width, title_height)
+        desc = QRect(name_left, title.bottom() + 1, name_width, top.bottom() - title.bottom())
+        return {
+            "pin": pin, "icon": icon, "title": title, "desc": desc, "xp": xp,
+            "progress": progress, "button": button,
+        }
+
+    def _is_done(self, quest):
+        return quest["type"] in DAILY_TYPES and quest.get("completed_today", False)
+
+    def paint(self, painter, option, index):
+        quest = index.data(QUEST_ROLE)
+        widget = option.widget
+        style = widget.style() if widget is not None else QApplication.style()
+        style.drawPrimitive(QStyle.PrimitiveElement.PE_PanelItemViewItem, option, painter, widget)
+
+        parts = self._layout(option.rect, quest)
+        colors = self.colors
+        color = quest_theme.type_color(quest["type"])
+        text_color = colors.text
+        flags_wrap = Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop | Qt.TextFlag.TextWordWrap
+        centered = Qt.AlignmentFlag.AlignCenter
+
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        painter.setFont(self.glyph_font)
+        painter.setPen(text_color)
+        painter.drawText(parts["pin"], centered, "📌" if quest.get("is_pinned", False) else "📍")
+
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(color)
+        painter.drawRoundedRect(parts["icon"], 8, 8)
+        painter.setPen(self.colors.on_accent)
+        painter.drawText(parts["icon"], centered, quest.get("icon", "🎮"))
+
+        painter.setFont(self.title_font)
+        painter.setPen(text_color)
+        painter.drawText(parts["title"], flags_wrap, quest["title"])
+        if quest.get("desc"):
+            painter.setFont(self.desc_font)
+            painter.setPen(colors.muted)
+            painter.drawText(parts["desc"], flags_wrap, quest["desc"])
+
+        painter.setFont(self.xp_font)
+        painter.setPen(color)
+        painter.drawText(parts["xp"], centered, f"{quest['xp']} XP")
+
+        if parts["progress"] is not None:
+            self._paint_progress(painter, parts["progress"], quest, color)
+
+        self._paint_button(painter, option, parts["button"], quest)
+        painter.restore()
+
+    def _paint_progress(self, painter, rect, quest, color):
+        target = quest["target_value"]
+        current = quest["current_value"]
+        pct = int(current / target * 100) if target else 0
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(self.colors.track)
+        painter.drawRoundedRect(rect, 4, 4)
+        if pct > 0:
+            chunk = QRect(rect)
+            chunk.setWidth(int(rect.width() * min(pct, 100) / 100))
+            painter.setBrush(color)
+            painter.drawRoundedRect(chunk, 4, 4)
+        painter.setFont(self.desc_font)
+        painter.setPen(self.colors.track_text)
+        painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, f"{pct}% ({current}/{target})")
+
+    def _paint_button(self, painter, option, rect, quest):
+        painter.setFont(self.button_font)
+        painter.setPen(Qt.PenStyle.NoPen)
+        if self._is_done(quest):
+            painter.setBrush(self.colors.track)
+            painter.drawRect(rect)
+            painter.setPen(self.colors.muted)
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, "✅ Выполнено")
+            return
+        hovered = False
+        if option.state & QStyle.StateFlag.State_MouseOver and option.widget is not None:
+            cursor = option.widget.viewport().mapFromGlobal(QCursor.pos())
+            hovered = rect.contains(cursor)
+        painter.setBrush(self.colors.accent_hover if hovered else self.colors.accent)
+        painter.drawRoundedRect(rect, 8, 8)
+        painter.setPen(self.colors.on_accent)
+        painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, "✅ Выполнить")
+
+    def hit_test(self, rect, quest, pos):
+        """Возвращает "pin", "button" или None для точки внутри карточки."""
+        parts = self._layout(rect, quest)
+        if parts["pin"].contains(pos):
+            return "pin"
+        if parts["button"].contains(pos) and not self._is_done(quest):
+            return "button"
+        return None
+
+    def editorEvent(self, event, model, option, index):
+        event_type = event.type()
+        if event_type in (QEvent.Type.MouseButtonPress, QEvent.Type.MouseButtonRelease,
+                          QEvent.Type.MouseButtonDblClick):
+            if event.button() != Qt.MouseButton.LeftButton:
+                return super().editorEvent(event, model, option, index)
+            quest = index.data(QUEST_ROLE)
+            part = self.hit_test(option.rect, quest, event.position().toPoint())
+            if part is None:
+                return super().editorEvent(event, model, option, index)
+            if event_type == QEvent.Type.MouseButtonRelease:
+                if part == "pin":
+                    self.pinClicked.emit(quest)
+                else:
+                    self.completeClicked.emit(quest)
+            return True
+        if event_type == QEvent.Type.MouseMove and option.widget is not None:
+            # Перерисовываем строку, чтобы кнопка подсвечивалась под курсором.
+            option.widget.viewport().update(option.rect)
+        return super().editorEvent(event, model, option, index)
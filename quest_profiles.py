@@ -0,0 +1,179 @@
+import json
+import os
+from collections import OrderedDict
+from datetime import date, timedelta
+
+import quest_data
+from quest_journal import write_atomic
+
+DEFAULT_PROFILE = "default"
+# Профиль по умолчанию хранится, как и раньше, в папке программы, остальные — в PROFILES_DIR/<имя>.
+PROFILES_DIR = "profiles"
+# Итоги профилей для общей сводки и имя последнего открытого профиля.
+PROFILES_FILE = "profiles.json"
+# Сколько недавно открытых профилей держать загруженными.
+PROFILE_CACHE_SIZE = 3
+# За сколько последних дней хранится число выполнений (сводка за неделю — 8 дней, как в QuestStats).
+SUMMARY_DAYS = 8
+
+
+def recent_days(completions, today=None):
+    """Число выполнений по дням за последние SUMMARY_DAYS дней."""
+    today = today or date.today()
+    since = str(today - timedelta(days=SUMMARY_DAYS - 1))
+    days = {}
+    # Недавняя история — в горячей части; архив уносит только старые месяцы.
+    for completed in completions:
+        day = completed.get("date")
+        if day and day >= since:
+            days[day] = days.get(day, 0) + 1
+    return days
+
+
+def profile_summary(data, today=None, days=None):
+    """Итоги одного профиля для общей сводки: уровень, XP, активные задачи и выполнения по дням.
+
+    days — уже посчитанные recent_days, чтобы не проходить историю заново.
+    """
+    if days is None:
+        days = recent_days(data["completed_quests"], today)
+    return {"level": data["level"], "xp": data["xp"], "active": len(data["quests"]), "days": days}
+
+
+class ProfileManager:
+    """Именованные профили, у каждого — своё хранилище в отдельной папке.
+
+    Активный профиль задаётся путями quest_data (set_data_dir). Недавно открытые
+    профили остаются загруженными в LRU-кэше на PROFILE_CACHE_SIZE записей, поэтому
+    возврат к ним не требует разбора и миграции файла; если файлы профиля за это
+    время изменились со стороны, он загружается заново. Итоги профилей хранятся
+    в PROFILES_FILE, и общая сводка строится по ним, без загрузки всех профилей.
+    """
+
+    def __init__(self, capacity=PROFILE_CACHE_SIZE):
+        self.capacity = capacity
+        self.active = None
+        self._cache = OrderedDict()  # имя -> [данные, отпечаток файлов при уходе с профиля]
+        self._days = None  # (ключ, recent_days) активного профиля, см. _active_days
+        self.index = self._read_index()
+
+    def _read_index(self):
+        if os.path.exists(PROFILES_FILE):
+            with open(PROFILES_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return {"last": DEFAULT_PROFILE, "profiles": {}}
+
+    def _write_index(self):
+        write_atomic(PROFILES_FILE, json.dumps(self.index, indent=4, ensure_ascii=False))
+
+    @property
+    def last(self):
+        name = self.index.get("last", DEFAULT_PROFILE)
+        return name if name in self.names() else DEFAULT_PROFILE
+
+    def names(self):
+        names = [DEFAULT_PROFILE]
+        if os.path.isdir(PROFILES_DIR):
+            names += sorted(n for n in os.listdir(PROFILES_DIR) if os.path.isdir(os.path.join(PROFILES_DIR, n)))
+        return names
+
+    def directory(self, name):
+        return "" if name == DEFAULT_PROFILE else os.path.join(PROFILES_DIR, name)
+
+    def create(self, name):
+        """Создаёт пустой профиль. Имя — непустое и без разделителей пути."""
+        name = name.strip()
+        if not name or name.startswith(".") or any(c in name for c in "/\\:") or name in self.names():
+            raise ValueError(f"Недопустимое или занятое имя профиля: {name!r}")
+        os.makedirs(self.directory(name))
+        return name
+
+    def open(self, name):
+        """Делает профиль активным и возвращает его данные (из кэша, если он свежий)."""
+        if name not in self.names():
+            raise ValueError(f"Нет профиля {name!r}")
+        if name == self.active:
+            return self._cache[name][0]
+        if self.active is not None:
+            self._leave()
+        entry = self._cache.pop(name, None)
+        self._evict(keep=self.capacity - 1)
+
+        quest_data.set_data_dir(self.directory(name))
+        if entry is not None and entry[1] == quest_data.store_fingerprint():
+            data = quest_data.restore_daily_quests(entry[0])
+        else:
+            data = quest_data.load_data()
+        self._cache[name] = [data, None]
+        self.active = name
+        self._days = None
+        self.index["last"] = name
+        self._remember(name, data)
+        return data
+
+    def _leave(self):
+        # Фоновая запись должна закончиться до смены путей: она пишет по текущим.
+        entry = self._cache[self.active]
+        quest_data.flush_data()
+        entry[1] = quest_data.store_fingerprint()
+        self._remember(self.active, entry[0])
+        self.active = None
+
+    def _evict(self, keep):
+        while len(self._cache) > keep:
+            name, (data, _) = self._cache.popitem(last=False)
+            quest_data.set_data_dir(self.directory(name))
+            quest_data.close_data(data)
+
+    def _remember(self, name, data):
+        days = self._active_days(date.today()) if name == self.active else None
+        self.index.setdefault("profiles", {})[name] = profile_summary(data, days=days)
+        self._write_index()
+
+    def _active_days(self, today):
+        """recent_days активного профиля; история проходится заново, только если она изменилась.
+
+        Ключ — отпечаток файлов хранилища и сам список выполнений в памяти (он только
+        дополняется, а при перезагрузке заменяется), а также день, от которого считается сводка.
+        """
+        completions = self._cache[self.active][0]["completed_quests"]
+        key = (quest_data.store_fingerprint(), id(completions), len(completions), str(today))
+        if self._days is None or self._days[0] != key:
+            self._days = (key, recent_days(completions, today))
+        return self._days[1]
+
+    def set_data(self, data):
+        """Заменяет данные активного профиля (после импорта или сброса)."""
+        self._cache[self.active][0] = data
+
+    def close(self):
+        """Сохраняет итоги и закрывает все загруженные профили."""
+        if self.active is not None:
+            self._leave()
+        self._evict(keep=0)
+
+    def summary(self, today=None):
+        """Сводка по всем профилям: {"profiles", "max_level", "xp", "active", "week", "by_profile"}.
+
+        Неактивные профили берутся из сохранённых итогов, активный — из данных в памяти.
+        """
+        today = today or date.today()
+        since = str(today - timedelta(days=SUMMARY_DAYS - 1))
+        infos = dict(self.index.get("profiles", {}))
+        if self.active is not None:
+            infos[self.active] = profile_summary(self._cache[self.active][0], days=self._active_days(today))
+        by_profile = {}
+        for name in self.names():
+            info = infos.get(name)
+            if info is None:
+                continue
+            week = sum(n for day, n in info["days"].items() if day >= since)
+            by_profile[name] = {"level": info["level"], "xp": info["xp"], "active": info["active"], "week": week}
+        return {
+            "profiles": len(by_profile),
+            "max_level": max((p["level"] for p in by_profile.values()), default=1),
+            "xp": sum(p["xp"] for p in by_profile.values()),
+            "active": sum(p["active"] for p in by_profile.values()),
+            "week": sum(p["week"] for p in by_profile.values()),
+            "by_profile": by_profile,
+        }
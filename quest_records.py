@@ -0,0 +1,221 @@
+import gc
+import sys
+
+# Реестр типов задач: код типа — его номер в TASK_TYPES (quest_data регистрирует
+# их при импорте), незнакомые типы из файла получают следующие свободные коды.
+TYPE_NAMES = []
+TYPE_CODES = {}
+_TYPE_NAME = {}
+
+# Значение незаданного поля: такого ключа у записи нет.
+_MISSING = object()
+
+_intern = sys.intern
+
+
+def type_code(name):
+    code = TYPE_CODES.get(name)
+    if code is None:
+        code = TYPE_CODES[name] = len(TYPE_NAMES)
+        TYPE_NAMES.append(_intern(name))
+        _TYPE_NAME[name] = TYPE_NAMES[code]
+    return code
+
+
+def register_types(names):
+    for name in names:
+        type_code(name)
+
+
+def _normalize(key, value):
+    if value.__class__ is not str:
+        return value
+    if key == "type":
+        return TYPE_NAMES[type_code(value)]
+    if key in ("id", "title", "icon", "date"):
+        return _intern(value)
+    return value
+
+
+class Quest:
+    """Задача с полями в __slots__ вместо словаря.
+
+    Создаётся из словаря как Quest(**fields) и поддерживает доступ как к словарю
+    (quest["title"], get, setdefault, pop, copy), поэтому интерфейс и редактор
+    работают с ней как раньше. Отсутствующие ключи так и остаются отсутствующими,
+    а незнакомые хранятся в extra, поэтому to_dict() возвращает ровно прочитанные данные. Тип хранится общей строкой
+    из реестра типов, повторяющиеся строки (id, название, значок, дата) интернируются.
+    """
+
+    FIELDS = ("id", "title", "desc", "icon", "type", "xp", "is_cumulative",
+              "target_value", "current_value", "completed_today", "is_pinned", "date", "updated_at")
+    __slots__ = FIELDS + ("extra",)
+    _KEYS = frozenset(FIELDS)
+
+    def __init__(self, id=_MISSING, title=_MISSING, desc=_MISSING, icon=_MISSING, type=_MISSING,
+                xp=_MISSING, is_cumulative=_MISSING, target_value=_MISSING, current_value=_MISSING,
+                completed_today=_MISSING, is_pinned=_MISSING, date=_MISSING, updated_at=_MISSING, **extra):
+        # Поля присваиваются явно: так разбор большой истории заметно быстрее цикла по ключам.
+        self.id = _intern(id) if id.__class__ is str else id
+        self.title = _intern(title) if title.__class__ is str else title
+        self.desc = desc
+        self.icon = _intern(icon) if icon.__class__ is str else icon
+        name = _TYPE_NAME.get(type)
+        self.type = name if name is not None else _normalize("type", type)
+        self.xp = xp
+        self.is_cumulative = is_cumulative
+        self.target_value = target_value
+        self.current_value = current_value
+        self.completed_today = completed_today
+        self.is_pinned = is_pinned
+        self.date = _intern(date) if date.__class__ is str else date
+        self.updated_at = updated_at
+        self.extra = extra or None
+
+    @classmethod
+    def from_list(cls, records):
+        """Разбирает список словарей из файла.
+
+        Сборщик мусора на это время отключается: иначе он многократно обходит
+        весь только что прочитанный файл, пока создаются новые объекты.
+        """
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return [cls(**fields) for fields in records]
+        finally:
+            if enabled:
+                gc.enable()
+
+    @property
+    def type_code(self):
+        return TYPE_CODES[self.type]
+
+    def __getitem__(self, key):
+        if key in self._KEYS:
+            value = getattr(self, key)
+            if value is _MISSING:
+                raise KeyError(key)
+            return value
+        if self.extra is None or key not in self.extra:
+            raise KeyError(key)
+        return self.extra[key]
+
+    def __setitem__(self, key, value):
+        if key in self._KEYS:
+            setattr(self, key, _normalize(key, value))
+        elif self.extra is None:
+            self.extra = {key: value}
+        else:
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        if key in self._KEYS:
+            setattr(self, key, _MISSING)
+        else:
+            del self.extra[key]
+            if not self.extra:
+                self.extra = None
+
+    def __contains__(self, key):
+        if key in self._KEYS:
+            return getattr(self, key) is not _MISSING
+        return self.extra is not None and key in self.extra
+
+    def get(self, key, default=None):
+        if key in self._KEYS:
+            value = getattr(self, key)
+            return default if value is _MISSING else value
+        return default if self.extra is None else self.extra.get(key, default)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *default):
+        if key not in self:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        value = self[key]
+        del self[key]
+        return value
+
+    def update(self, fields):
+        for key, value in fields.items():
+            self[key] = value
+
+    def keys(self):
+        keys = [key for key in self.FIELDS if getattr(self, key) is not _MISSING]
+        if self.extra:
+            keys.extend(self.extra)
+        return keys
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def to_dict(self):
+        # Прямо по слотам, без keys()/__getitem__: так сериализуются снимки и выгрузки.
+        fields = {}
+        for key in self.FIELDS:
+            value = getattr(self, key)
+            if value is not _MISSING:
+                fields[key] = value
+        if self.extra:
+            fields.update(self.extra)
+        return fields
+
+    def copy(self):
+        return type(self)(**self)
+
+    def __eq__(self, other):
+        if isinstance(other, (Quest, dict)):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Completion(Quest):
+    """Запись истории: копия задачи на момент выполнения с датой."""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_quest(cls, quest, date):
+        completed = cls(**quest)
+        completed["date"] = date
+        return completed
+
+    def to_quest(self):
+        """Задача, снова становящаяся активной (например, ежедневная после сброса)."""
+        quest = Quest(**self)
+        quest.date = _MISSING
+        return quest
+
+
+def as_quest(quest):
+    """Приводит словарь (например, из редактора) к Quest; Quest возвращается как есть."""
+    return quest if isinstance(quest, Quest) else Quest(**quest)
+
+
+def to_json(obj):
+    """default= для json/orjson: записи сериализуются обычными объектами JSON."""
+    if isinstance(obj, Quest):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
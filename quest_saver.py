@@ -0,0 +1,95 @@
+import threading
+import time
+
+
+class WriteBehindSaver:
+    """Фоновое сохранение: изменения помечают данные «грязными», а поток
+    записывает их не чаще раза в delay секунд, объединяя серии правок в одну запись.
+
+    on_error(текст или None) вызывается из потока записи, когда запись перестала
+    или снова начала удаваться.
+    """
+
+    def __init__(self, write, delay=0.5, on_error=None):
+        self._write = write
+        self.delay = delay
+        self.on_error = on_error
+        self._cond = threading.Condition()
+        self._data = None
+        self._dirty = False
+        self._writing = False
+        self._flushing = 0
+        self._thread = None
+        self.requests = 0
+        self.writes = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+        self.last_error = None
+
+    def mark_dirty(self, data):
+        """Ставит данные в очередь на запись и сразу возвращает управление."""
+        with self._cond:
+            self._data = data
+            self._dirty = True
+            self.requests += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def flush(self):
+        """Барьер: ждёт, пока все поставленные в очередь изменения окажутся на диске."""
+        with self._cond:
+            self._flushing += 1
+            self._cond.notify_all()
+            while self._dirty or self._writing:
+                self._cond.wait()
+            self._flushing -= 1
+
+    def stats(self):
+        """Сводка для сравнения: сколько сохранений запрошено и сколько реально записано."""
+        with self._cond:
+            return {
+                "requests": self.requests,
+                "writes": self.writes,
+                "coalesced": self.requests - self.writes,
+                "last_latency_ms": round(self.last_latency * 1000, 3),
+                "max_latency_ms": round(self.max_latency * 1000, 3),
+                "avg_latency_ms": round(self.total_latency / self.writes * 1000, 3) if self.writes else 0.0,
+                "last_error": self.last_error,
+            }
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._dirty:
+                    self._cond.wait()
+                # Даём серии быстрых правок собраться в одну запись.
+                deadline = time.monotonic() + self.delay
+                while not self._flushing:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                data = self._data
+                self._dirty = False
+                self._writing = True
+            started = time.perf_counter()
+            try:
+                self._write(data)
+                error = None
+            except Exception as e:
+                error = str(e)
+            elapsed = time.perf_counter() - started
+            with self._cond:
+                changed = error != self.last_error
+                self._writing = False
+                self.writes += 1
+                self.last_error = error
+                self.last_latency = elapsed
+                self.max_latency = max(self.max_latency, elapsed)
+                self.total_latency += elapsed
+                self._cond.notify_all()
+            if changed and self.on_error is not None:
+                self.on_error(error)
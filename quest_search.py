@@ -0,0 +1,128 @@
+from collections import defaultdict
+
+from quest_trace import traced
+
+NGRAM = 3
+
+# Ранги результатов: чем меньше, тем выше в списке.
+RANK_TITLE_PREFIX = 0
+RANK_TITLE = 1
+RANK_DESC = 2
+
+
+def normalize(text):
+    """Приводит текст к виду для поиска: casefold и ё → е."""
+    return text.casefold().replace("ё", "е")
+
+
+def _ngrams(text):
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+def _intersect(index, grams):
+    postings = sorted((index.get(g, ()) for g in grams), key=len)
+    result = set(postings[0])
+    for ids in postings[1:]:
+        if not result:
+            break
+        result &= ids
+    return result
+
+
+class QuestSearchIndex:
+    """Индекс триграмм по названию и описанию задач.
+
+    Текст нормализуется один раз при индексации; поиск сводится к пересечению
+    множеств id по триграммам запроса. Короткие (до трёх символов) запросы
+    проверяются перебором уже нормализованных строк.
+    """
+
+    def __init__(self, quests=()):
+        self._titles = {}
+        self._descs = {}
+        self._title_grams = defaultdict(set)
+        self._desc_grams = defaultdict(set)
+        self._title_starts = defaultdict(set)
+        self.rebuild(quests)
+
+    @traced("search_index.rebuild")
+    def rebuild(self, quests):
+        for table in (self._titles, self._descs, self._title_grams, self._desc_grams, self._title_starts):
+            table.clear()
+        for quest in quests:
+            self.add(quest)
+
+    def add(self, quest):
+        quest_id = quest["id"]
+        title = normalize(quest["title"])
+        desc = normalize(quest.get("desc", ""))
+        if self._titles.get(quest_id) == title and self._descs.get(quest_id) == desc:
+            return
+        self.remove(quest_id)
+        self._titles[quest_id] = title
+        self._descs[quest_id] = desc
+        for gram in _ngrams(title):
+            self._title_grams[gram].add(quest_id)
+        for gram in _ngrams(desc):
+            self._desc_grams[gram].add(quest_id)
+        self._title_starts[title[:NGRAM]].add(quest_id)
+
+    update = add
+
+    def remove(self, quest_id):
+        title = self._titles.pop(quest_id, None)
+        if title is None:
+            return
+        desc = self._descs.pop(quest_id)
+        _discard(self._title_grams, _ngrams(title), quest_id)
+        _discard(self._desc_grams, _ngrams(desc), quest_id)
+        _discard(self._title_starts, (title[:NGRAM],), quest_id)
+
+    @traced("search")
+    def search(self, query):
+        """Возвращает {id: ранг} подходящих задач или None для пустого запроса."""
+        text = normalize(query.strip())
+        if not text:
+            return None
+        if len(text) < NGRAM:
+            titles = {i for i, t in self._titles.items() if text in t}
+            descs = {i for i, d in self._descs.items() if text in d}
+            starts = {i for i in titles if self._titles[i].startswith(text)}
+        elif len(text) == NGRAM:
+            # Запрос сам является триграммой — списки id уже точные.
+            titles = self._title_grams.get(text, set())
+            descs = self._desc_grams.get(text, set())
+            starts = self._title_starts.get(text, set())
+        else:
+            grams = _ngrams(text)
+            titles = {i for i in _intersect(self._title_grams, grams) if text in self._titles[i]}
+            descs = {i for i in _intersect(self._desc_grams, grams) if text in self._descs[i]}
+            starts = {i for i in self._title_starts.get(text[:NGRAM], ()) if i in titles
+                      and self._titles[i].startswith(text)}
+        ranks = dict.fromkeys(descs, RANK_DESC)
+        ranks.update(dict.fromkeys(titles, RANK_TITLE))
+        ranks.update(dict.fromkeys(starts, RANK_TITLE_PREFIX))
+        return ranks
+
+    def rank(self, query, quest_id):
+        """Ранг одной задачи для запроса или None, если она не подходит."""
+        text = normalize(query.strip())
+        title = self._titles.get(quest_id)
+        if not text or title is None:
+            return None
+        if title.startswith(text):
+            return RANK_TITLE_PREFIX
+        if text in title:
+            return RANK_TITLE
+        if text in self._descs[quest_id]:
+            return RANK_DESC
+        return None
+
+
+def _discard(index, grams, quest_id):
+    for gram in grams:
+        ids = index.get(gram)
+        if ids is not None:
+            ids.discard(quest_id)
+            if not ids:
+                del index[gram]
@@ -0,0 +1,261 @@
+import json
+import sqlite3
+from collections import Counter
+from quest_data import DAILY_TYPES
+from quest_records import to_json
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quests (
+    id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    is_pinned INTEGER NOT NULL DEFAULT 0,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS completions (
+    rowid INTEGER PRIMARY KEY,
+    quest_id TEXT NOT NULL,
+    date TEXT,
+    type TEXT NOT NULL,
+    xp INTEGER NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS profile (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_quests_type ON quests(type);
+CREATE INDEX IF NOT EXISTS idx_quests_pinned ON quests(is_pinned);
+CREATE INDEX IF NOT EXISTS idx_quests_position ON quests(position);
+CREATE INDEX IF NOT EXISTS idx_completions_quest ON completions(quest_id);
+CREATE INDEX IF NOT EXISTS idx_completions_date ON completions(date);
+CREATE INDEX IF NOT EXISTS idx_completions_type ON completions(type);
+"""
+
+LIST_KEYS = ("quests", "completed_quests")
+# Горячее окно истории: выполнения с даты hot_since и без даты.
+HOT_WINDOW = "(date IS NULL OR date >= ?)"
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, default=to_json)
+
+
+def _in_window(completed, since):
+    day = completed.get("date")
+    return not day or day >= since
+
+
+class SqliteQuestStore:
+    """Хранилище задач в SQLite: одна строка на задачу и на каждое выполнение."""
+
+    def __init__(self, path):
+        self.path = path
+        # Соединением пользуются и фоновые операции (quest_io); обращения из разных
+        # потоков SQLite упорядочивает сам, правки данных идут под data_lock.
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        # Начало горячего окна ("ГГГГ-ММ", задаёт quest_data.load_data): в память загружаются
+        # только выполнения с этой даты, более старые читаются из базы по запросу.
+        self.hot_since = ""
+
+    def load(self):
+        """Собирает данные в том же виде, что и quests.json, с историей только горячего окна."""
+        data = self.profile()
+        data["quests"] = list(self.iter_quests())
+        data["completed_quests"] = [
+            json.loads(payload)
+            for (payload,) in self.conn.execute(
+                f"SELECT payload FROM completions WHERE {HOT_WINDOW} ORDER BY rowid", (self.hot_since,)
+            )
+        ]
+        return data
+
+    def profile(self):
+        """Настройки профиля (всё, кроме задач и истории)."""
+        return {key: json.loads(value) for key, value in self.conn.execute("SELECT key, value FROM profile")}
+
+    def iter_quests(self):
+        for (payload,) in self.conn.execute("SELECT payload FROM quests ORDER BY position"):
+            yield json.loads(payload)
+
+    def save(self, data, since=None):
+        """Перезаписывает базу содержимым data.
+
+        С since история перезаписывается только в горячем окне с этой даты: в data
+        лежит лишь оно, а более старые выполнения остаются в базе как есть.
+        """
+        completions = data["completed_quests"]
+        with self.conn:
+            self.conn.execute("DELETE FROM quests")
+            if since is None:
+                self.conn.execute("DELETE FROM completions")
+            else:
+                self.conn.execute(f"DELETE FROM completions WHERE {HOT_WINDOW}", (since,))
+                completions = (c for c in completions if _in_window(c, since))
+            self.conn.execute("DELETE FROM profile")
+            self.conn.executemany(
+                "INSERT INTO quests (id, position, type, is_pinned, payload) VALUES (?, ?, ?, ?, ?)",
+                (
+                    (q["id"], i, q["type"], int(q.get("is_pinned", False)), _dumps(q))
+                    for i, q in enumerate(data["quests"])
+                )
+            )
+            self.conn.executemany(
+                "INSERT INTO completions (quest_id, date, type, xp, payload) VALUES (?, ?, ?, ?, ?)",
+                (
+                    (q["id"], q.get("date"), q["type"], q["xp"], _dumps(q))
+                    for q in completions
+                )
+            )
+            self.conn.executemany(
+                "INSERT INTO profile (key, value) VALUES (?, ?)",
+                ((key, _dumps(value)) for key, value in data.items() if key not in LIST_KEYS)
+            )
+
+    def apply(self, data, op, **fields):
+        """Применяет одно изменение точечными запросами (та же схема записей, что и в журнале).
+
+        Пакет ("batch") применяется в одной транзакции.
+        """
+        with self.conn:
+            if op == "batch":
+                active = {q["id"]: q for q in data["quests"]}
+                for record in fields["records"]:
+                    self._apply(data, record["op"], record, active)
+            else:
+                self._apply(data, op, fields)
+
+    def _apply(self, data, op, fields, active=None):
+        if op == "put_quest":
+            self._put_quest(fields["quest"])
+        elif op == "delete_quest":
+            self.conn.execute("DELETE FROM quests WHERE id = ?", (fields["id"],))
+        elif op == "complete":
+            completed = fields["quest"]
+            self._add_completion(completed)
+            if active is None:
+                quest = next((q for q in data["quests"] if q["id"] == completed["id"]), None)
+            else:
+                quest = active.get(completed["id"])
+            if quest is not None:
+                self._put_quest(quest)
+            else:
+                self.conn.execute("DELETE FROM quests WHERE id = ?", (completed["id"],))
+            self._set("xp", data["xp"])
+            self._set("level", data["level"])
+        elif op == "merge_completions":
+            for completed in fields["quests"]:
+                self._add_completion(completed)
+            self._set("xp", data["xp"])
+            self._set("level", data["level"])
+        elif op == "set":
+            self._set(fields["key"], fields["value"])
+        elif op == "daily_reset":
+            ids = set(fields["ids"]) if "ids" in fields else None
+            for q in data["quests"]:
+                if q["type"] in DAILY_TYPES and (ids is None or q["id"] in ids):
+                    self._put_quest(q)
+            self._set("daily_reset", fields["date"])
+
+    def _put_quest(self, quest):
+        row = (quest["type"], int(quest.get("is_pinned", False)), _dumps(quest), quest["id"])
+        updated = self.conn.execute("UPDATE quests SET type = ?, is_pinned = ?, payload = ? WHERE id = ?", row)
+        if updated.rowcount == 0:
+            # Новая задача встаёт в конец списка; MAX(position) берётся по индексу.
+            self.conn.execute(
+                """
+                INSERT INTO quests (type, is_pinned, payload, id, position)
+                VALUES (?, ?, ?, ?, (SELECT COALESCE(MAX(position), -1) + 1 FROM quests))
+                """,
+                row
+            )
+
+    def _add_completion(self, completed):
+        self.conn.execute(
+            "INSERT INTO completions (quest_id, date, type, xp, payload) VALUES (?, ?, ?, ?, ?)",
+            (completed["id"], completed.get("date"), completed["type"], completed["xp"], _dumps(completed))
+        )
+
+    def _set(self, key, value):
+        self.conn.execute(
+            "INSERT INTO profile (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, _dumps(value))
+        )
+
+    def get_quest(self, quest_id):
+        row = self.conn.execute("SELECT payload FROM quests WHERE id = ?", (quest_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def quests_by_type(self, quest_type):
+        return [
+            json.loads(payload)
+            for (payload,) in self.conn.execute(
+                "SELECT payload FROM quests WHERE type = ? ORDER BY position", (quest_type,)
+            )
+        ]
+
+    def pinned_quests(self):
+        return [
+            json.loads(payload)
+            for (payload,) in self.conn.execute(
+                "SELECT payload FROM quests WHERE is_pinned = 1 ORDER BY position"
+            )
+        ]
+
+    def iter_completions(self, since=None, until=None, quest_type=None):
+        """Построчно отдаёт выполнения за период, не загружая всю историю в память."""
+        where, params = self._completion_filter(since, until, quest_type)
+        for (payload,) in self.conn.execute(f"SELECT payload FROM completions {where} ORDER BY rowid", params):
+            yield json.loads(payload)
+
+    def completion_counts(self):
+        """Число выполнений по парам (id, дата) — без разбора самих записей."""
+        return Counter(self.conn.execute("SELECT quest_id, date FROM completions"))
+
+    def count_completions(self, since=None, until=None, quest_type=None):
+        where, params = self._completion_filter(since, until, quest_type)
+        return self.conn.execute(f"SELECT COUNT(*) FROM completions {where}", params).fetchone()[0]
+
+    def totals(self, before, top_k=10):
+        """Итоги выполнений с датой раньше before, в виде CompletionArchive.totals.
+
+        Считаются запросами по индексу даты, без разбора самих записей (кроме лучших по XP).
+        """
+        params = (before,)
+        count, xp = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(xp), 0) FROM completions WHERE date < ?", params).fetchone()
+        types = Counter(dict(self.conn.execute(
+            "SELECT type, COUNT(*) FROM completions WHERE date < ? GROUP BY type", params)))
+        days = {day: [n, day_xp] for day, n, day_xp in self.conn.execute(
+            "SELECT date, COUNT(*), SUM(xp) FROM completions WHERE date < ? GROUP BY date", params)}
+        top = [json.loads(payload) for (payload,) in self.conn.execute(
+            "SELECT payload FROM completions WHERE date < ? ORDER BY xp DESC, rowid LIMIT ?", (before, top_k))]
+        return {"count": count, "xp": xp, "types": types, "days": days, "top": top}
+
+    def _completion_filter(self, since, until, quest_type):
+        conditions = []
+        params = []
+        if since is not None:
+            conditions.append("date >= ?")
+            params.append(str(since))
+        if until is not None:
+            conditions.append("date <= ?")
+            params.append(str(until))
+        if quest_type is not None:
+            conditions.append("type = ?")
+            params.append(quest_type)
+        where = "WHERE " + " AND ".join(conditions) if conditions else ""
+        return where, params
+
+    def clear(self):
+        self.save({"quests": [], "completed_quests": []})
+
+    def close(self):
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    from quest_data import migrate_to_sqlite
+    migrate_to_sqlite()
@@ -0,0 +1,169 @@
+import heapq
+from collections import Counter
+from datetime import date, timedelta
+from itertools import count
+
+from quest_data import DAILY_TYPES, archived_totals
+from quest_trace import traced
+
+
+class QuestStats:
+    """Счётчики для вкладки «Статистика», обновляемые по событиям quest_data.
+
+    Хранит число созданных и завершённых задач по типам, выполнения по дням
+    и ограниченную кучу лучших выполнений по XP, чтобы не пересчитывать
+    всё по спискам при каждом обновлении. История вне памяти учитывается
+    по итогам (quest_data.archived_totals), без чтения самих записей.
+
+    Если установлен NumPy, self.columns — колоночная копия всей истории
+    (quest_columns.CompletionColumns), и выполнения по типам и периодам
+    считаются по ней векторно; иначе None, и они берутся из счётчиков.
+    Копия открывается или строится при первом таком запросе, а не при
+    перестроении счётчиков. С columns=False она не строится вовсе и NumPy
+    не импортируется.
+    """
+
+    def __init__(self, data, top_k=10, columns=True):
+        self.top_k = top_k
+        self.use_columns = columns
+        self.rebuild(data)
+
+    @traced("stats.rebuild")
+    def rebuild(self, data):
+        self.data = data
+        self.created = Counter()
+        self.finished = Counter()
+        self.per_day = Counter()
+        self.xp_per_day = Counter()
+        self._active_types = {}
+        self._top = []
+        self._seq = count()
+        self._add_archived(archived_totals())
+        for quest in data["quests"]:
+            self._active_types[quest["id"]] = quest["type"]
+            self.created[quest["type"]] += 1
+        for completed in data["completed_quests"]:
+            self._add_completion(completed)
+        self._columns = None
+        self._columns_loaded = False
+
+    @property
+    def columns(self):
+        if self.use_columns and not self._columns_loaded:
+            from quest_columns import load_columns
+            self._columns = load_columns(self.data)
+            self._columns_loaded = True
+        return self._columns
+
+    def apply(self, event, obj):
+        """Учитывает одно событие из quest_data.subscribe."""
+        if event == "added":
+            self._active_types[obj["id"]] = obj["type"]
+            self.created[obj["type"]] += 1
+        elif event == "removed":
+            quest_type = self._active_types.pop(obj["id"], None)
+            if quest_type is not None:
+                self.created[quest_type] -= 1
+        elif event == "updated":
+            old_type = self._active_types.get(obj["id"])
+            if old_type is None:
+                self.created[obj["type"]] += 1
+            elif old_type != obj["type"]:
+                self.created[old_type] -= 1
+                self.created[obj["type"]] += 1
+            self._active_types[obj["id"]] = obj["type"]
+        elif event == "completed":
+            self._add_completion(obj)
+            # Ещё не открытая копия подхватит выполнение сама: её сверяют с историей при загрузке.
+            if self._columns is not None:
+                self._columns.append(obj)
+        elif event == "reloaded":
+            self.rebuild(obj)
+        elif event == "batch":
+            for sub_event, sub_obj in obj:
+                self.apply(sub_event, sub_obj)
+
+    def save(self):
+        """Сохраняет колоночную копию истории, если она менялась."""
+        if self._columns is not None:
+            from quest_columns import save_columns
+            save_columns(self._columns, self.data)
+
+    def _add_archived(self, totals):
+        self.created.update(totals["types"])
+        self.finished.update(totals["types"])
+        for day, (n, xp) in totals["days"].items():
+            self.per_day[day] += n
+            self.xp_per_day[day] += xp
+        for completed in totals["top"]:
+            self._push_top(completed)
+
+    def _add_completion(self, completed):
+        self.created[completed["type"]] += 1
+        self.finished[completed["type"]] += 1
+        day = completed.get("date")
+        if day:
+            self.per_day[day] += 1
+            self.xp_per_day[day] += completed["xp"]
+        self._push_top(completed)
+
+    def _push_top(self, completed):
+        # Ключ (xp, -порядок): при равном XP выше остаётся более раннее выполнение.
+        entry = (completed["xp"], -next(self._seq), completed)
+        if len(self._top) < self.top_k:
+            heapq.heappush(self._top, entry)
+        elif entry[:2] > self._top[0][:2]:
+            heapq.heapreplace(self._top, entry)
+
+    @property
+    def total(self):
+        return sum(self.created.values())
+
+    @property
+    def done(self):
+        return sum(self.finished.values())
+
+    def finished_by_type(self):
+        """{тип: число выполнений} за всё время."""
+        columns = self.columns
+        return Counter(columns.count_by_type()) if columns is not None else self.finished
+
+    @property
+    def daily_done(self):
+        finished = self.finished_by_type()
+        return sum(finished[t] for t in DAILY_TYPES)
+
+    def type_stats(self, types):
+        """{тип: (создано, завершено)} в порядке types."""
+        finished = self.finished_by_type()
+        return {t: (self.created[t], finished[t]) for t in types}
+
+    def top(self, n=3):
+        return [entry[2] for entry in sorted(self._top, key=lambda e: e[:2], reverse=True)[:n]]
+
+    def completed_since(self, days, today=None):
+        """Число выполнений за последние days дней (включая сегодня и день days назад)."""
+        today = today or date.today()
+        if self.columns is not None:
+            return self.columns.count(today - timedelta(days=days), today)
+        return sum(self.per_day[str(today - timedelta(days=i))] for i in range(days + 1))
+
+    def xp_this_period(self, period="month", today=None):
+        """XP с первого дня текущего периода ("day", "week" — с понедельника, "month") по сегодня."""
+        today = today or date.today()
+        if period == "week":
+            start = today - timedelta(days=today.weekday())
+        elif period == "month":
+            start = today.replace(day=1)
+        else:
+            start = today
+        if self.columns is not None:
+            return sum(self.columns.xp_per_period(period, start, today).values())
+        return sum(self.xp_per_day[str(start + timedelta(days=i))] for i in range((today - start).days + 1))
+
+    def xp_daily_mean(self, window=7, today=None):
+        """Средний XP в день за последние window дней, включая сегодня."""
+        today = today or date.today()
+        if self.columns is not None:
+            return self.columns.xp_rolling_mean(window, today - timedelta(days=window - 1), today).get(today, 0.0)
+        return sum(self.xp_per_day[str(today - timedelta(days=i))] for i in range(window)) / window
@@ -0,0 +1,142 @@
+import json
+import re
+
+# Сколько символов читать из файла за раз.
+CHUNK_SIZE = 1 << 20
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class JsonStreamReader:
+    """Потоковый разбор объекта JSON верхнего уровня без чтения файла целиком.
+
+    Массивы под ключами из array_keys отдаются по одному элементу, поэтому
+    в памяти одновременно лежат только буфер чтения и текущий элемент:
+
+        for key, value in JsonStreamReader(f, ("quests", "completed_quests")):
+            ...  # для "quests" value — одна задача, для остальных ключей — всё значение
+    """
+
+    def __init__(self, f, array_keys=()):
+        self.f = f
+        self.array_keys = frozenset(array_keys)
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self):
+        """Дочитывает следующий кусок файла; False — файл закончился."""
+        if self.eof:
+            return False
+        chunk = self.f.read(CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        # Разобранное начало буфера больше не нужно.
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _peek(self):
+        """Первый значимый символ после пробелов ("" в конце файла)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, chars):
+        char = self._peek()
+        if char not in chars or not char:
+            raise ValueError(f"Ожидался один из {chars!r}, получено {char!r}")
+        self.pos += 1
+        return char
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Значение могло оборваться на границе буфера.
+                if self._fill():
+                    continue
+                raise
+            # Число на самом краю буфера могло прочитаться не полностью.
+            if end == len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def _items(self):
+        self._expect("[")
+        if self._peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self._value()
+            if self._expect(",]") == "]":
+                return
+
+    def __iter__(self):
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        while True:
+            key = self._value()
+            self._expect(":")
+            if key in self.array_keys and self._peek() == "[":
+                for item in self._items():
+                    yield key, item
+            else:
+                yield key, self._value()
+            if self._expect(",}") == "}":
+                return
+
+
+# Построчная выгрузка (NDJSON): {"profile": {...}}, затем {"quest": {...}} и {"completion": {...}}.
+NDJSON_KINDS = {"quests": "quest", "completed_quests": "completion"}
+_NDJSON_LISTS = {kind: key for key, kind in NDJSON_KINDS.items()}
+
+
+def iter_ndjson(f):
+    """Читает построчную выгрузку теми же парами (ключ, значение), что и JsonStreamReader."""
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        for kind, value in record.items():
+            if kind == "profile":
+                yield from value.items()
+            elif kind in _NDJSON_LISTS:
+                yield _NDJSON_LISTS[kind], value
+
+
+def write_json(f, profile, lists, dump):
+    """Пишет объект данных потоково: настройки profile, затем списки lists ((ключ, итератор), ...).
+
+    dump(obj) -> str сериализует одно значение; каждый элемент списка — на своей строке.
+    """
+    f.write("{" + ",".join(f"{dump(key)}:{dump(value)}" for key, value in profile.items()))
+    list_separator = "," if profile else ""
+    for key, items in lists:
+        f.write(f"{list_separator}\n{dump(key)}:[")
+        list_separator = ","
+        separator = "\n"
+        for item in items:
+            f.write(separator + dump(item))
+            separator = ",\n"
+        f.write("\n]")
+    f.write("}\n")
+
+
+def write_ndjson(f, profile, lists, dump):
+    """Пишет те же данные построчно (см. NDJSON_KINDS)."""
+    f.write(dump({"profile": profile}) + "\n")
+    for key, items in lists:
+        kind = NDJSON_KINDS[key]
+        for item in items:
+            f.write(dump({kind: item}) + "\n")
@@ -0,0 +1,88 @@
+from functools import lru_cache
+from types import SimpleNamespace
+
+from PyQt6.QtGui import QColor
+from PyQt6.QtWidgets import QApplication
+
+from quest_data import TYPE_COLORS
+
+# Палитры тем: все цвета интерфейса в одном месте.
+PALETTES = {
+    "light": {
+        "window": "#F9FAFB", "surface": "white", "border": "#E5E7EB",
+        "text": "#1F2937", "muted": "#6B7280", "input": "white",
+        "accent": "#4A6CF7", "accent_hover": "#3a5bf5", "on_accent": "white", "bar": "#4A6CF7",
+        "track": "#E5E7EB", "track_text": "#1F2937",
+        "tab": "#F3F4F6", "tab_selected": "white", "danger": "#EF4444",
+    },
+    "dark": {
+        "window": "#111827", "surface": "#1F2937", "border": "#374151",
+        "text": "#E5E7EB", "muted": "#9CA3AF", "input": "#1F2937",
+        "accent": "#4F46E5", "accent_hover": "#4338CA", "on_accent": "white", "bar": "#818CF8",
+        "track": "#374151", "track_text": "#E5E7EB",
+        "tab": "#1F2937", "tab_selected": "#374151", "danger": "#EF4444",
+    },
+}
+
+DEFAULT_TYPE_COLOR = "#4A6CF7"
+
+# Таблица стилей всего приложения. Виджеты выбираются по классу, objectName
+# или динамическому свойству (card, group, role), а не получают свои строки стилей.
+STYLESHEET = """
+QMainWindow, QDialog {{ background: {window}; }}
+QDialog {{ color: {text}; font-family: 'Segoe UI'; }}
+QLabel {{ color: {text}; font-family: 'Segoe UI'; }}
+QLabel[role="muted"] {{ color: {muted}; }}
+QLabel#activeStats {{ color: {muted}; padding: 4px; }}
+QPushButton {{
+    padding: 8px 16px; border-radius: 8px; font-weight: 600;
+    background: {accent}; color: {on_accent}; border: none;
+}}
+QPushButton:hover {{ background: {accent_hover}; }}
+QPushButton[role="danger"] {{ background: {danger}; }}
+QListView {{ border: none; background: transparent; }}
+QComboBox, QSpinBox, QLineEdit, QTextEdit {{
+    padding: 6px; border: 1px solid {border}; border-radius: 6px;
+    background: {input}; color: {text};
+}}
+QProgressBar {{ border: none; border-radius: 6px; background: {track}; }}
+QProgressBar::chunk {{ background: {bar}; border-radius: 6px; }}
+QTabWidget::pane {{ border: 1px solid {border}; border-radius: 12px; }}
+QTabBar::tab {{ padding: 8px 16px; background: {tab}; color: {text}; }}
+QTabBar::tab:selected {{ background: {tab_selected}; }}
+QScrollArea#statsScroll, QWidget#statsContent {{ background-color: {window}; border: none; }}
+QFrame[card="true"] {{
+    background: {surface}; border-radius: 12px; border: 1px solid {border}; padding: 16px;
+}}
+QFrame[group="true"] {{
+    background: {surface}; border: 1px solid {border}; border-radius: 10px; padding: 12px;
+}}
+QFrame[card="true"] QLabel, QFrame[group="true"] QLabel {{ border: none; background: transparent; }}
+"""
+
+
+def palette(theme):
+    return PALETTES.get(theme, PALETTES["light"])
+
+
+@lru_cache(maxsize=None)
+def stylesheet(theme):
+    """Таблица стилей темы; собирается один раз на тему."""
+    return STYLESHEET.format(**palette(theme))
+
+
+@lru_cache(maxsize=None)
+def colors(theme):
+    """Цвета темы как QColor (для рисования строк списка); создаются один раз на тему."""
+    return SimpleNamespace(**{name: QColor(value) for name, value in palette(theme).items()})
+
+
+@lru_cache(maxsize=None)
+def type_color(quest_type):
+    """Цвет типа задачи как QColor, общий для всех строк этого типа."""
+    return QColor(TYPE_COLORS.get(quest_type, DEFAULT_TYPE_COLOR))
+
+
+def apply(theme):
+    """Применяет тему ко всему приложению, включая открытые диалоги."""
+    QApplication.instance().setStyleSheet(stylesheet(theme))
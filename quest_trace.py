@@ -0,0 +1,181 @@
+"""Замеры горячих мест: именованные интервалы, счётчики и гистограммы.
+
+Включается переменной окружения ACHIEVLE_TRACE=1; при выходе отчёт по сессии
+печатается в stderr. Если задан ACHIEVLE_TRACE_CHROME=путь.json, туда же
+пишутся все интервалы в формате Chrome trace-event (chrome://tracing, Perfetto).
+
+Выключенные замеры почти ничего не стоят: span() возвращает общий пустой
+контекст, а @traced оставляет функцию как есть.
+
+    with span("update_display.filter"):
+        ...
+
+    @traced("load_data")
+    def load_data(): ...
+"""
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+ENABLED = os.environ.get("ACHIEVLE_TRACE", "") not in ("", "0")
+CHROME_TRACE_FILE = os.environ.get("ACHIEVLE_TRACE_CHROME") or None
+# Предел событий для Chrome trace: дальше считаются только гистограммы.
+MAX_EVENTS = 200_000
+
+_perf_counter = time.perf_counter
+_lock = threading.Lock()
+_start = _perf_counter()
+_histograms = {}
+_counters = Counter()
+_events = []
+
+
+class Histogram:
+    """Длительности одного интервала: число, сумма, максимум и корзины по степеням двойки (мкс)."""
+
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = Counter()
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[int(seconds * 1e6).bit_length()] += 1
+
+    def percentile(self, p):
+        """Верхняя граница корзины, в которую попадает p-й процентиль (в секундах)."""
+        rank = self.count * p / 100
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(2 ** bucket / 1e6, self.max)
+        return self.max
+
+
+def _record(name, start, end):
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.add(end - start)
+        if CHROME_TRACE_FILE and len(_events) < MAX_EVENTS:
+            _events.append((name, start, end, threading.get_ident()))
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = _perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _record(self.name, self.start, _perf_counter())
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name):
+    """Контекст, замеряющий время блока под именем name."""
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def traced(name=None):
+    """Декоратор: замеряет каждый вызов функции (по умолчанию под её __qualname__)."""
+    def decorate(func):
+        if not ENABLED:
+            return func
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = _perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record(label, start, _perf_counter())
+        return wrapper
+    return decorate
+
+
+def count(name, n=1):
+    """Увеличивает счётчик name."""
+    if ENABLED:
+        with _lock:
+            _counters[name] += n
+
+
+def snapshot():
+    """Копия накопленного: {"spans": {имя: Histogram}, "counters": {имя: число}}."""
+    with _lock:
+        return {"spans": dict(_histograms), "counters": dict(_counters)}
+
+
+def report():
+    """Текстовый отчёт: интервалы по убыванию суммарного времени, затем счётчики."""
+    state = snapshot()
+    lines = [f"Замеры Achievle за {_perf_counter() - _start:.1f} с:",
+             f"  {'интервал':<32} {'вызовов':>8} {'всего, мс':>10} {'среднее':>9} "
+             f"{'p50':>9} {'p95':>9} {'макс':>9}"]
+    spans = sorted(state["spans"].items(), key=lambda item: item[1].total, reverse=True)
+    for name, h in spans:
+        lines.append(f"  {name:<32} {h.count:>8} {h.total * 1000:>10.1f} {h.total / h.count * 1000:>9.2f} "
+                     f"{h.percentile(50) * 1000:>9.2f} {h.percentile(95) * 1000:>9.2f} {h.max * 1000:>9.2f}")
+    if state["counters"]:
+        lines.append("  счётчики:")
+        for name, value in sorted(state["counters"].items()):
+            lines.append(f"    {name:<30} {value:>8}")
+    return "\n".join(lines)
+
+
+def write_chrome_trace(path):
+    """Записывает интервалы в формате Chrome trace-event ("X"-события, время в мкс)."""
+    pid = os.getpid()
+    with _lock:
+        events = [{"name": name, "ph": "X", "pid": pid, "tid": tid,
+                   "ts": round((start - _start) * 1e6, 3), "dur": round((end - start) * 1e6, 3)}
+                  for name, start, end, tid in _events]
+        counters = dict(_counters)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"counters": counters}},
+                  f, ensure_ascii=False)
+
+
+def dump():
+    """Отчёт сессии: текст в stderr и, если задан ACHIEVLE_TRACE_CHROME, файл трассировки."""
+    print(report(), file=sys.stderr)
+    if CHROME_TRACE_FILE:
+        write_chrome_trace(CHROME_TRACE_FILE)
+
+
+if ENABLED:
+    atexit.register(dump)
@@ -1,35 +1,121 @@
+import functools
+
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
-    QListWidget, QListWidgetItem, QProgressBar, QComboBox, QMessageBox, QDialog, QLineEdit,
-    QTabWidget, QFrame, QGridLayout, QScrollArea, QMenu
+    QListView, QProgressBar, QComboBox, QMessageBox, QDialog, QLineEdit,
+    QTabWidget, QFrame, QGridLayout, QScrollArea, QMenu, QInputDialog
 )
-from PyQt6.QtCore import Qt, QSize
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QFont, QIntValidator
 from quest_data import (
-    load_data, save_data, TYPE_COLORS, TASK_TYPES,
-    can_level_up, xp_needed_for_next_level
+    TYPE_COLORS, TASK_TYPES, CATEGORY_MAP,
+    xp_needed_for_next_level, add_quest, update_quest, delete_quest,
+    finish_quest, set_setting, subscribe, unsubscribe, sort_quests,
+    quest_filter, daily_progress, finish_quests, add_progress, set_pinned, delete_quests,
+    sync_external, flush_data, save_data, save_error
 )
-from quest_editor import QuestEditor
-from datetime import datetime, date, timedelta
-from settings_dialog import SettingsDialog
-
-CATEGORY_MAP = {
-    "Все": TASK_TYPES,
-    "Ежедневные задачи": ["Ежедневное задание", "Продвинутое ежедневное задание"],
-    "Задачи": ["Обычное задание", "Умеренное задание", "Задание повышенной сложности"],
-    "Достижения": ["Обычное достижение", "Умеренное достижение", "Продвинутое достижение"],
-    "Испытания": ["Испытание", "Продвинутое испытание"],
-    "Мастерство": ["Мастерство"]
-}
+from quest_daily import DailyResetEngine, msecs_to_midnight
+from quest_io import IoService
+from quest_model import QuestListModel, QuestItemDelegate
+from quest_profiles import ProfileManager
+from quest_search import QuestSearchIndex
+import quest_theme
+from quest_trace import count, span
+from quest_watch import StoreWatcher
+
+
+def store_action(method):
+    """Слот окна, который меняет данные.
+
+    Если хранилище занято другим экземпляром программы дольше LOCK_TIMEOUT, quest_data
+    поднимает TimeoutError, не тронув данные в памяти; вместо падения из слота Qt
+    пользователь видит просьбу повторить.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        try:
+            return method(self, *args)
+        except TimeoutError:
+            self.show_store_busy()
+    return wrapper
+
 class QuestLogUI(QMainWindow):
+    """Главное окно.
+
+    Конструктор только строит виджеты: данные загружает load() (в фоне — start()),
+    а список заполняет populate() — их вызывает main.py после показа окна, чтобы
+    первый кадр появлялся сразу. Загрузка, импорт, выгрузка и смена профиля идут
+    в фоновом потоке IoService, окно при этом отвечает. Изменения файлов другим
+    экземпляром или синхронизацией замечает StoreWatcher, и в список попадают только
+    затронутые строки. Вкладка статистики и её счётчики (QuestStats)
+    создаются при первом открытии вкладки, диалоги импортируются при первом вызове.
+    Данные принадлежат активному профилю; профили переключает ProfileManager.
+    """
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Achievle")
         self.resize(950, 700)
-        self.data = load_data()
+        self.data = None
+        self.profiles = None
+        self.stats = None
+        self.scroll_area = None
+        self._search_ranks = None
+        self._summary_pending = False
+        self._stats_built = False
+        self._stats_dirty = True
+        self.io = IoService(self)
+        self.io.data_event.connect(self.on_data_event)
+        self.watcher = StoreWatcher(self)
+        self.watcher.changed.connect(self.on_store_changed)
         self.init_ui()
         self.apply_styles()
+        self.level_label.setText("Загрузка…")
+        self.centralWidget().setEnabled(False)
+
+        self.daily_timer = QTimer(self)
+        self.daily_timer.setSingleShot(True)
+        self.daily_timer.timeout.connect(self.on_daily_timer)
+
+    @staticmethod
+    def _open_last_profile():
+        # Без виджетов: выполняется и в фоновом потоке.
+        profiles = ProfileManager()
+        data = profiles.open(profiles.last)
+        return profiles, data, QuestSearchIndex(data["quests"]), DailyResetEngine(data)
+
+    def _set_loaded(self, loaded):
+        self.profiles, self.data, self.search_index, self.daily_engine = loaded
+
+    def load(self):
+        """Загружает данные последнего открытого профиля и строит индексы."""
+        self._set_loaded(self._open_last_profile())
+
+    def start(self, on_ready=None):
+        """Загружает данные в фоне и заполняет список, когда они готовы; затем вызывает on_ready()."""
+        def loaded(result):
+            self._set_loaded(result)
+            self.populate()
+            if on_ready is not None:
+                on_ready()
+
+        def failed(error):
+            self.level_label.setText("Ошибка загрузки")
+            QMessageBox.critical(self, "❌ Ошибка", f"Не удалось загрузить данные:\n{error}")
+
+        self.io.run(self._open_last_profile, on_done=loaded, on_error=failed)
+
+    def populate(self):
+        """Заполняет список загруженными данными и включает окно."""
+        if self.get_current_theme() != "light":
+            self.apply_styles()
+        self.refresh_profile_list()
         self.update_display()
+        # События фоновых операций приходят в поток окна через IoService.
+        subscribe(self.io.relay)
+        self.watcher.watch()
+        self.schedule_daily_reset()
+        self.centralWidget().setEnabled(True)
 
     def init_ui(self):
         central = QWidget()
@@ -44,6 +130,10 @@ class QuestLogUI(QMainWindow):
         main_layout.addWidget(title)
 
         status_layout = QHBoxLayout()
+        self.profile_combo = QComboBox()
+        self.profile_combo.setToolTip("Профиль")
+        self.profile_combo.activated.connect(self.on_profile_activated)
+        status_layout.addWidget(self.profile_combo)
         self.level_label = QLabel()
         self.xp_bar = QProgressBar()
         self.xp_bar.setFixedHeight(12)
@@ -56,10 +146,10 @@ class QuestLogUI(QMainWindow):
         self.stats_tab = QWidget()
         self.tabs.addTab(self.active_tab, "Активные задачи")
         self.tabs.addTab(self.stats_tab, "Статистика")
+        self.tabs.currentChanged.connect(self.on_tab_changed)
         main_layout.addWidget(self.tabs)
 
         self.setup_active_tab()
-        self.setup_stats_tab()
 
         settings_btn = QPushButton("⚙️ Настройки")
         settings_btn.clicked.connect(self.open_settings)
@@ -102,264 +192,132 @@ class QuestLogUI(QMainWindow):
 
         self.stats_label = QLabel()
         self.stats_label.setFont(QFont("Segoe UI", 9))
-        self.stats_label.setStyleSheet("color: #6B7280; padding: 4px;")
+        self.stats_label.setObjectName("activeStats")
         sort_layout.addWidget(self.stats_label)
 
-        self.quest_list = QListWidget()
-        self.quest_list.itemDoubleClicked.connect(self.edit_selected_quest)
+        self.quest_model = QuestListModel(self)
+        self.quest_delegate = QuestItemDelegate(self)
+        self.quest_delegate.pinClicked.connect(self.toggle_pin_quest)
+        self.quest_delegate.completeClicked.connect(self.complete_quest)
+
+        self.quest_list = QListView()
+        self.quest_list.setModel(self.quest_model)
+        self.quest_list.setItemDelegate(self.quest_delegate)
+        self.quest_delegate.track(self.quest_model)
+        self.quest_list.setMouseTracking(True)
+        self.quest_list.setSelectionMode(QListView.SelectionMode.ExtendedSelection)
+        self.quest_list.setVerticalScrollMode(QListView.ScrollMode.ScrollPerPixel)
+        # Раскладка порциями: высоты строк считаются по мере прокрутки, а не все сразу.
+        self.quest_list.setLayoutMode(QListView.LayoutMode.Batched)
+        self.quest_list.setBatchSize(200)
+        self.quest_list.doubleClicked.connect(self.edit_selected_quest)
         self.quest_list.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.quest_list.customContextMenuRequested.connect(self.show_context_menu)
         layout.addWidget(self.quest_list)
 
     def setup_stats_tab(self):
+        """Строит содержимое вкладки статистики (при первом её открытии)."""
         layout = QVBoxLayout(self.stats_tab)
         layout.setContentsMargins(0, 0, 0, 0)
 
         self.scroll_area = QScrollArea()
+        self.scroll_area.setObjectName("statsScroll")
         self.scroll_area.setWidgetResizable(True)
         self.scroll_area.setFrameShape(QScrollArea.Shape.NoFrame)
 
         self.scroll_content = QWidget()
+        self.scroll_content.setObjectName("statsContent")
         self.stats_layout = QVBoxLayout(self.scroll_content)
         self.stats_layout.setContentsMargins(24, 24, 24, 24)
         self.stats_layout.setSpacing(16)
 
-        self.apply_stats_theme()
-
         self.scroll_area.setWidget(self.scroll_content)
         layout.addWidget(self.scroll_area)
 
     def apply_styles(self):
-        theme = self.data.get("theme", "light")
-        if theme == "dark":
-            self.setStyleSheet("""
-                QMainWindow { background: #111827; }
-                QLabel { color: #E5E7EB; font-family: 'Segoe UI'; }
-                QPushButton {
-                    padding: 8px 16px; border-radius: 8px; font-weight: 600;
-                    background: #4F46E5; color: white; border: none;
-                }
-                QPushButton:hover { background: #4338CA; }
-                QListWidget { border: none; background: transparent; }
-                QComboBox, QSpinBox, QLineEdit {
-                    padding: 6px; border: 1px solid #374151; border-radius: 6px;
-                    background: #1F2937; color: #E5E7EB;
-                }
-                QProgressBar {
-                    border: none; border-radius: 6px; background: #1F2937;
-                }
-                QProgressBar::chunk { background: #818CF8; border-radius: 6px; }
-                QTabWidget::pane { border: 1px solid #374151; border-radius: 12px; }
-                QTabBar::tab { padding: 8px 16px; background: #1F2937; color: #E5E7EB; }
-                QTabBar::tab:selected { background: #374151; }
-            """)
-        else:
-            self.setStyleSheet("""
-                QMainWindow { background: #F9FAFB; }
-                QLabel { color: #1F2937; font-family: 'Segoe UI'; }
-                QPushButton {
-                    padding: 8px 16px; border-radius: 8px; font-weight: 600;
-                    background: #4A6CF7; color: white; border: none;
-                }
-                QPushButton:hover { background: #3a5bf5; }
-                QListWidget { border: none; background: transparent; }
-                QComboBox, QSpinBox, QLineEdit {
-                    padding: 6px; border: 1px solid #E5E7EB; border-radius: 6px;
-                }
-                QProgressBar {
-                    border: none; border-radius: 6px; background: #E5E7EB;
-                }
-                QProgressBar::chunk { background: #4A6CF7; border-radius: 6px; }
-                QTabWidget::pane { border: 1px solid #E5E7EB; border-radius: 12px; }
-                QTabBar::tab { padding: 8px 16px; }
-            """)
-
-    def calculate_widget_height(self, title, desc, is_cumulative):
-        base_height = 40
-        button_height = 34
-        padding = 24
-        if desc:
-            lines = len(desc.splitlines())
-            desc_height = max(1, lines) * 20
-        else:
-            desc_height = 0
-        progress_height = 16 if is_cumulative else 0
-        total_height = base_height + desc_height + progress_height + button_height + padding
-        return max(100, int(total_height))
+        """Применяет тему ко всему приложению одной общей таблицей стилей (см. quest_theme)."""
+        quest_theme.apply(self.get_current_theme())
 
     def sort_quests(self, quests):
-        # Разделим на группы
-        daily_types = {"Ежедневное задание", "Продвинутое ежедневное задание"}
-
-        pinned = []
-        daily_unpinned = []
-        others = []
-
-        for q in quests:
-            if q.get("is_pinned", False):
-                pinned.append(q)
-            elif q["type"] in daily_types:
-                daily_unpinned.append(q)
-            else:
-                others.append(q)
-
-        # Сортируем группы
-        # 1. Закреплённые — сначала невыполненные ежедневные, потом всё остальное
-        pinned.sort(key=lambda x: (
-            x["type"] not in daily_types,  # ежедневные — первее (False < True)
-            x.get("completed_today", False),  # невыполненные — выше
-            x["title"]  # потом по названию
-        ))
-
-        # 2. Незакреплённые ежедневные: невыполненные — выше
-        daily_unpinned.sort(key=lambda x: x.get("completed_today", False))
-
-        # 3. Остальные — по текущему режиму
-        mode = self.sort_combo.currentText()
-        if mode == "По названию":
-            others.sort(key=lambda x: x["title"])
-        elif mode == "По типу":
-            type_order = {t: i for i, t in enumerate(TASK_TYPES)}
-            others.sort(key=lambda x: type_order.get(x["type"], 999))
-        elif mode == "По XP (↓)":
-            others.sort(key=lambda x: x["xp"], reverse=True)
-        elif mode == "По XP (↑)":
-            others.sort(key=lambda x: x["xp"])
-
-        return pinned + daily_unpinned + others
-
-    def update_display(self):
-        self.quest_list.clear()
-
-        search_text = self.search_input.text().strip().lower()
+        return sort_quests(quests, self.sort_combo.currentText())
 
-        selected_category = self.category_combo.currentText()
-        allowed_types = set(CATEGORY_MAP[selected_category])
+    def current_filter(self):
+        """Возвращает проверку задачи на соответствие поиску и выбранной категории."""
+        self._search_ranks = self.search_index.search(self.search_input.text())
+        return quest_filter(self.category_combo.currentText(), self._search_ranks)
 
-        filtered_quests = []
-        for q in self.data["quests"]:
-            if search_text:
-                if not (search_text in q["title"].lower() or search_text in q.get("desc", "").lower()):
-                    continue
-            if q["type"] not in allowed_types:
-                continue
-            filtered_quests.append(q)
-
-        sorted_quests = self.sort_quests(filtered_quests)
-
-        for q in sorted_quests:
-            item = QListWidgetItem()
-            item.setData(Qt.ItemDataRole.UserRole, q["id"])
-            self.quest_list.addItem(item)
-
-            widget = QWidget()
-            layout = QVBoxLayout(widget)
-            layout.setContentsMargins(12, 8, 12, 8)
-            layout.setSpacing(6)
-
-            top = QHBoxLayout()
-            icon_text = q.get("icon", "🎮")
-            icon = QLabel(icon_text)
-            icon.setFixedSize(36, 36)
-            icon.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            icon.setStyleSheet(f"background: {TYPE_COLORS[q['type']]}; color: white; border-radius: 8px; font-size: 14px;")
-
-            name_layout = QVBoxLayout()
-            name_label = QLabel(f"<b>{q['title']}</b>")
-            name_label.setFont(QFont("Segoe UI", 10))
-            name_label.setWordWrap(True)
-            name_label.setMaximumWidth(300)
-            name_layout.addWidget(name_label)
-
-            if q.get("desc"):
-                desc_label = QLabel(q["desc"])
-                desc_label.setFont(QFont("Segoe UI", 9))
-                desc_label.setStyleSheet("color: #6B7280;")
-                desc_label.setWordWrap(True)
-                desc_label.setMaximumWidth(300)
-                name_layout.addWidget(desc_label)
-
-            exp_label = QLabel(f"{q['xp']} XP")
-            exp_label.setFont(QFont("Segoe UI", 10, QFont.Weight.Bold))
-            exp_label.setStyleSheet(f"color: {TYPE_COLORS[q['type']]};")
-
-            pin_btn = QPushButton("📌" if q.get("is_pinned", False) else "📍")
-            pin_btn.setFixedSize(24, 24)
-            pin_btn.setStyleSheet("""
-                QPushButton {
-                    background: transparent;
-                    border: none;
-                    font-size: 14px;
-                    padding: 0;
-                }
-                QPushButton:hover {
-                    color: #F59E0B;
-                }
-            """)
-            pin_btn.clicked.connect(lambda _, q=q: self.toggle_pin_quest(q))
-            top.addWidget(pin_btn)
-
-            top.addWidget(icon)
-            top.addLayout(name_layout, 1)
-            top.addWidget(exp_label)
-            layout.addLayout(top)
-
-            if q.get("is_cumulative"):
-                pb = QProgressBar()
-                target = q["target_value"]
-                current = q["current_value"]
-                pct = int(current / target * 100) if target else 0
-                pb.setRange(0, 100)
-                pb.setValue(pct)
-                pb.setFormat(f"{pct}% ({current}/{target})")
-                pb.setStyleSheet(f"""
-                    QProgressBar::chunk {{ background: {TYPE_COLORS[q['type']]}; }}
-                    QProgressBar {{ border-radius: 4px; background: #E5E7EB; }}
-                """)
-                pb.setFixedHeight(16)
-                layout.addWidget(pb)
-
-            # Определяем, ежедневное ли и выполнено ли сегодня
-            is_daily = q["type"] in ["Ежедневное задание", "Продвинутое ежедневное задание"]
-            is_completed_today = q.get("completed_today", False)
-
-            # Кнопка
-            btn_layout = QHBoxLayout()
-            complete_btn = QPushButton()
-            complete_btn.setFixedWidth(124)
-            complete_btn.setFixedHeight(34)
-            complete_btn.setFont(QFont("Segoe UI", 10, QFont.Weight.Medium))
-
-            if is_daily and is_completed_today:
-                complete_btn.setText("✅ Выполнено")
-                complete_btn.setEnabled(False)
-                # Стиль: серый фон
-                complete_btn.setStyleSheet("""
-                    QPushButton {
-                        background: #E5E7EB; color: #6B7280; border: none;
-                    }
-                """)
+    def update_display(self):
+        """Приводит список к текущим фильтру, сортировке и теме."""
+        if self.data is None:
+            return
+        with span("update_display"):
+            theme = self.get_current_theme()
+            if theme != self.quest_delegate.theme:
+                self.quest_delegate.set_theme(theme)
+                self.quest_list.viewport().update()
+            with span("update_display.filter"):
+                accepts = self.current_filter()
+            with span("update_display.set_view"):
+                self.quest_model.set_view(self.data["quests"], accepts, self.sort_combo.currentText(),
+                                          self._search_ranks)
+            with span("update_display.summary"):
+                self.update_summary()
+
+    def _reindex_quest(self, quest):
+        self.search_index.update(quest)
+        if self._search_ranks is not None:
+            rank = self.search_index.rank(self.search_input.text(), quest["id"])
+            if rank is None:
+                self._search_ranks.pop(quest["id"], None)
             else:
-                complete_btn.setText("✅ Выполнить")
-                complete_btn.setEnabled(True)
-                complete_btn.setStyleSheet("""
-                    QPushButton {
-                        padding: 8px 16px; border-radius: 8px; font-weight: 600;
-                        background: #4A6CF7; color: white; border: none;
-                    }
-                    QPushButton:hover { background: #3a5bf5; }
-                """)
-                complete_btn.clicked.connect(lambda _, q=q: self.complete_quest(q))
-
-            btn_layout.addWidget(complete_btn)
-            btn_layout.addStretch()
-            layout.addLayout(btn_layout)
-
-            height = self.calculate_widget_height(q["title"], q.get("desc", ""), q.get("is_cumulative", False))
-            item.setSizeHint(QSize(0, height))
-
-            self.quest_list.setItemWidget(item, widget)
+                self._search_ranks[quest["id"]] = rank
 
+    def on_data_event(self, event, obj):
+        """Применяет к списку только то, что изменилось в данных."""
+        count("event." + event)
+        if event == "save_error":
+            self.show_save_error(obj)
+            return
+        if self.stats is not None:
+            self.stats.apply(event, obj)
+        self.daily_engine.apply(event, obj)
+        if event == "added":
+            self._reindex_quest(obj)
+            self.quest_model.quest_added(obj)
+        elif event == "removed":
+            self.search_index.remove(obj["id"])
+            self.quest_model.quest_removed(obj)
+        elif event == "updated":
+            self._reindex_quest(obj)
+            row = self.quest_model.quest_updated(obj)
+            if row >= 0:
+                self.quest_delegate.refresh_size(self.quest_model.index(row))
+        elif event == "reloaded":
+            self.search_index.rebuild(self.data["quests"])
+            self.update_display()
+            return
+        elif event == "batch":
+            for sub_event, sub_obj in obj:
+                if sub_event == "removed":
+                    self.search_index.remove(sub_obj["id"])
+                elif sub_event in ("added", "updated"):
+                    self._reindex_quest(sub_obj)
+            # Пакет применяется к списку одним проходом, а не построчно.
+            self.update_display()
+            updated = [sub_obj["id"] for sub_event, sub_obj in obj if sub_event == "updated"]
+            self.quest_model.quests_changed(updated)
+            for quest_id in updated:
+                row = self.quest_model.row_of(quest_id)
+                if row >= 0:
+                    self.quest_delegate.refresh_size(self.quest_model.index(row))
+            return
+        if not self._summary_pending:
+            # Несколько событий одного действия обновляют сводку один раз.
+            self._summary_pending = True
+            QTimer.singleShot(0, self.update_summary)
+
+    def update_summary(self):
+        self._summary_pending = False
         level, xp = self.data["level"], self.data["xp"]
         xp_needed = xp_needed_for_next_level(level)
         self.level_label.setText(f"Уровень {level} • {xp} / {xp_needed} XP")
@@ -370,98 +328,148 @@ class QuestLogUI(QMainWindow):
         self.update_statistics()
 
     def update_statistics(self):
-        while self.stats_layout.count():
-            child = self.stats_layout.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
+        """Помечает статистику устаревшей и обновляет её, только если вкладка открыта."""
+        self._stats_dirty = True
+        if self.tabs.currentWidget() is self.stats_tab:
+            self.refresh_statistics()
 
-        all_quests = self.data["quests"] + self.data["completed_quests"]
-        completed = self.data["completed_quests"]
-        total = len(all_quests)
-        done = len(completed)
+    def on_tab_changed(self, index):
+        if self.tabs.widget(index) is self.stats_tab and self._stats_dirty:
+            self.refresh_statistics()
 
+    def build_statistics(self):
+        """Создаёт карточки статистики один раз; дальше меняется только их текст."""
         title = QLabel("📊 Статистика прогресса")
         title.setFont(QFont("Segoe UI", 18, QFont.Weight.Bold))
         self.stats_layout.addWidget(title)
 
-        self.add_stat_card(
-            "Всего задач", f"{done} / {total}",
-            f"Завершено {int(done/total*100) if total else 0}%"
-        )
-
-        self.add_stat_card("Всего XP заработано", str(self.data["xp"]), "Повышайте уровень!")
-
-        type_stats = {}
-        for t in TASK_TYPES:
-            created = len([q for q in all_quests if q["type"] == t])
-            finished = len([q for q in completed if q["type"] == t])
-            type_stats[t] = (created, finished)
+        self.stat_cards = {
+            "total": self.add_stat_card("Всего задач", " "),
+            "xp": self.add_stat_card("Всего XP заработано", "Повышайте уровень!"),
+        }
 
         type_widget = QFrame()
-        type_widget.setStyleSheet(self.get_card_style())
+        type_widget.setProperty("card", True)
         type_layout = QVBoxLayout(type_widget)
         type_layout.addWidget(QLabel("<b>По типам:</b>"))
         grid = QGridLayout()
         grid.setHorizontalSpacing(20)
-        for i, (t, (cr, fin)) in enumerate(type_stats.items()):
+        self.type_stat_labels = {}
+        for i, t in enumerate(TASK_TYPES):
             color = TYPE_COLORS[t]
             grid.addWidget(QLabel(f"<span style='color:{color}; font-size: 14px;'>●</span> {t}"), i, 0)
-            grid.addWidget(QLabel(f"<b>{fin} / {cr}</b>"), i, 1, alignment=Qt.AlignmentFlag.AlignRight)
+            self.type_stat_labels[t] = QLabel()
+            grid.addWidget(self.type_stat_labels[t], i, 1, alignment=Qt.AlignmentFlag.AlignRight)
         type_layout.addLayout(grid)
         self.stats_layout.addWidget(type_widget)
 
-        daily_types = ["Ежедневное задание", "Продвинутое ежедневное задание"]
-        daily_done = len([q for q in completed if q["type"] in daily_types])
-        self.add_stat_card("Выполнено ежедневных", str(daily_done), "Регулярность — ключ к успеху!")
-
-        top_xp = sorted(completed, key=lambda x: x["xp"], reverse=True)[:3]
-        if top_xp:
-            top_widget = QFrame()
-            top_widget.setStyleSheet(self.get_card_style())
-            top_layout = QVBoxLayout(top_widget)
-            top_layout.addWidget(QLabel("<b>Топ достижений по XP:</b>"))
-            for q in top_xp:
-                icon = q.get("icon", "🏆")
-                top_layout.addWidget(QLabel(f"{icon} <b>{q['title']}</b> — {q['xp']} XP"))
-            self.stats_layout.addWidget(top_widget)
-
-        today = date.today()
-        week_ago = today - timedelta(days=7)
-        recent = [
-            q for q in completed
-            if "date" in q and datetime.strptime(q["date"], "%Y-%m-%d").date() >= week_ago
-        ]
-        self.add_stat_card("Завершено за неделю", str(len(recent)), "Ваша недавняя активность")
+        self.stat_cards["daily"] = self.add_stat_card("Выполнено ежедневных", "Регулярность — ключ к успеху!")
+
+        self.top_widget = QFrame()
+        self.top_widget.setProperty("card", True)
+        top_layout = QVBoxLayout(self.top_widget)
+        top_layout.addWidget(QLabel("<b>Топ достижений по XP:</b>"))
+        self.top_labels = [QLabel() for _ in range(3)]
+        for label in self.top_labels:
+            top_layout.addWidget(label)
+        self.stats_layout.addWidget(self.top_widget)
+
+        self.stat_cards["week"] = self.add_stat_card("Завершено за неделю", "Ваша недавняя активность")
+        self.stat_cards["month_xp"] = self.add_stat_card("XP за месяц", " ")
+        self.stat_cards["profiles"] = self.add_stat_card("Все профили", " ")
 
         self.stats_layout.addStretch()
+        self._stats_built = True
 
-    def add_stat_card(self, title, value, subtitle=""):
+    def refresh_statistics(self):
+        if self.data is None:
+            return
+        with span("refresh_statistics"):
+            if self.stats is None:
+                from quest_stats import QuestStats
+                self.stats = QuestStats(self.data)
+            if self.scroll_area is None:
+                self.setup_stats_tab()
+            if not self._stats_built:
+                self.build_statistics()
+
+            stats = self.stats
+            total = stats.total
+            done = stats.done
+            self.set_stat_card("total", f"{done} / {total}", f"Завершено {int(done/total*100) if total else 0}%")
+            self.set_stat_card("xp", str(self.data["xp"]))
+
+            for t, (cr, fin) in stats.type_stats(TASK_TYPES).items():
+                self.type_stat_labels[t].setText(f"<b>{fin} / {cr}</b>")
+
+            self.set_stat_card("daily", str(stats.daily_done))
+
+            top_xp = stats.top(3)
+            self.top_widget.setVisible(bool(top_xp))
+            for i, label in enumerate(self.top_labels):
+                if i < len(top_xp):
+                    q = top_xp[i]
+                    icon = q.get("icon", "🏆")
+                    label.setText(f"{icon} <b>{q['title']}</b> — {q['xp']} XP")
+                label.setVisible(i < len(top_xp))
+
+            self.set_stat_card("week", str(stats.completed_since(7)))
+            self.set_stat_card("month_xp", str(stats.xp_this_period("month")),
+                               f"В среднем за неделю: {stats.xp_daily_mean(7):.0f} XP в день")
+
+            summary = self.profiles.summary()
+            self.set_stat_card("profiles", f"{summary['xp']} XP",
+                               f"Профилей: {summary['profiles']} • активных задач: {summary['active']} • "
+                               f"за неделю: {summary['week']}")
+            self._stats_dirty = False
+
+    def add_stat_card(self, title, subtitle=""):
+        """Добавляет карточку и возвращает её метки значения и подписи."""
         card = QFrame()
-        card.setStyleSheet(self.get_card_style())
+        card.setProperty("card", True)
         layout = QVBoxLayout(card)
         layout.addWidget(QLabel(f"<b>{title}</b>"))
-        layout.addWidget(QLabel(f"<h2 style='margin: 8px 0;'>{value}</h2>"))
+        value_label = QLabel()
+        layout.addWidget(value_label)
+        subtitle_label = None
         if subtitle:
-            color = "#6B7280" if self.data.get("theme") == "light" else "#9CA3AF"
-            layout.addWidget(QLabel(f"<span style='color:{color};'>{subtitle}</span>"))
+            subtitle_label = QLabel()
+            subtitle_label.setProperty("role", "muted")
+            layout.addWidget(subtitle_label)
         self.stats_layout.addWidget(card)
+        card_labels = (value_label, subtitle_label)
+        self.set_card_labels(card_labels, None, subtitle)
+        return card_labels
+
+    def set_stat_card(self, key, value, subtitle=None):
+        self.set_card_labels(self.stat_cards[key], value, subtitle)
+
+    def set_card_labels(self, card_labels, value, subtitle):
+        value_label, subtitle_label = card_labels
+        if value is not None:
+            value_label.setText(f"<h2 style='margin: 8px 0;'>{value}</h2>")
+        if subtitle is not None and subtitle_label is not None:
+            subtitle_label.setText(subtitle)
 
     def open_editor(self):
         try:
-            editor = QuestEditor(self)
+            with span("dialog.editor"):
+                from quest_editor import QuestEditor
+                editor = QuestEditor(self)
             if editor.exec():
                 data = editor.get_data()
                 if not data["title"]:
                     QMessageBox.warning(self, "Ошибка", "Укажите название.")
                     return
-                self.data["quests"].append(data)
-                save_data(self.data)
-                self.update_display()
+                add_quest(self.data, data)
+        except TimeoutError:
+            self.show_store_busy()
         except Exception as e:
             QMessageBox.critical(self, "❌ Ошибка", f"Не удалось открыть редактор:\n{str(e)}")
 
-    def edit_selected_quest(self, item):
-        quest_id = item.data(Qt.ItemDataRole.UserRole)
+    @store_action
+    def edit_selected_quest(self, index):
+        quest_id = index.data(Qt.ItemDataRole.UserRole)
         quest = None
         for q in self.data["quests"]:
             if q["id"] == quest_id:
@@ -470,22 +478,24 @@ class QuestLogUI(QMainWindow):
         if quest is None:
             return
 
-        editor = QuestEditor(self, quest_data=quest)
+        with span("dialog.editor"):
+            from quest_editor import QuestEditor
+            editor = QuestEditor(self, quest_data=quest)
         if editor.exec():
             updated = editor.get_data()
-            for i, q in enumerate(self.data["quests"]):
-                if q["id"] == quest_id:
-                    self.data["quests"][i] = updated
-                    break
-            save_data(self.data)
-            self.update_display()
+            update_quest(self.data, updated)
 
     def show_context_menu(self, position):
-        item = self.quest_list.itemAt(position)
-        if not item:
+        index = self.quest_list.indexAt(position)
+        if not index.isValid():
+            return
+
+        selected = self.selected_quests()
+        if len(selected) > 1 and self.quest_list.selectionModel().isSelected(index):
+            self.show_bulk_menu(selected, position)
             return
 
-        quest_id = item.data(Qt.ItemDataRole.UserRole)
+        quest_id = index.data(Qt.ItemDataRole.UserRole)
         quest = None
         for q in self.data["quests"]:
             if q["type"] and q["id"] == quest_id:
@@ -508,14 +518,77 @@ class QuestLogUI(QMainWindow):
             reset_action.triggered.connect(lambda: self.reset_cumulative_progress(quest))
             set_action.triggered.connect(lambda: self.set_cumulative_progress(quest))
 
-        edit_action.triggered.connect(lambda: self.edit_selected_quest(item))
-        delete_action.triggered.connect(lambda: self.delete_selected_quest(item))
+        edit_action.triggered.connect(lambda: self.edit_selected_quest(index))
+        delete_action.triggered.connect(lambda: self.delete_selected_quest(index))
 
         global_pos = self.quest_list.mapToGlobal(position)
         menu.popup(global_pos)
 
-    def delete_selected_quest(self, item):
-        quest_id = item.data(Qt.ItemDataRole.UserRole)
+    def selected_quests(self):
+        rows = sorted(index.row() for index in self.quest_list.selectionModel().selectedIndexes())
+        return [self.quest_model.quest_at(row) for row in rows]
+
+    def show_bulk_menu(self, quests, position):
+        """Меню для нескольких выделенных задач: каждое действие — одна пакетная операция."""
+        menu = QMenu(self)
+        simple = [q for q in quests if not q.get("is_cumulative", False)]
+        cumulative = [q for q in quests if q.get("is_cumulative", False)]
+        all_pinned = all(q.get("is_pinned", False) for q in quests)
+
+        if simple:
+            complete_action = menu.addAction(f"✅ Выполнить ({len(simple)})")
+            complete_action.triggered.connect(lambda: self.complete_selected_quests(simple))
+        if cumulative:
+            progress_action = menu.addAction(f"➕ Добавить прогресс ({len(cumulative)})")
+            progress_action.triggered.connect(lambda: self.add_progress_to_selected(cumulative))
+        pin_action = menu.addAction("📌 Открепить" if all_pinned else "📌 Закрепить")
+        pin_action.triggered.connect(lambda: self.pin_selected_quests(quests, not all_pinned))
+        menu.addSeparator()
+        delete_action = menu.addAction(f"🗑️ Удалить ({len(quests)})")
+        delete_action.triggered.connect(lambda: self.delete_selected_quests(quests))
+
+        menu.popup(self.quest_list.mapToGlobal(position))
+
+    @store_action
+    def pin_selected_quests(self, quests, pinned):
+        set_pinned(self.data, quests, pinned)
+
+    @store_action
+    def complete_selected_quests(self, quests):
+        reply = QMessageBox.question(
+            self,
+            "Подтвердите",
+            f"Завершить выбранные задания ({len(quests)})?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if reply == QMessageBox.StandardButton.Yes:
+            finish_quests(self.data, quests)
+
+    @store_action
+    def add_progress_to_selected(self, quests):
+        add, ok = QInputDialog.getInt(
+            self, "Добавить прогресс", f"Сколько добавить каждому заданию ({len(quests)})?",
+            1, 0, 10_000_000
+        )
+        if ok and add:
+            completed = add_progress(self.data, quests, add)
+            if completed:
+                QMessageBox.information(self, "✅ Успех!", f"Завершено достижений: {len(completed)}")
+
+    @store_action
+    def delete_selected_quests(self, quests):
+        reply = QMessageBox.question(
+            self,
+            "Подтверждение удаления",
+            f"Удалить выбранные задания ({len(quests)})?\nЭто действие нельзя отменить.",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if reply == QMessageBox.StandardButton.Yes:
+            delete_quests(self.data, [q["id"] for q in quests])
+
+    @store_action
+    def delete_selected_quest(self, index):
+        quest_id = index.data(Qt.ItemDataRole.UserRole)
         quest = None
         for q in self.data["quests"]:
             if q["id"] == quest_id:
@@ -531,10 +604,9 @@ class QuestLogUI(QMainWindow):
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
         if reply == QMessageBox.StandardButton.Yes:
-            self.data["quests"] = [q for q in self.data["quests"] if q["id"] != quest_id]
-            save_data(self.data)
-            self.update_display()
+            delete_quest(self.data, quest_id)
 
+    @store_action
     def complete_quest(self, quest):
         daily_types = ["Ежедневное задание", "Продвинутое ежедневное задание"]
         is_daily = quest["type"] in daily_types
@@ -556,24 +628,18 @@ class QuestLogUI(QMainWindow):
                 except ValueError:
                     add = 0
                 new_val = quest["current_value"] + add
-                quest["current_value"] = new_val
-
-                if new_val >= quest["target_value"]:
-                    quest["completed_today"] = True
-                    self.data["xp"] += quest["xp"]
-                    completed_copy = quest.copy()
-                    completed_copy["date"] = str(date.today())
-                    self.data["completed_quests"].append(completed_copy)
-                    while can_level_up(self.data["level"], self.data["xp"]):
-                        self.data["level"] += 1
-                    save_data(self.data)
-                    self.update_display()
-                    QMessageBox.information(self, "✅ Успех!", f"Достижение «{quest['title']}» завершено!")
-                    dialog.accept()
-                else:
-                    save_data(self.data)
-                    self.update_display()
-                    dialog.accept()
+
+                try:
+                    if new_val >= quest["target_value"]:
+                        finish_quest(self.data, quest, current_value=new_val)
+                        QMessageBox.information(self, "✅ Успех!", f"Достижение «{quest['title']}» завершено!")
+                    else:
+                        update_quest(self.data, quest, current_value=new_val)
+                except TimeoutError:
+                    # Диалог остаётся открытым: значение можно отправить ещё раз.
+                    self.show_store_busy()
+                    return
+                dialog.accept()
 
             btn = QPushButton("Добавить")
             btn.clicked.connect(apply_progress)
@@ -583,15 +649,7 @@ class QuestLogUI(QMainWindow):
             # Простое задание
             if is_daily:
                 # Ежедневное — просто помечаем как выполненное
-                quest["completed_today"] = True
-                self.data["xp"] += quest["xp"]
-                completed_copy = quest.copy()
-                completed_copy["date"] = str(date.today())
-                self.data["completed_quests"].append(completed_copy)
-                while can_level_up(self.data["level"], self.data["xp"]):
-                    self.data["level"] += 1
-                save_data(self.data)
-                self.update_display()
+                finish_quest(self.data, quest)
                 QMessageBox.information(self, "✅ Успех!", f"Достижение «{quest['title']}» завершено!")
             else:
                 # Обычное — спрашиваем подтверждение и удаляем
@@ -604,121 +662,144 @@ class QuestLogUI(QMainWindow):
                 if reply != QMessageBox.StandardButton.Yes:
                     return
                 # Удаляем из списка
-                self.data["quests"] = [q for q in self.data["quests"] if q["id"] != quest["id"]]
-                completed_quest = quest.copy()
-                completed_quest["date"] = str(date.today())
-                self.data["xp"] += completed_quest["xp"]
-                self.data["completed_quests"].append(completed_quest)
-                while can_level_up(self.data["level"], self.data["xp"]):
-                    self.data["level"] += 1
-                save_data(self.data)
-                self.update_display()
+                finish_quest(self.data, quest)
                 QMessageBox.information(self, "✅ Успех!", f"Достижение «{quest['title']}» завершено!")
     
     def open_settings(self):
-        settings = SettingsDialog(
-            self,
-            current_theme=self.data.get("theme", "light"),
-            on_theme_change=self.apply_theme,
-            on_data_change=self.on_data_changed
-        )
+        with span("dialog.settings"):
+            from settings_dialog import SettingsDialog
+            settings = SettingsDialog(
+                self,
+                current_theme=self.get_current_theme(),
+                on_theme_change=self.apply_theme,
+                on_data_change=self.on_data_changed,
+                data=self.data,
+                io=self.io
+            )
         settings.exec()
 
+    @store_action
     def apply_theme(self, theme):
-        self.data["theme"] = theme
-        save_data(self.data)
+        """Меняет тему без перестройки: виджеты перекрашивает общая таблица стилей, строки — делегат."""
+        set_setting(self.data, "theme", theme)
         self.apply_styles()
-        self.apply_stats_theme()
-        self.update_display()
+        self.quest_delegate.set_theme(theme)
+        self.quest_list.viewport().update()
 
     def on_data_changed(self, new_data):
-        """Обновляет данные после импорта или сброса."""
+        """Обновляет данные после импорта, сброса или смены профиля."""
         self.data = new_data
+        self.profiles.set_data(new_data)
+        self.search_index.rebuild(self.data["quests"])
+        if self.stats is not None:
+            self.stats.rebuild(self.data)
+        self.daily_engine.rebuild(self.data)
         self.update_display()
+        self.watcher.watch()
+
+    def on_store_changed(self):
+        """Файлы хранилища изменились: подтягивает чужие правки, свои отсекаются по отпечатку."""
+        if self.io.busy():
+            # Фоновая операция сама пишет в хранилище или подменяет данные — проверка после неё.
+            self.watcher.recheck()
+            return
+        try:
+            sync_external(self.data, timeout=0)
+        except TimeoutError:
+            # Хранилище сейчас пишет другой экземпляр.
+            self.watcher.recheck()
+
+    def refresh_profile_list(self):
+        self.profile_combo.clear()
+        for name in self.profiles.names():
+            self.profile_combo.addItem(f"👤 {name}", name)
+        self.profile_combo.addItem("➕ Новый профиль…", None)
+        self.profile_combo.setCurrentIndex(self.profile_combo.findData(self.profiles.active))
+
+    def on_profile_activated(self, index):
+        name = self.profile_combo.itemData(index)
+        if name is None:
+            name, ok = QInputDialog.getText(self, "Новый профиль", "Имя профиля:")
+            try:
+                name = self.profiles.create(name) if ok else None
+            except ValueError as e:
+                QMessageBox.warning(self, "Ошибка", str(e))
+                name = None
+            if name is None:
+                self.profile_combo.setCurrentIndex(self.profile_combo.findData(self.profiles.active))
+                return
+        self.switch_profile(name)
+
+    def switch_profile(self, name):
+        """Делает профиль активным; недавно открытые берутся из кэша ProfileManager.
+
+        Профиль загружается в фоне; до конца загрузки окно выключено, чтобы правки
+        не ушли в старый профиль.
+        """
+        if name == self.profiles.active:
+            return
+        # Счётчики статистики привязаны к данным профиля: сохраняем и строим заново при показе.
+        if self.stats is not None:
+            self.stats.save()
+            self.stats = None
+        self._stats_dirty = True
+        self.centralWidget().setEnabled(False)
+        self.io.run(self.profiles.open, name, on_done=self.on_profile_opened, on_error=self.on_profile_failed)
+
+    def on_profile_opened(self, data):
+        with span("switch_profile"):
+            self.on_data_changed(data)
+            # Тема хранится в профиле; цвета строк делегату передаёт update_display.
+            self.apply_styles()
+            self.refresh_profile_list()
+        self.centralWidget().setEnabled(True)
+
+    def on_profile_failed(self, error):
+        self.centralWidget().setEnabled(True)
+        self.refresh_profile_list()
+        QMessageBox.critical(self, "❌ Ошибка", f"Не удалось открыть профиль:\n{error}")
+
+    def schedule_daily_reset(self):
+        # Секунда запаса, чтобы таймер не сработал чуть раньше полуночи.
+        self.daily_timer.start(msecs_to_midnight() + 1000)
+
+    def on_daily_timer(self):
+        """Новый день: сбрасывает ежедневные задания, строки списка обновятся по событиям."""
+        if self.io.busy():
+            # Фоновая операция может подменять данные или файлы: сброс — после неё.
+            self.daily_timer.start(1000)
+            return
+        try:
+            self.daily_engine.reset_if_due()
+        except TimeoutError:
+            # Хранилище пишет другой экземпляр: сброс — чуть позже.
+            self.daily_timer.start(1000)
+            return
+        self.schedule_daily_reset()
 
     def get_current_theme(self):
+        # До загрузки данных окно рисуется в светлой теме.
+        if self.data is None:
+            return "light"
         return self.data.get("theme", "light")
     
-    def get_card_style(self):
-        """Возвращает стиль карточки в зависимости от темы."""
-        theme = self.data.get("theme", "light")
-        if theme == "dark":
-            return """
-                background: #1F2937;
-                border-radius: 12px;
-                border: 1px solid #374151;
-                padding: 16px;
-            """
-        else:
-            return """
-                background: white;
-                border-radius: 12px;
-                border: 1px solid #E5E7EB;
-                padding: 16px;
-            """
-    
-    def apply_scroll_content_style(self):
-        theme = self.data.get("theme", "light")
-        if theme == "dark":
-            self.scroll_content.setStyleSheet("""
-                background-color: #111827;
-                color: #E5E7EB;
-            """)
-        else:
-            self.scroll_content.setStyleSheet("""
-                background-color: #F9FAFB;
-                color: #1F2937;
-            """)
-
-    def apply_stats_theme(self):
-        theme = self.data.get("theme", "light")
-        if theme == "dark":
-            self.scroll_content.setStyleSheet("background-color: #111827;")
-            self.scroll_area.setStyleSheet("background-color: #111827; border: none;")
-        else:
-            self.scroll_content.setStyleSheet("background-color: #F9FAFB;")
-            self.scroll_area.setStyleSheet("background-color: #F9FAFB; border: none;")
-    
     def update_active_stats(self):
         """Обновляет метку со статистикой активных задач и ежедневных заданий (с учётом фильтра)."""
-        search_text = self.search_input.text().strip().lower()
-        selected_category = self.category_combo.currentText()
-        allowed_types = set(CATEGORY_MAP[selected_category])
+        total_active = self.quest_model.rowCount()
 
-        filtered_quests = []
-        for q in self.data["quests"]:
-            if search_text:
-                if not (search_text in q["title"].lower() or search_text in q.get("desc", "").lower()):
-                    continue
-            if q["type"] not in allowed_types:
-                continue
-            filtered_quests.append(q)
-
-        total_active = len(filtered_quests)
-
-        daily_types = {"Ежедневное задание", "Продвинутое ежедневное задание"}
-        daily_quests = [q for q in filtered_quests if q["type"] in daily_types]
-        completed_daily = [q for q in daily_quests if q.get("completed_today", False)]
-        pending_daily = len(daily_quests) - len(completed_daily)
+        visible = (self.quest_model.quest_at(row) for row in range(total_active))
+        completed_daily, daily_total = daily_progress(visible)
 
         stats_text = f"Всего: {total_active}"
-        if daily_quests:
-            stats_text += f" | Ежедневных: {len(completed_daily)}/{len(daily_quests)}"
+        if daily_total:
+            stats_text += f" | Ежедневных: {completed_daily}/{daily_total}"
 
         self.stats_label.setText(stats_text)
     
+    @store_action
     def reset_cumulative_progress(self, quest):
         """Сбрасывает прогресс накопительного задания до 0."""
-        quest["current_value"] = 0
-        save_data(self.data)
-        self.update_display()
-        QMessageBox.information(self, "🔄 Прогресс сброшен", f"Прогресс задания «{quest['title']}» сброшен.")
-
-    def reset_cumulative_progress(self, quest):
-        """Сбрасывает прогресс накопительного задания до 0."""
-        quest["current_value"] = 0
-        save_data(self.data)
-        self.update_display()
+        update_quest(self.data, quest, current_value=0)
         QMessageBox.information(self, "🔄 Прогресс сброшен", f"Прогресс задания «{quest['title']}» сброшен.")
 
     def set_cumulative_progress(self, quest):
@@ -740,9 +821,7 @@ class QuestLogUI(QMainWindow):
             try:
                 new_value = int(input_field.text())
                 if 0 <= new_value <= quest["target_value"]:
-                    quest["current_value"] = new_value
-                    save_data(self.data)
-                    self.update_display()
+                    update_quest(self.data, quest, current_value=new_value)
                     dialog.accept()
 
                     # Если достигнута цель — завершить задание
@@ -752,6 +831,8 @@ class QuestLogUI(QMainWindow):
                     QMessageBox.warning(dialog, "⚠️ Ошибка", "Значение вне допустимого диапазона.")
             except ValueError:
                 QMessageBox.warning(dialog, "⚠️ Ошибка", "Введите корректное число.")
+            except TimeoutError:
+                self.show_store_busy()
 
         btn = QPushButton("Применить")
         btn.clicked.connect(apply_manual_value)
@@ -759,12 +840,37 @@ class QuestLogUI(QMainWindow):
 
         dialog.exec()
     
+    @store_action
     def toggle_pin_quest(self, quest):
         """Переключает статус закрепления задачи."""
-        quest["is_pinned"] = not quest.get("is_pinned", False)
-        save_data(self.data)
-        self.update_display()
+        update_quest(self.data, quest, is_pinned=not quest.get("is_pinned", False))
+
+    def show_store_busy(self):
+        QMessageBox.warning(self, "⏳ Хранилище занято",
+                            "Данные сейчас записывает другой экземпляр программы.\nПовторите попытку.")
+
+    def show_save_error(self, error):
+        """Показывает в строке состояния, что фоновая запись не удалась; None — убирает сообщение."""
+        if error is None:
+            self.statusBar().clearMessage()
+        else:
+            self.statusBar().showMessage(f"⚠️ Не удалось сохранить данные: {error}")
 
     def closeEvent(self, event):
-        save_data(self.data)
+        # Фоновая операция должна закончиться до закрытия хранилищ.
+        self.io.wait()
+        unsubscribe(self.io.relay)
+        if self.data is not None:
+            flush_data()
+            if save_error() is not None:
+                # Последняя фоновая запись не удалась — последняя попытка, уже синхронно.
+                try:
+                    save_data(self.data)
+                except Exception as e:
+                    QMessageBox.critical(self, "❌ Ошибка", f"Не удалось сохранить данные:\n{e}")
+        # Столбцы статистики пишутся в папку активного профиля — до закрытия профилей.
+        if self.stats is not None:
+            self.stats.save()
+        if self.profiles is not None:
+            self.profiles.close()
         event.accept()
\ No newline at end of file
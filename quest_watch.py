@@ -0,0 +1,53 @@
+import os
+
+from PyQt6.QtCore import QFileSystemWatcher, QObject, QTimer, pyqtSignal
+
+import quest_data
+
+# Запись файла даёт серию событий: проверка идёт через столько мс после последнего.
+WATCH_DELAY = 300
+
+
+class StoreWatcher(QObject):
+    """Следит за файлами текущего хранилища и сообщает сигналом changed, что их стоит проверить.
+
+    Файлы заменяются атомарно (os.replace), а наблюдение за заменённым файлом
+    теряется, поэтому наблюдаются и их папки, а пути добавляются заново после
+    каждого события. События от своих же записей тоже приходят: их отсекает
+    sync_external по отпечатку файлов.
+    """
+
+    changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.recheck)
+        self.watcher.directoryChanged.connect(self.recheck)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(WATCH_DELAY)
+        self.timer.timeout.connect(self._fire)
+
+    def watch(self):
+        """Переключается на файлы текущего хранилища (после загрузки и смены профиля)."""
+        watched = self.watcher.files() + self.watcher.directories()
+        if watched:
+            self.watcher.removePaths(watched)
+        self._add_paths()
+
+    def recheck(self, *_):
+        """Откладывает проверку на WATCH_DELAY (например, пока хранилище занято)."""
+        self.timer.start()
+
+    def _add_paths(self):
+        paths = [os.path.abspath(p) for p in quest_data.store_paths()]
+        paths += {os.path.dirname(p) for p in paths}
+        watched = set(self.watcher.files() + self.watcher.directories())
+        missing = [p for p in paths if p not in watched and os.path.exists(p)]
+        if missing:
+            self.watcher.addPaths(missing)
+
+    def _fire(self):
+        self._add_paths()
+        self.changed.emit()
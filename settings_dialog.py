@@ -1,26 +1,40 @@
 import os
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QComboBox, QMessageBox, QFileDialog
+    QComboBox, QMessageBox, QFileDialog, QInputDialog, QProgressDialog
 )
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QFont
-from quest_data import save_data, export_data, import_data, reset_data
+from quest_data import export_data, import_data, merge_import, reset_data
+from quest_io import IoService
+
+# Форматы выгрузки; какой из них записать, export_data решает по имени файла.
+EXPORT_FILTER = "JSON (*.json);;JSON, сжатый (*.json.gz);;NDJSON (*.ndjson);;NDJSON, сжатый (*.ndjson.gz)"
+
+# Правила merge_import для задач, которые есть и здесь, и в файле.
+MERGE_POLICY_NAMES = {
+    "newest": "Оставить изменённую позже",
+    "max_progress": "Оставить с большим прогрессом",
+    "keep_both": "Оставить обе",
+}
+
+# Окно хода операции появляется, только если она идёт дольше этого (мс).
+PROGRESS_DELAY = 400
 
 
 class SettingsDialog(QDialog):
-    def __init__(self, parent, current_theme, on_theme_change, on_data_change):
+    def __init__(self, parent, current_theme, on_theme_change, on_data_change, data=None, io=None):
         super().__init__(parent)
         self.setWindowTitle("⚙️ Настройки")
         self.resize(400, 300)
+        self.data = data
+        self.io = io if io is not None else IoService(self)
         self.current_theme = current_theme
         self.on_theme_change = on_theme_change
         self.on_data_change = on_data_change
         self.setup_ui()
 
     def setup_ui(self):
-        self.apply_theme_style()
-
         layout = QVBoxLayout(self)
         layout.setSpacing(20)
 
@@ -43,8 +57,13 @@ class SettingsDialog(QDialog):
         import_btn.clicked.connect(self.import_data)
         data_group.layout().addWidget(import_btn)
 
+        if self.data is not None:
+            merge_btn = QPushButton("🔀 Объединить с файлом")
+            merge_btn.clicked.connect(self.merge_data)
+            data_group.layout().addWidget(merge_btn)
+
         reset_btn = QPushButton("🗑️ Удалить все данные")
-        reset_btn.setStyleSheet("background-color: #EF4444; color: white;")
+        reset_btn.setProperty("role", "danger")
         reset_btn.clicked.connect(self.reset_data)
         data_group.layout().addWidget(reset_btn)
 
@@ -59,25 +78,55 @@ class SettingsDialog(QDialog):
         from PyQt6.QtWidgets import QFrame, QVBoxLayout
         frame = QFrame()
         frame.setFrameShape(QFrame.Shape.StyledPanel)
+        frame.setProperty("group", True)
         group_layout = QVBoxLayout(frame)
         group_layout.setContentsMargins(12, 12, 12, 12)
         group_layout.addWidget(QLabel(f"<b>{title}</b>"))
         return frame
 
+    def run_io(self, label, failure, func, *args, on_done, reports_progress=False):
+        """Выполняет операцию с файлами в фоне (IoService); пока она идёт, показывает окно хода.
+
+        Окно модально, поэтому менять данные до конца операции нельзя. С reports_progress
+        func принимает progress(сделано, всего) и окно показывает проценты.
+        """
+        progress = QProgressDialog(label, None, 0, 0, self)
+        progress.setWindowTitle("⏳ Подождите")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(PROGRESS_DELAY)
+        progress.setAutoClose(False)
+
+        def on_progress(done, total):
+            # Байты и записи переводятся в проценты: int диалога не вместит большой файл.
+            progress.setMaximum(100)
+            progress.setValue(min(100, done * 100 // total) if total else 0)
+
+        def finished(result):
+            # cancel(), а не close(): окно не всплывёт по таймеру после быстрой операции.
+            progress.cancel()
+            on_done(result)
+
+        def failed(error):
+            progress.cancel()
+            QMessageBox.critical(self, "❌ Ошибка", f"{failure}:\n{error}")
+
+        self.io.run(func, *args, on_done=finished, on_error=failed,
+                    on_progress=on_progress if reports_progress else None)
+
     def export_data(self):
         filename, _ = QFileDialog.getSaveFileName(
-            self, "Сохранить данные", "achievements_backup.json", "JSON Files (*.json)"
+            self, "Сохранить данные", "achievements_backup.json", EXPORT_FILTER
         )
         if filename:
-            try:
-                export_data(filename)
-                QMessageBox.information(self, "✅ Успех", "Данные успешно экспортированы!")
-            except Exception as e:
-                QMessageBox.critical(self, "❌ Ошибка", f"Не удалось экспортировать:\n{str(e)}")
+            self.run_io(
+                "Выгрузка данных…", "Не удалось экспортировать", export_data, filename,
+                on_done=lambda _: QMessageBox.information(self, "✅ Успех", "Данные успешно экспортированы!"),
+                reports_progress=True
+            )
 
     def import_data(self):
         filename, _ = QFileDialog.getOpenFileName(
-            self, "Загрузить данные", "", "JSON Files (*.json)"
+            self, "Загрузить данные", "", "JSON Files (*.json *.json.gz)"
         )
         if filename:
             reply = QMessageBox.warning(
@@ -86,13 +135,41 @@ class SettingsDialog(QDialog):
                 QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
             )
             if reply == QMessageBox.StandardButton.Yes:
-                try:
-                    new_data = import_data(filename)
-                    self.on_data_change(new_data)
-                    QMessageBox.information(self, "✅ Успех", "Данные успешно импортированы!")
-                    self.accept()
-                except Exception as e:
-                    QMessageBox.critical(self, "❌ Ошибка", f"Не удалось импортировать:\n{str(e)}")
+                self.run_io("Импорт данных…", "Не удалось импортировать", import_data, filename,
+                            on_done=self.on_imported)
+
+    def on_imported(self, new_data):
+        self.on_data_change(new_data)
+        QMessageBox.information(self, "✅ Успех", "Данные успешно импортированы!")
+        self.accept()
+
+    def merge_data(self):
+        """Добавляет задачи и историю из файла к текущим, ничего не удаляя."""
+        filename, _ = QFileDialog.getOpenFileName(
+            self, "Объединить с файлом", "", EXPORT_FILTER
+        )
+        if not filename:
+            return
+        names = list(MERGE_POLICY_NAMES.values())
+        name, ok = QInputDialog.getItem(
+            self, "Совпадающие задачи", "Если задача есть и здесь, и в файле:", names, 0, False
+        )
+        if not ok:
+            return
+        policy = list(MERGE_POLICY_NAMES)[names.index(name)]
+        self.run_io("Объединение данных…", "Не удалось объединить", merge_import, self.data, filename, policy,
+                    on_done=self.on_merged, reports_progress=True)
+
+    def on_merged(self, report):
+        QMessageBox.information(
+            self, "✅ Данные объединены",
+            f"Новых задач: {report['added']}\n"
+            f"Заменено: {report['replaced']}, оставлено своих: {report['kept']}, "
+            f"копий: {report['copied']}, без изменений: {report['unchanged']}\n"
+            f"Выполнений добавлено: {report['completions_added']} "
+            f"(уже были: {report['completions_skipped']}), XP: +{report['xp_added']}"
+        )
+        self.accept()
 
     def reset_data(self):
         reply = QMessageBox.critical(
@@ -101,85 +178,13 @@ class SettingsDialog(QDialog):
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
         if reply == QMessageBox.StandardButton.Yes:
-            new_data = reset_data()
-            self.on_data_change(new_data)
-            QMessageBox.information(self, "✅ Сброс", "Все данные удалены.")
-            self.accept()
-    
-    def apply_theme_style(self):
-        if self.current_theme == "dark":
-            self.setStyleSheet("""
-                QDialog {
-                    background-color: #111827;
-                    color: #E5E7EB;
-                    font-family: 'Segoe UI';
-                }
-                QLabel {
-                    color: #E5E7EB;
-                }
-                QPushButton {
-                    padding: 8px 16px;
-                    border-radius: 8px;
-                    font-weight: 600;
-                    background: #4F46E5;
-                    color: white;
-                    border: none;
-                }
-                QPushButton:hover {
-                    background: #4338CA;
-                }
-                QComboBox {
-                    padding: 6px;
-                    border: 1px solid #374151;
-                    border-radius: 6px;
-                    background: #1F2937;
-                    color: #E5E7EB;
-                }
-                QFrame {
-                    background: #1F2937;
-                    border: 1px solid #374151;
-                    border-radius: 10px;
-                    padding: 12px;
-                }
-                QFrame QLabel {
-                    color: #E5E7EB;
-                }
-            """)
-        else:
-            self.setStyleSheet("""
-                QDialog {
-                    background-color: #F9FAFB;
-                    color: #1F2937;
-                    font-family: 'Segoe UI';
-                }
-                QLabel {
-                    color: #1F2937;
-                }
-                QPushButton {
-                    padding: 8px 16px;
-                    border-radius: 8px;
-                    font-weight: 600;
-                    background: #4A6CF7;
-                    color: white;
-                    border: none;
-                }
-                QPushButton:hover {
-                    background: #3a5bf5;
-                }
-                QComboBox {
-                    padding: 6px;
-                    border: 1px solid #E5E7EB;
-                    border-radius: 6px;
-                    background: white;
-                }
-                QFrame {
-                    background: white;
-                    border: 1px solid #E5E7EB;
-                    border-radius: 10px;
-                    padding: 12px;
-                }
-            """)
+            self.run_io("Удаление данных…", "Не удалось удалить данные", reset_data, on_done=self.on_reset)
 
+    def on_reset(self, new_data):
+        self.on_data_change(new_data)
+        QMessageBox.information(self, "✅ Сброс", "Все данные удалены.")
+        self.accept()
+    
     def accept(self):
         new_theme = "light" if self.theme_combo.currentText() == "Светлая" else "dark"
         if new_theme != self.current_theme:
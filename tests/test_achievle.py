@@ -0,0 +1,47 @@
+import io
+import json
+
+import achievle
+
+
+def run(capsys, monkeypatch, data_dir, *argv, stdin=""):
+    monkeypatch.setattr("sys.stdin", io.StringIO(stdin))
+    code = achievle.main(["--data-dir", str(data_dir), *argv])
+    return code, capsys.readouterr().out
+
+
+def test_progress_sums_duplicate_ids(tmp_path, capsys, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    code, out = run(capsys, monkeypatch, tmp_path, "add", "Читать", "--target", "100")
+    assert code == 0
+    quest_id = out.strip()
+
+    lines = [{"id": quest_id, "amount": 3}, {"id": quest_id, "amount": 3}, {"id": quest_id, "amount": 2}]
+    stdin = "".join(json.dumps(line) + "\n" for line in lines)
+    code, _ = run(capsys, monkeypatch, tmp_path, "progress", "-", stdin=stdin)
+    assert code == 0
+
+    code, out = run(capsys, monkeypatch, tmp_path, "list", "--ndjson")
+    assert code == 0
+    [quest] = [json.loads(line) for line in out.splitlines()]
+    assert quest["current_value"] == 8
+
+
+def test_ndjson_flag_before_or_after_command():
+    parser = achievle.build_parser()
+    assert parser.parse_args(["list", "--ndjson"]).ndjson
+    assert parser.parse_args(["--ndjson", "list"]).ndjson
+    assert not parser.parse_args(["list"]).ndjson
+
+
+def test_bad_import_file_is_reported(tmp_path, capsys, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    code = achievle.main(["--data-dir", str(tmp_path), "import", str(tmp_path / "missing.json")])
+    assert code == 2
+    assert capsys.readouterr().err.startswith("achievle: ")
+
+    broken = tmp_path / "broken.json"
+    broken.write_text("{не json", encoding="utf-8")
+    code = achievle.main(["--data-dir", str(tmp_path), "import", str(broken)])
+    assert code == 2
+    assert capsys.readouterr().err.startswith("achievle: ")
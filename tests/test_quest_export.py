@@ -0,0 +1,24 @@
+import json
+
+import quest_data
+
+
+def test_full_export_has_no_internal_keys(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    data = quest_data.load_data()
+    try:
+        quest_data.add_quest(data, {"title": "Задача", "type": "Испытание", "xp": 10})
+        for fmt in ("json", "ndjson"):
+            path = str(tmp_path / f"export.{fmt}")
+            quest_data.export_data(path, fmt)
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+            assert "journal_seq" not in text
+        with open(tmp_path / "export.json", encoding="utf-8") as f:
+            exported = json.load(f)
+        assert [q["title"] for q in exported["quests"]] == ["Задача"]
+        # Снимок с journal_seq при этом остаётся прежним.
+        with open(quest_data.DATA_FILE, encoding="utf-8") as f:
+            assert "journal_seq" in json.load(f)
+    finally:
+        quest_data.close_data(data)
@@ -0,0 +1,94 @@
+import json
+import os
+
+import pytest
+
+import quest_data
+from quest_journal import QuestJournal
+
+
+def crash():
+    """Процесс «упал»: файлы остаются как есть, кэши в памяти теряются."""
+    journal = quest_data._journals.pop(quest_data.DATA_FILE, None)
+    if journal is not None:
+        journal.close()
+    quest_data._seen.pop(quest_data.DATA_FILE, None)
+
+
+def journal_lines():
+    with open(quest_data.DATA_FILE + ".journal", encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+@pytest.fixture
+def data(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    data = quest_data.load_data()
+    yield data
+    quest_data.close_data(data)
+
+
+def test_replay_after_crash_drops_torn_tail(data):
+    kept = quest_data.add_quest(data, {"title": "Остаётся", "type": "Обычное задание", "xp": 10})
+    done = quest_data.add_quest(data, {"title": "Выполнена", "type": "Обычное задание", "xp": 150})
+    quest_data.finish_quest(data, done)
+    crash()
+    # Запись, оборванная на середине строки.
+    with open(quest_data.DATA_FILE + ".journal", "a", encoding="utf-8") as f:
+        f.write('{"seq": 99, "op": "set", "key": "theme", "va')
+
+    loaded = quest_data.load_data()
+    assert [q["id"] for q in loaded["quests"]] == [kept["id"]]
+    assert [c["id"] for c in loaded["completed_quests"]] == [done["id"]]
+    assert (loaded["xp"], loaded["level"]) == (150, quest_data.level_for_total_xp(150))
+    assert loaded["theme"] == "light"
+    lines = journal_lines()
+    assert all(line.endswith("}") for line in lines)
+    assert [json.loads(line)["seq"] for line in lines] == [1, 2, 3]
+
+    # Новые записи продолжают номера после обрезанного хвоста.
+    quest_data.set_setting(loaded, "theme", "dark")
+    assert json.loads(journal_lines()[-1])["seq"] == 4
+    crash()
+    assert quest_data.load_data()["theme"] == "dark"
+
+
+def test_compaction_writes_snapshot_and_empties_journal(data):
+    quest = quest_data.add_quest(data, {"title": "Задача", "type": "Обычное задание", "xp": 30})
+    quest_data.finish_quest(data, quest)
+    quest_data.compact_journal()
+    assert not os.path.exists(quest_data.DATA_FILE + ".journal")
+    with open(quest_data.DATA_FILE, encoding="utf-8") as f:
+        snapshot = json.load(f)
+    assert snapshot["xp"] == 30 and snapshot["journal_seq"] == 2
+    crash()
+    loaded = quest_data.load_data()
+    assert loaded["xp"] == 30 and loaded["quests"] == []
+
+
+def test_crash_between_snapshot_and_journal_trim_counts_once(data, monkeypatch):
+    quest = quest_data.add_quest(data, {"title": "Задача", "type": "Обычное задание", "xp": 40})
+    quest_data.finish_quest(data, quest)
+
+    def fail(self, seq):
+        raise OSError("сбой перед обрезкой журнала")
+
+    monkeypatch.setattr(QuestJournal, "drop_upto", fail)
+    with pytest.raises(OSError):
+        quest_data.compact_journal()
+    # Снимок уже содержит записи, которые остались и в журнале.
+    assert len(journal_lines()) == 2
+    crash()
+    loaded = quest_data.load_data()
+    assert loaded["xp"] == 40 and len(loaded["completed_quests"]) == 1
+
+
+def test_interrupted_snapshot_replace_is_recovered(data):
+    quest_data.add_quest(data, {"title": "Задача", "type": "Обычное задание", "xp": 10})
+    quest_data.compact_journal()
+    crash()
+    # Сбой внутри write_atomic: старый снимок уже ушёл в .bak, новый лежит во .tmp.
+    os.replace(quest_data.DATA_FILE, quest_data.DATA_FILE + ".tmp")
+    loaded = quest_data.load_data()
+    assert [q["title"] for q in loaded["quests"]] == ["Задача"]
+    assert os.path.exists(quest_data.DATA_FILE)
@@ -0,0 +1,34 @@
+import pytest
+
+import quest_data
+from quest_lock import StoreLock
+
+
+def test_busy_store_leaves_data_unchanged(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(quest_data, "LOCK_TIMEOUT", 0.05)
+    data = quest_data.load_data()
+    try:
+        quest = quest_data.add_quest(data, {"title": "Задача", "type": "Испытание", "xp": 10})
+        # Другой экземпляр программы: своя открытая блокировка того же файла.
+        other = StoreLock(quest_data.DATA_FILE + ".lock")
+        other.acquire()
+        try:
+            with pytest.raises(TimeoutError):
+                quest_data.update_quest(data, quest, xp=20)
+            with pytest.raises(TimeoutError):
+                quest_data.finish_quest(data, quest)
+            with pytest.raises(TimeoutError):
+                quest_data.set_setting(data, "theme", "dark")
+        finally:
+            other.release()
+            other.close()
+        assert quest["xp"] == 10 and "updated_at" in quest
+        assert data["quests"] == [quest]
+        assert data["xp"] == 0 and data["completed_quests"] == []
+        assert data.get("theme", "light") == "light"
+
+        quest_data.update_quest(data, quest, xp=20)
+        assert quest_data.load_data()["quests"][0]["xp"] == 20
+    finally:
+        quest_data.close_data(data)
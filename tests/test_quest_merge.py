@@ -0,0 +1,75 @@
+import json
+from datetime import date
+
+import pytest
+
+import quest_data
+from quest_archive import CompletionArchive
+
+
+def read_snapshot():
+    with open(quest_data.DATA_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("policy", quest_data.MERGE_POLICIES)
+def test_merge_policies_and_cold_completions(tmp_path, monkeypatch, policy):
+    monkeypatch.chdir(tmp_path)
+    # Архивы кэшируются по относительному пути, одинаковому во всех tmp_path.
+    monkeypatch.setattr(quest_data, "_archives", {})
+    data = quest_data.load_data()
+    try:
+        edited = quest_data.add_quest(data, {"title": "Правка", "type": "Обычное задание", "xp": 10})
+        progressed = quest_data.add_quest(data, {"title": "Прогресс", "type": "Обычное задание", "xp": 10,
+                                                 "is_cumulative": True, "target_value": 10, "current_value": 5})
+        done = quest_data.add_quest(data, {"title": "Выполнена", "type": "Обычное задание", "xp": 20})
+        done_locally = quest_data.finish_quest(data, done)
+
+        # Другая машина: задача правлена позже, у другой прогресс больше, но правка старее.
+        theirs_edited = dict(edited.to_dict(), title="Правка оттуда", updated_at="2999-01-01T00:00:00Z")
+        theirs_progressed = dict(progressed.to_dict(), current_value=7, updated_at="2000-01-01T00:00:00Z")
+        new = {"id": "new", "title": "Новая", "type": "Обычное задание", "xp": 5}
+        cold_day = date(date.today().year - 2, 3, 15)
+        completions = [
+            done_locally.to_dict(),
+            {"id": "new-done", "title": "Сегодня", "type": "Испытание", "xp": 30, "date": str(date.today())},
+            {"id": "old-done", "title": "Давно", "type": "Испытание", "xp": 40, "date": str(cold_day)},
+        ]
+        export = tmp_path / "theirs.json"
+        export.write_text(json.dumps({"quests": [theirs_edited, theirs_progressed, new],
+                                      "completed_quests": completions}), encoding="utf-8")
+
+        report = quest_data.merge_import(data, str(export), policy)
+        assert (report["completions_added"], report["completions_skipped"], report["xp_added"]) == (2, 1, 70)
+        assert report["added"] == 1
+    finally:
+        quest_data.close_data(data)
+
+    # Проверяем то, что осталось на диске, а не в памяти.
+    loaded = quest_data.load_data()
+    try:
+        by_title = {q["title"]: q for q in loaded["quests"]}
+        if policy == "newest":
+            assert sorted(by_title) == ["Новая", "Правка оттуда", "Прогресс"]
+            assert by_title["Прогресс"]["current_value"] == 5
+        elif policy == "max_progress":
+            assert sorted(by_title) == ["Новая", "Правка", "Прогресс"]
+            assert by_title["Прогресс"]["current_value"] == 7
+        else:
+            titles = sorted(q["title"] for q in loaded["quests"])
+            assert titles == ["Новая", "Правка", "Правка оттуда", "Прогресс", "Прогресс"]
+            assert len({q["id"] for q in loaded["quests"]}) == 5
+        assert loaded["xp"] == 20 + 70
+
+        # Старое выполнение ушло в архив, в снимке — только горячие.
+        hot_ids = sorted(c["id"] for c in read_snapshot()["completed_quests"])
+        assert hot_ids == sorted([done["id"], "new-done"])
+        archive = CompletionArchive(quest_data.ARCHIVE_DIR, quest_data.ARCHIVE_COMPRESS)
+        assert archive.months() == [str(cold_day)[:7]]
+        assert [c["id"] for c in archive.iter_completions()] == ["old-done"]
+
+        # Повторное слияние того же файла ничего не добавляет.
+        report = quest_data.merge_import(loaded, str(export), policy)
+        assert report["completions_added"] == 0 and report["completions_skipped"] == 3
+    finally:
+        quest_data.close_data(loaded)
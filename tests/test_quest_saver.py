@@ -0,0 +1,42 @@
+import json
+
+import quest_data
+
+
+def test_failed_snapshot_keeps_pending_records(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(quest_data, "JOURNAL_ENABLED", False)
+    monkeypatch.setattr(quest_data, "SAVE_DELAY", 0)
+    errors = []
+
+    def listener(event, obj):
+        if event == "save_error":
+            errors.append(obj)
+
+    quest_data.subscribe(listener)
+    data = quest_data.load_data()
+    try:
+        real_write = quest_data.write_atomic
+
+        def failing_write(*args, **kwargs):
+            raise OSError("диск заполнен")
+
+        monkeypatch.setattr(quest_data, "write_atomic", failing_write)
+        quest = quest_data.add_quest(data, {"title": "Задача", "type": "Испытание", "xp": 10})
+        quest_data.flush_data()
+        assert quest_data.save_error() == "диск заполнен"
+        assert errors == ["диск заполнен"]
+        assert [r["op"] for r in quest_data._pending[quest_data.DATA_FILE]] == ["put_quest"]
+
+        monkeypatch.setattr(quest_data, "write_atomic", real_write)
+        quest_data.update_quest(data, quest, xp=20)
+        quest_data.flush_data()
+        assert quest_data.save_error() is None
+        assert errors == ["диск заполнен", None]
+        assert quest_data._pending[quest_data.DATA_FILE] == []
+        with open(quest_data.DATA_FILE, encoding="utf-8") as f:
+            assert [q["xp"] for q in json.load(f)["quests"]] == [20]
+    finally:
+        quest_data.unsubscribe(listener)
+        quest_data.close_data(data)
+        quest_data._savers.clear()
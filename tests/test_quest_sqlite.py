@@ -0,0 +1,48 @@
+from datetime import date, timedelta
+
+import pytest
+
+import quest_data
+
+
+@pytest.fixture
+def sqlite_data(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(quest_data, "STORAGE_BACKEND", "sqlite")
+    today = date.today()
+    old = str(today - timedelta(days=quest_data.ARCHIVE_AFTER_DAYS + 62))
+    quest_data.sqlite_store().save({
+        "level": 1, "xp": 30, "quests": [], "daily_reset": str(today),
+        "completed_quests": [
+            {"id": "old", "title": "Старое", "type": "Испытание", "xp": 10, "date": old},
+            {"id": "new", "title": "Новое", "type": "Испытание", "xp": 15, "date": str(today)},
+            {"id": "undated", "title": "Без даты", "type": "Испытание", "xp": 5},
+        ],
+    })
+    data = quest_data.load_data()
+    yield data
+    quest_data.close_data(data)
+
+
+def test_load_keeps_only_hot_window(sqlite_data):
+    assert sorted(c["id"] for c in sqlite_data["completed_quests"]) == ["new", "undated"]
+    assert len(quest_data.all_completions(sqlite_data)) == 3
+    totals = quest_data.archived_totals()
+    assert (totals["count"], totals["xp"]) == (1, 10)
+
+
+def test_save_keeps_cold_history(sqlite_data):
+    quest_data.save_data(sqlite_data)
+    assert quest_data.sqlite_store().count_completions() == 3
+    assert sorted(c["id"] for c in quest_data.all_completions(sqlite_data)) == ["new", "old", "undated"]
+
+
+def test_updates_keep_position_and_inserts_append(sqlite_data):
+    quests = [quest_data.add_quest(sqlite_data, {"title": t, "type": "Испытание", "xp": 10}) for t in "abc"]
+    quest_data.update_quest(sqlite_data, quests[0], xp=20)
+    quest_data.add_quest(sqlite_data, {"title": "d", "type": "Испытание", "xp": 10})
+    store = quest_data.sqlite_store()
+    assert [q["title"] for q in store.iter_quests()] == ["a", "b", "c", "d"]
+    assert store.get_quest(quests[0]["id"])["xp"] == 20
+    plan = store.conn.execute("EXPLAIN QUERY PLAN SELECT MAX(position) FROM quests").fetchall()
+    assert any("idx_quests_position" in row[-1] for row in plan)
@@ -0,0 +1,54 @@
+import os
+from datetime import date, timedelta
+
+import pytest
+
+import quest_data
+from quest_stats import QuestStats
+
+
+def test_columns_are_built_on_first_query(tmp_path, monkeypatch):
+    pytest.importorskip("numpy")
+    monkeypatch.chdir(tmp_path)
+    data = quest_data.load_data()
+    data["completed_quests"] = [
+        {"id": "a", "title": "A", "type": "Испытание", "xp": 10, "date": "2024-03-04"},
+        {"id": "b", "title": "B", "type": "Испытание", "xp": 5, "date": "2024-03-05"},
+    ]
+    try:
+        stats = QuestStats(data)
+        assert stats.done == 2
+        assert not os.path.exists(quest_data.COLUMNS_DIR)
+
+        completed = {"id": "c", "title": "C", "type": "Мастерство", "xp": 7, "date": "2024-03-11"}
+        data["completed_quests"].append(completed)
+        stats.apply("completed", completed)
+        assert stats.columns.count_by_type() == {"Испытание": 2, "Мастерство": 1}
+        assert os.path.exists(quest_data.COLUMNS_DIR)
+    finally:
+        quest_data.close_data(data)
+
+
+def test_period_queries_match_counters(tmp_path, monkeypatch):
+    pytest.importorskip("numpy")
+    monkeypatch.chdir(tmp_path)
+    today = date(2024, 3, 14)
+    data = quest_data.load_data()
+    data["completed_quests"] = [
+        {"id": f"q{i}", "title": "T", "type": quest_data.TASK_TYPES[i % 3], "xp": 10 + i,
+         "date": str(today - timedelta(days=i % 40))}
+        for i in range(200)
+    ]
+    try:
+        counters = QuestStats(data, columns=False)
+        columns = QuestStats(data)
+        assert columns.columns is not None
+        for stats in (counters, columns):
+            assert stats.type_stats(quest_data.TASK_TYPES) == counters.type_stats(quest_data.TASK_TYPES)
+            assert stats.completed_since(7, today) == counters.completed_since(7, today)
+            for period in ("day", "week", "month"):
+                assert stats.xp_this_period(period, today) == counters.xp_this_period(period, today)
+            assert stats.xp_daily_mean(7, today) == pytest.approx(counters.xp_daily_mean(7, today))
+        assert counters.xp_this_period("month", today) > 0
+    finally:
+        quest_data.close_data(data)